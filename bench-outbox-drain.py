@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Outbox 부하 생성 + drain 벤치마크
+
+로컬 PostgreSQL에 합성(synthetic) 상품 raw_data row와 그에 대한 RawDataIngested outbox
+이벤트를 같은 트랜잭션에서 COPY로 대량 삽입하고, 런타임(OutboxPollingWorker)이 실제로
+슬라이싱하며 처리하는 동안 drain 처리량과 created→processed latency 분위수를 샘플링하여
+JSON 리포트로 저장합니다.
+
+- 실행마다 전용 tenant(bench-{run_id})를 사용 → 정리 시 tenant/aggregateid 범위로만 삭제
+- payload는 런타임의 RawDataIngestedPayload(tenantId/entityKey/version) 형식
+- PROCESSED latency와 FAILED 건수/사유/claim 지연을 따로 보고
+
+연결 정보는 check-outbox.py와 동일(.env / DB_URL, DB_USER, DB_PASSWORD)합니다.
+
+사용 예:
+  # 런타임을 띄운 상태에서
+  python3 bench-outbox-drain.py --rows 20000 --rate 2000 --payload-bytes 512 \
+      --report build/outbox-bench.json
+
+  # 처리 완료 후 곧바로 벤치마크 데이터 삭제
+  python3 bench-outbox-drain.py --rows 5000 --cleanup
+
+  # 이전 실행(run_id는 리포트의 runId)의 데이터만 삭제
+  python3 bench-outbox-drain.py --cleanup-run 20261019120000-1a2b3c
+"""
+
+import argparse
+import csv
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+AGGREGATE_TYPE = "raw_data"
+EVENT_TYPE = "RawDataIngested"
+# 처리 결과로 런타임이 같은 aggregateid로 만드는 후속 이벤트(ShipRequested 등) - 정리 대상
+FOLLOW_UP_AGGREGATE_TYPES = ("slice",)
+SCHEMA_ID = "entity.product.v1"
+SCHEMA_VERSION = "1.0.0"
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_SAMPLE_INTERVAL_SECONDS = 1.0
+DEFAULT_TIMEOUT_SECONDS = 600
+LATENCY_PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", "postgres", ""}
+
+COPY_RAW_DATA_SQL = """
+    COPY raw_data (tenant_id, entity_key, version, schema_id, schema_version, content_hash, content)
+    FROM STDIN WITH (FORMAT csv)
+"""
+
+COPY_OUTBOX_SQL = """
+    COPY outbox (id, aggregatetype, aggregateid, type, payload, idempotency_key, status)
+    FROM STDIN WITH (FORMAT csv)
+"""
+
+# aggregateid('{tenant}:{entityKey}') 범위 조건 → idx_outbox_aggregate(aggregatetype, aggregateid) 범위 스캔
+# (':' 다음 문자 ';'를 상한으로 사용해 'bench-{run_id}:' prefix만 선택)
+BENCH_FILTER_SQL = "aggregatetype = %(type)s AND aggregateid >= %(lo)s AND aggregateid < %(hi)s"
+
+STATUS_SQL = f"""
+    SELECT status, COUNT(*) AS count
+    FROM outbox
+    WHERE {BENCH_FILTER_SQL}
+    GROUP BY status
+"""
+
+LATENCY_SQL = f"""
+    SELECT
+        COUNT(*) AS count,
+        percentile_cont(%(percentiles)s) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM (processed_at - created_at))) AS percentiles,
+        MAX(EXTRACT(EPOCH FROM (processed_at - created_at))) AS max,
+        AVG(EXTRACT(EPOCH FROM (processed_at - created_at))) AS avg
+    FROM outbox
+    WHERE {BENCH_FILTER_SQL}
+      AND status = 'PROCESSED'
+"""
+
+# FAILED는 processed_at이 없으므로 created→claimed 지연과 사유만 따로 집계
+FAILED_LATENCY_SQL = f"""
+    SELECT
+        COUNT(*) AS count,
+        percentile_cont(%(percentiles)s) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM (claimed_at - created_at))) AS percentiles,
+        MAX(EXTRACT(EPOCH FROM (claimed_at - created_at))) AS max,
+        AVG(EXTRACT(EPOCH FROM (claimed_at - created_at))) AS avg
+    FROM outbox
+    WHERE {BENCH_FILTER_SQL}
+      AND status = 'FAILED'
+"""
+
+FAILED_REASONS_SQL = f"""
+    SELECT LEFT(failure_reason, 200) AS reason, COUNT(*) AS count
+    FROM outbox
+    WHERE {BENCH_FILTER_SQL}
+      AND status = 'FAILED'
+    GROUP BY 1
+    ORDER BY count DESC
+    LIMIT 5
+"""
+
+CLEANUP_OUTBOX_SQL = "DELETE FROM outbox WHERE aggregatetype = ANY(%(types)s) AND aggregateid >= %(lo)s AND aggregateid < %(hi)s"
+
+# 슬라이싱 결과까지 tenant 단위로 정리 (각 테이블의 tenant_id 선두 인덱스 사용)
+CLEANUP_TENANT_TABLES = ("inverted_index", "slices", "raw_data")
+
+
+def load_check_outbox_module():
+    # 연결 로직은 check-outbox.py를 재사용
+    path = Path(__file__).resolve().parent / "check-outbox.py"
+    spec = importlib.util.spec_from_file_location("check_outbox", str(path))
+    module = importlib.util.module_from_spec(spec)
+    assert spec and spec.loader
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_tenant(run_id):
+    return f"bench-{run_id}"
+
+
+def bench_params(run_id):
+    prefix = f"{bench_tenant(run_id)}:"
+    return {
+        "type": AGGREGATE_TYPE,
+        "types": [AGGREGATE_TYPE, *FOLLOW_UP_AGGREGATE_TYPES],
+        "tenant": bench_tenant(run_id),
+        "lo": prefix,
+        "hi": prefix[:-1] + ";",
+    }
+
+
+def canonical_json(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def build_copy_batches(run_id, start_seq, count, payload_bytes):
+    """
+    COPY용 CSV 버퍼 (raw_data, outbox) 생성
+    - raw_data: entity.product.v1 필수 필드 + description padding
+      content_hash는 IngestWorkflow 규칙(sha256(canonical|schemaId|schemaVersion))의 hex 64자
+      (JooqRawDataRepository처럼 "sha256:" 접두사 없이 저장 → VARCHAR(64))
+    - outbox: RawDataIngestedPayload(tenantId/entityKey/version) → 런타임이 실제로 슬라이싱
+    """
+    tenant = bench_tenant(run_id)
+    padding = "x" * payload_bytes
+    raw_buffer = io.StringIO()
+    outbox_buffer = io.StringIO()
+    raw_writer = csv.writer(raw_buffer)
+    outbox_writer = csv.writer(outbox_buffer)
+    for seq in range(start_seq, start_seq + count):
+        sku = f"BENCH{seq:010d}"
+        entity_key = f"PRODUCT#{tenant}#{sku}"
+        content = canonical_json({"sku": sku, "name": f"Bench product {seq}", "price": 10000, "description": padding})
+        content_hash = hashlib.sha256(f"{content}|{SCHEMA_ID}|{SCHEMA_VERSION}".encode("utf-8")).hexdigest()
+        raw_writer.writerow([tenant, entity_key, 1, SCHEMA_ID, SCHEMA_VERSION, content_hash, content])
+
+        payload = canonical_json({"payloadVersion": "1.0", "tenantId": tenant, "entityKey": entity_key, "version": 1})
+        outbox_writer.writerow([
+            str(uuid.uuid4()),
+            AGGREGATE_TYPE,
+            f"{tenant}:{entity_key}",
+            EVENT_TYPE,
+            payload,
+            f"bench-{run_id}-{seq}",
+            "PENDING",
+        ])
+    raw_buffer.seek(0)
+    outbox_buffer.seek(0)
+    return raw_buffer, outbox_buffer
+
+
+def produce(conn, run_id, args, stats):
+    """--rate에 맞춰 배치 단위로 COPY (rate=0이면 최대 속도). raw_data와 outbox는 같은 트랜잭션"""
+    started = time.perf_counter()
+    inserted = 0
+    with conn.cursor() as cur:
+        while inserted < args.rows:
+            count = min(args.batch_size, args.rows - inserted)
+            raw_buffer, outbox_buffer = build_copy_batches(run_id, inserted, count, args.payload_bytes)
+            cur.copy_expert(COPY_RAW_DATA_SQL, raw_buffer)
+            cur.copy_expert(COPY_OUTBOX_SQL, outbox_buffer)
+            conn.commit()
+            inserted += count
+            stats["inserted"] = inserted
+            if args.rate > 0:
+                target_elapsed = inserted / args.rate
+                sleep_for = target_elapsed - (time.perf_counter() - started)
+                if sleep_for > 0:
+                    time.sleep(sleep_for)
+    stats["insert_seconds"] = time.perf_counter() - started
+
+
+def fetch_status_counts(cur, params):
+    cur.execute(STATUS_SQL, params)
+    return {status: count for status, count in cur.fetchall()}
+
+
+def _fetch_percentiles(cur, sql, params):
+    cur.execute(sql, {**params, "percentiles": list(LATENCY_PERCENTILES)})
+    count, percentiles, max_latency, avg_latency = cur.fetchone()
+    result = {"count": count, "avg": avg_latency and float(avg_latency), "max": max_latency and float(max_latency)}
+    for q, value in zip(LATENCY_PERCENTILES, percentiles or []):
+        if value is not None:
+            result[f"p{int(q * 100)}"] = float(value)
+    return result
+
+
+def fetch_latency(cur, params):
+    """PROCESSED row의 created→processed latency"""
+    return _fetch_percentiles(cur, LATENCY_SQL, params)
+
+
+def fetch_failed(cur, params):
+    """FAILED row 건수, created→claimed 지연, 상위 실패 사유"""
+    failed = _fetch_percentiles(cur, FAILED_LATENCY_SQL, params)
+    cur.execute(FAILED_REASONS_SQL, params)
+    return {
+        "count": failed.pop("count"),
+        "claimLatencySeconds": failed,
+        "topReasons": [{"reason": reason, "count": count} for reason, count in cur.fetchall()],
+    }
+
+
+def connect_local(check_outbox, allow_remote):
+    """로컬 DB가 아니면 (--allow-remote 없이는) 합성 데이터 삽입/삭제 거부"""
+    conn = check_outbox.connect_from_env()
+    host = conn.info.host if hasattr(conn, "info") else ""
+    if host not in LOCAL_HOSTS and not allow_remote:
+        conn.close()
+        print(f"❌ 로컬이 아닌 DB({host})에는 합성 데이터를 넣거나 지우지 않습니다. 의도한 경우 --allow-remote를 사용하세요.")
+        sys.exit(1)
+    return conn
+
+
+def cleanup_run(cur, run_id):
+    """run_id의 outbox(후속 이벤트 포함) + tenant 단위 raw_data/slices/inverted_index 삭제"""
+    params = bench_params(run_id)
+    cur.execute(CLEANUP_OUTBOX_SQL, params)
+    deleted = {"outbox": cur.rowcount}
+    for table in CLEANUP_TENANT_TABLES:
+        cur.execute(f"DELETE FROM {table} WHERE tenant_id = %(tenant)s", params)
+        deleted[table] = cur.rowcount
+    return deleted
+
+
+def run_benchmark(check_outbox, args):
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    params = bench_params(run_id)
+
+    producer_conn = connect_local(check_outbox, args.allow_remote)
+    sampler_conn = check_outbox.connect_from_env()
+    sampler_conn.autocommit = True
+
+    print(
+        f"🚀 run_id={run_id} tenant={params['tenant']} rows={args.rows} "
+        f"rate={args.rate or 'max'}/s content padding={args.payload_bytes}B"
+    )
+
+    stats = {"inserted": 0, "insert_seconds": None}
+    producer = threading.Thread(target=produce, args=(producer_conn, run_id, args, stats), daemon=True)
+    started = time.perf_counter()
+    producer.start()
+
+    samples = []
+    prev_processed = 0
+    prev_at = started
+    with sampler_conn.cursor() as cur:
+        while True:
+            time.sleep(args.sample_interval)
+            now = time.perf_counter()
+            counts = fetch_status_counts(cur, params)
+            processed = counts.get("PROCESSED", 0)
+            failed = counts.get("FAILED", 0)
+            throughput = (processed - prev_processed) / (now - prev_at) if now > prev_at else 0.0
+            samples.append({
+                "t": round(now - started, 3),
+                "inserted": stats["inserted"],
+                "pending": counts.get("PENDING", 0),
+                "processing": counts.get("PROCESSING", 0),
+                "processed": processed,
+                "failed": failed,
+                "drain_per_sec": round(throughput, 1),
+            })
+            print(
+                f"  t={now - started:7.1f}s inserted={stats['inserted']:>8} pending={counts.get('PENDING', 0):>8} "
+                f"processed={processed:>8} failed={failed:>6} drain={throughput:8.1f}/s",
+                flush=True,
+            )
+            prev_processed, prev_at = processed, now
+
+            done = not producer.is_alive() and processed + failed >= args.rows
+            if done or now - started > args.timeout:
+                break
+
+        drain_seconds = time.perf_counter() - started
+        latency = fetch_latency(cur, params)
+        failed_report = fetch_failed(cur, params)
+        final_counts = fetch_status_counts(cur, params)
+
+        if args.cleanup:
+            print(f"🧹 벤치마크 데이터 삭제: {cleanup_run(cur, run_id)}")
+
+    producer.join(timeout=1)
+    producer_conn.close()
+    sampler_conn.close()
+
+    rates = [s["drain_per_sec"] for s in samples if s["drain_per_sec"] > 0]
+    processed_total = final_counts.get("PROCESSED", 0)
+    return {
+        "runId": run_id,
+        "startedAt": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "rows": args.rows,
+            "rate": args.rate,
+            "batchSize": args.batch_size,
+            "tenant": params["tenant"],
+            "eventType": EVENT_TYPE,
+            "payloadBytes": args.payload_bytes,
+            "sampleIntervalSeconds": args.sample_interval,
+        },
+        "insert": {
+            "rows": stats["inserted"],
+            "seconds": stats["insert_seconds"],
+            "rowsPerSecond": stats["inserted"] / stats["insert_seconds"] if stats["insert_seconds"] else None,
+        },
+        "drain": {
+            "completed": processed_total + final_counts.get("FAILED", 0) >= args.rows,
+            "seconds": drain_seconds,
+            "avgPerSecond": processed_total / drain_seconds if drain_seconds else None,
+            "peakPerSecond": max(rates) if rates else 0.0,
+            "finalStatusCounts": final_counts,
+        },
+        "latencySeconds": latency,
+        "failed": failed_report,
+        "samples": samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Outbox 부하 생성 + drain 벤치마크")
+    parser.add_argument("--rows", type=int, default=10000, help="삽입할 합성 raw_data/outbox row 수")
+    parser.add_argument("--rate", type=float, default=0, help="초당 삽입 row 수 (0이면 최대 속도)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="COPY 배치 크기")
+    parser.add_argument("--payload-bytes", type=int, default=256, help="raw_data content의 description padding 크기(bytes)")
+    parser.add_argument("--sample-interval", type=float, default=DEFAULT_SAMPLE_INTERVAL_SECONDS, help="샘플링 간격(초)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS, help="drain 대기 상한(초)")
+    parser.add_argument("--report", type=str, default=None, help="JSON 리포트 경로 (기본: stdout)")
+    parser.add_argument("--cleanup", action="store_true", help="종료 시 이번 실행의 벤치마크 데이터 삭제")
+    parser.add_argument("--cleanup-run", type=str, default=None, metavar="RUN_ID", help="지정한 실행의 벤치마크 데이터만 삭제하고 종료")
+    parser.add_argument("--allow-remote", action="store_true", help="로컬이 아닌 DB에도 삽입/삭제 허용")
+    args = parser.parse_args()
+
+    check_outbox = load_check_outbox_module()
+
+    if args.cleanup_run:
+        conn = connect_local(check_outbox, args.allow_remote)
+        try:
+            with conn.cursor() as cur:
+                deleted = cleanup_run(cur, args.cleanup_run)
+            conn.commit()
+        finally:
+            conn.close()
+        print(f"🧹 run_id={args.cleanup_run} 벤치마크 데이터 삭제: {deleted}")
+        return
+
+    report = run_benchmark(check_outbox, args)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2, default=str)
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"📝 리포트 저장: {args.report}")
+    else:
+        print(text)
+
+    latency = report["latencySeconds"]
+    print(
+        f"✅ drain avg={report['drain']['avgPerSecond'] or 0:.1f}/s peak={report['drain']['peakPerSecond']:.1f}/s "
+        f"processed={latency['count']} p50={latency.get('p50')} p99={latency.get('p99')} "
+        f"failed={report['failed']['count']}"
+    )
+    for reason in report["failed"]["topReasons"]:
+        print(f"  ❌ {reason['count']:6} | {reason['reason']}")
+
+
+if __name__ == "__main__":
+    main()
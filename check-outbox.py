@@ -3,13 +3,29 @@
 Outbox 테이블 조회 스크립트
 
 실제 PostgreSQL outbox 테이블에 쌓인 데이터를 확인합니다.
+
+사용 예:
+  python3 check-outbox.py                    # 1회 리포트
+  python3 check-outbox.py --watch --interval 2   # drain 상황 실시간 관찰
+  python3 check-outbox.py --install-notify       # 상태 전이 NOTIFY 트리거 설치 (1회)
+  python3 check-outbox.py --listen               # NOTIFY 기반 모니터 (폴링 없음)
+  python3 check-outbox.py --exporter --port 9187 # Prometheus /metrics (outbox + raw_*_document, 127.0.0.1)
+  python3 check-outbox.py --exporter --metrics-host 0.0.0.0  # 다른 호스트의 Prometheus가 scrape할 때
+
+--exporter는 RAWDATA_PGHOST 등(tools/crawler/rawdata_db.py)이 설정되어 있으면
+raw_*_document 테이블의 행 추정치/크기도 함께 노출한다.
+로컬 확인: docker-compose up -d postgres 후 curl localhost:9187/metrics
 """
 
+import argparse
+import math
 import os
+import re
 import sys
+import time
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 
 def parse_jdbc_url(jdbc_url):
@@ -45,7 +61,8 @@ def load_env_file():
         return True
     return False
 
-def main():
+def connect_from_env():
+    """.env/환경 변수(DB_URL, DB_USER, DB_PASSWORD)로 outbox DB에 연결"""
     # .env 파일 로드 시도
     env_loaded = load_env_file()
     if env_loaded:
@@ -117,156 +134,939 @@ def main():
         print("  docker-compose up -d postgres")
         print("  또는 실제 DB 연결 정보를 확인하세요.")
         sys.exit(1)
-    
-    try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # 전체 통계
-            cur.execute("""
-                SELECT 
-                    status,
-                    COUNT(*) as count,
-                    MIN(created_at) as oldest,
-                    MAX(created_at) as newest
-                FROM outbox
-                GROUP BY status
-                ORDER BY status
-            """)
-            stats = cur.fetchall()
-            
-            print("=" * 80)
-            print("📊 Outbox 통계")
-            print("=" * 80)
-            if stats:
-                for row in stats:
-                    print(f"  {row['status']:12} | {row['count']:6}개 | 최신: {row['newest']}")
+
+    return conn
+
+
+OUTBOX_STATUSES = ("PENDING", "PROCESSING", "PROCESSED", "FAILED")
+
+# aggregatetype별 FILTER 집계 1회 스캔 + 윈도우 함수로 status 전체 합계까지 계산
+OUTBOX_SUMMARY_SQL = """
+    SELECT
+        aggregatetype,
+        COUNT(*) FILTER (WHERE status = 'PENDING')    AS pending,
+        COUNT(*) FILTER (WHERE status = 'PROCESSING') AS processing,
+        COUNT(*) FILTER (WHERE status = 'PROCESSED')  AS processed,
+        COUNT(*) FILTER (WHERE status = 'FAILED')     AS failed,
+        COUNT(*) FILTER (WHERE status NOT IN ('PENDING', 'PROCESSING', 'PROCESSED', 'FAILED')) AS other,
+        SUM(COUNT(*) FILTER (WHERE status = 'PENDING'))    OVER () AS total_pending,
+        SUM(COUNT(*) FILTER (WHERE status = 'PROCESSING')) OVER () AS total_processing,
+        SUM(COUNT(*) FILTER (WHERE status = 'PROCESSED'))  OVER () AS total_processed,
+        SUM(COUNT(*) FILTER (WHERE status = 'FAILED'))     OVER () AS total_failed,
+        MAX(MAX(created_at) FILTER (WHERE status = 'PENDING'))    OVER () AS newest_pending,
+        MAX(MAX(created_at) FILTER (WHERE status = 'PROCESSING')) OVER () AS newest_processing,
+        MAX(MAX(created_at) FILTER (WHERE status = 'PROCESSED'))  OVER () AS newest_processed,
+        MAX(MAX(created_at) FILTER (WHERE status = 'FAILED'))     OVER () AS newest_failed
+    FROM outbox
+    GROUP BY aggregatetype
+    ORDER BY aggregatetype
+"""
+
+# 상세 목록 쿼리: (status, 정렬 컬럼) 인덱스가 있어야 top-N이 인덱스 범위 스캔으로 끝난다
+DETAIL_QUERIES = {
+    "PENDING": ("created_at", """
+        SELECT id, aggregatetype, aggregateid, type, status, created_at, processed_at, retry_count, failure_reason
+        FROM outbox
+        WHERE status = 'PENDING'
+        ORDER BY created_at ASC
+        LIMIT 20
+    """),
+    "PROCESSED": ("processed_at", """
+        SELECT id, aggregatetype, aggregateid, type, created_at, processed_at, retry_count
+        FROM outbox
+        WHERE status = 'PROCESSED'
+        ORDER BY processed_at DESC
+        LIMIT 10
+    """),
+    "FAILED": ("created_at", """
+        SELECT id, aggregatetype, aggregateid, type, created_at, retry_count, failure_reason
+        FROM outbox
+        WHERE status = 'FAILED'
+        ORDER BY created_at DESC
+        LIMIT 10
+    """),
+}
+
+RECOMMENDED_INDEXES = {
+    "created_at": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_outbox_status_created_at ON outbox(status, created_at);",
+    "processed_at": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_outbox_status_processed_at ON outbox(status, processed_at);",
+}
+
+# outbox 인덱스의 key 컬럼(INCLUDE 제외, 순서대로)과 partial 조건식 - indexdef 문자열 대신 카탈로그에서 읽는다
+OUTBOX_INDEXES_SQL = """
+    SELECT c.relname AS indexname,
+           ARRAY(
+               SELECT COALESCE(a.attname::text, pg_get_indexdef(i.indexrelid, k.n + 1, true))
+               FROM generate_series(0, i.indnkeyatts - 1) AS k(n)
+               LEFT JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[k.n]
+               ORDER BY k.n
+           ) AS key_columns,
+           pg_get_expr(i.indpred, i.indrelid) AS predicate
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE i.indrelid = 'outbox'::regclass
+      AND i.indisvalid
+      AND c.relam = (SELECT oid FROM pg_am WHERE amname = 'btree')
+"""
+
+# pg_get_expr 출력의 타입 캐스트: 'PENDING'::text, (status)::text, ::character varying, ::text[]
+PREDICATE_CAST_PATTERN = re.compile(r"::(?:\"[^\"]+\"|[a-z_]+(?: [a-z_]+)*)(?:\[\])?")
+STATUS_EQUALS_PATTERN = re.compile(r"^status = '([^']*)'$")
+STATUS_ANY_PATTERN = re.compile(r"^status = ANY ARRAY\[(.*)\]$")
+
+
+def _split_top_level(expr, keyword):
+    """괄호/문자열 밖에 있는 ` AND `/` OR ` 기준으로 분리"""
+    parts, depth, in_quote, start = [], 0, False, 0
+    token = f" {keyword} "
+    idx = 0
+    while idx < len(expr):
+        ch = expr[idx]
+        if ch == "'":
+            in_quote = not in_quote
+        elif not in_quote and ch == "(":
+            depth += 1
+        elif not in_quote and ch == ")":
+            depth -= 1
+        elif not in_quote and depth == 0 and expr.startswith(token, idx):
+            parts.append(expr[start:idx])
+            idx += len(token)
+            start = idx
+            continue
+        idx += 1
+    parts.append(expr[start:])
+    return parts
+
+
+def _strip_outer_parens(expr):
+    expr = expr.strip()
+    while expr.startswith("(") and expr.endswith(")"):
+        depth = 0
+        for idx, ch in enumerate(expr):
+            depth += ch == "("
+            depth -= ch == ")"
+            if depth == 0 and idx < len(expr) - 1:
+                return expr  # (a) AND (b) 처럼 바깥 괄호가 식 전체를 감싸지 않음
+        expr = expr[1:-1].strip()
+    return expr
+
+
+def predicate_status_values(predicate):
+    """
+    partial 인덱스 조건식이 허용하는 status 값 집합
+    - None: 조건 없음 (모든 row 포함)
+    - frozenset: status = 'X' / status IN (...) 조건만으로 이루어진 경우 그 값들
+    - 빈 frozenset: status 외 조건(OR, 다른 컬럼 등)이 섞여 있어 판단 불가 → 지원하지 않는 것으로 본다
+    """
+    if not predicate:
+        return None
+    values = None
+    for conjunct in _split_top_level(_strip_outer_parens(predicate), "AND"):
+        conjunct = _strip_outer_parens(conjunct)
+        if len(_split_top_level(conjunct, "OR")) > 1:
+            return frozenset()
+        normalized = " ".join(PREDICATE_CAST_PATTERN.sub("", conjunct).replace("(", " ").replace(")", " ").split())
+        equals = STATUS_EQUALS_PATTERN.match(normalized)
+        any_of = STATUS_ANY_PATTERN.match(normalized)
+        if equals:
+            allowed = {equals.group(1)}
+        elif any_of:
+            allowed = {v.strip().strip("'") for v in any_of.group(1).split(",")}
+        else:
+            return frozenset()
+        values = allowed if values is None else values & allowed
+    return frozenset(values)
+
+
+def index_supports(key_columns, predicate, status, order_columns):
+    """
+    인덱스가 `WHERE status = {status} ORDER BY {order_columns}` 를 범위 스캔으로 받쳐주는지 판단
+    - (status, *order_columns, ...) 복합 인덱스 (partial이면 조건이 status 값을 포함해야 함)
+    - (*order_columns, ...) + status 조건 partial 인덱스
+    """
+    allowed = predicate_status_values(predicate)
+    if allowed is not None and status not in allowed:
+        return False
+    columns = list(key_columns)
+    order_columns = list(order_columns)
+    if columns[:1] == ["status"] and columns[1:1 + len(order_columns)] == order_columns:
+        return True
+    return columns[:len(order_columns)] == order_columns and allowed is not None
+
+
+def fetch_outbox_indexes(cur):
+    cur.execute(OUTBOX_INDEXES_SQL)
+    return [(row["indexname"], list(row["key_columns"]), row["predicate"]) for row in cur.fetchall()]
+
+
+def advise_indexes(cur):
+    """pg_index에서 상세 목록 쿼리를 받쳐줄 인덱스 유무를 확인. {status: 지원 여부}"""
+    indexes = fetch_outbox_indexes(cur)
+    return {
+        status: any(index_supports(columns, predicate, status, (order_column,)) for _, columns, predicate in indexes)
+        for status, (order_column, _) in DETAIL_QUERIES.items()
+    }
+
+
+def print_summary(rows):
+    print("=" * 80)
+    print("📊 Outbox 통계")
+    print("=" * 80)
+    if rows:
+        first = rows[0]
+        for status in OUTBOX_STATUSES:
+            key = status.lower()
+            count = first[f"total_{key}"] or 0
+            if count:
+                print(f"  {status:12} | {count:6}개 | 최신: {first[f'newest_{key}']}")
+        other = sum(row["other"] for row in rows)
+        if other:
+            print(f"  {'OTHER':12} | {other:6}개")
+        print()
+    else:
+        print("  Outbox에 데이터가 없습니다.\n")
+
+
+def print_pending(pending):
+    print("=" * 80)
+    print(f"⏳ PENDING 상태 ({len(pending)}개, 최대 20개 표시)")
+    print("=" * 80)
+    if pending:
+        for row in pending:
+            print(f"\n  ID: {row['id']}")
+            print(f"  AggregateType: {row['aggregatetype']}")
+            print(f"  AggregateID: {row['aggregateid']}")
+            print(f"  EventType: {row['type']}")
+            print(f"  CreatedAt: {row['created_at']}")
+            print(f"  RetryCount: {row['retry_count']}")
+            if row['failure_reason']:
+                print(f"  FailureReason: {row['failure_reason']}")
+    else:
+        print("  PENDING 상태의 엔트리가 없습니다.")
+
+
+def print_processed(processed):
+    print("=" * 80)
+    print(f"✅ PROCESSED 상태 (최근 10개)")
+    print("=" * 80)
+    if processed:
+        for row in processed:
+            print(f"\n  {row['type']:30} | {row['aggregatetype']:15} | {row['aggregateid']:40}")
+            print(f"  Created: {row['created_at']} | Processed: {row['processed_at']}")
+    else:
+        print("  PROCESSED 상태의 엔트리가 없습니다.")
+
+
+def print_failed(failed):
+    print("=" * 80)
+    print(f"❌ FAILED 상태 (최근 10개)")
+    print("=" * 80)
+    if failed:
+        for row in failed:
+            print(f"\n  {row['type']:30} | {row['aggregatetype']:15} | {row['aggregateid']:40}")
+            print(f"  Created: {row['created_at']} | RetryCount: {row['retry_count']}")
+            print(f"  Reason: {row['failure_reason']}")
+    else:
+        print("  FAILED 상태의 엔트리가 없습니다.")
+
+
+def print_by_type(rows):
+    print("=" * 80)
+    print("📋 AggregateType별 통계")
+    print("=" * 80)
+    if rows:
+        for idx, row in enumerate(rows):
+            if idx > 0:
                 print()
-            else:
-                print("  Outbox에 데이터가 없습니다.\n")
-            
-            # PENDING 상태 상세 조회
-            cur.execute("""
-                SELECT 
-                    id,
-                    aggregatetype,
-                    aggregateid,
-                    type,
-                    status,
-                    created_at,
-                    processed_at,
-                    retry_count,
-                    failure_reason
-                FROM outbox
-                WHERE status = 'PENDING'
-                ORDER BY created_at ASC
-                LIMIT 20
-            """)
-            pending = cur.fetchall()
-            
-            print("=" * 80)
-            print(f"⏳ PENDING 상태 ({len(pending)}개, 최대 20개 표시)")
-            print("=" * 80)
-            if pending:
-                for row in pending:
-                    print(f"\n  ID: {row['id']}")
-                    print(f"  AggregateType: {row['aggregatetype']}")
-                    print(f"  AggregateID: {row['aggregateid']}")
-                    print(f"  EventType: {row['type']}")
-                    print(f"  CreatedAt: {row['created_at']}")
-                    print(f"  RetryCount: {row['retry_count']}")
-                    if row['failure_reason']:
-                        print(f"  FailureReason: {row['failure_reason']}")
-            else:
-                print("  PENDING 상태의 엔트리가 없습니다.")
-            
-            print("\n")
-            
-            # PROCESSED 상태 최근 10개
-            cur.execute("""
-                SELECT 
-                    id,
-                    aggregatetype,
-                    aggregateid,
-                    type,
-                    created_at,
-                    processed_at,
-                    retry_count
-                FROM outbox
-                WHERE status = 'PROCESSED'
-                ORDER BY processed_at DESC
-                LIMIT 10
-            """)
-            processed = cur.fetchall()
-            
-            print("=" * 80)
-            print(f"✅ PROCESSED 상태 (최근 10개)")
-            print("=" * 80)
-            if processed:
-                for row in processed:
-                    print(f"\n  {row['type']:30} | {row['aggregatetype']:15} | {row['aggregateid']:40}")
-                    print(f"  Created: {row['created_at']} | Processed: {row['processed_at']}")
-            else:
-                print("  PROCESSED 상태의 엔트리가 없습니다.")
-            
-            print("\n")
-            
-            # FAILED 상태
-            cur.execute("""
-                SELECT 
-                    id,
-                    aggregatetype,
-                    aggregateid,
-                    type,
-                    created_at,
-                    retry_count,
-                    failure_reason
-                FROM outbox
-                WHERE status = 'FAILED'
-                ORDER BY created_at DESC
-                LIMIT 10
-            """)
-            failed = cur.fetchall()
-            
-            print("=" * 80)
-            print(f"❌ FAILED 상태 (최근 10개)")
-            print("=" * 80)
-            if failed:
-                for row in failed:
-                    print(f"\n  {row['type']:30} | {row['aggregatetype']:15} | {row['aggregateid']:40}")
-                    print(f"  Created: {row['created_at']} | RetryCount: {row['retry_count']}")
-                    print(f"  Reason: {row['failure_reason']}")
-            else:
-                print("  FAILED 상태의 엔트리가 없습니다.")
-            
+            print(f"  {row['aggregatetype']}:")
+            for status in OUTBOX_STATUSES:
+                count = row[status.lower()]
+                if count:
+                    print(f"    {status:12} | {count:6}개")
+        print()
+    else:
+        print("  데이터가 없습니다.\n")
+
+
+def print_report(conn, skip_unindexed_details=False):
+    detail_printers = {
+        "PENDING": print_pending,
+        "PROCESSED": print_processed,
+        "FAILED": print_failed,
+    }
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        # 전체/타입별 통계 (테이블 1회 스캔)
+        cur.execute(OUTBOX_SUMMARY_SQL)
+        summary = cur.fetchall()
+        print_summary(summary)
+
+        # 인덱스 점검: 받쳐줄 인덱스가 없는 상세 목록은 full scan + sort가 된다 (경고 후 조회)
+        supported = advise_indexes(cur)
+        missing_columns = sorted({DETAIL_QUERIES[s][0] for s, ok in supported.items() if not ok})
+
+        for status, (order_column, sql) in DETAIL_QUERIES.items():
+            if not supported[status]:
+                if skip_unindexed_details:
+                    print("=" * 80)
+                    print(f"⏭️  {status} 상세 목록 생략: (status, {order_column}) 인덱스 없음 (--skip-unindexed-details)")
+                    print("=" * 80)
+                    print("\n")
+                    continue
+                print(f"⚠️  {status} 상세 목록: (status, {order_column}) 인덱스 없음 → full scan + sort")
+            cur.execute(sql)
+            detail_printers[status](cur.fetchall())
             print("\n")
-            
-            # AggregateType별 통계
-            cur.execute("""
-                SELECT 
-                    aggregatetype,
-                    status,
-                    COUNT(*) as count
-                FROM outbox
-                GROUP BY aggregatetype, status
-                ORDER BY aggregatetype, status
-            """)
-            by_type = cur.fetchall()
-            
+
+        print_by_type(summary)
+
+        if missing_columns:
             print("=" * 80)
-            print("📋 AggregateType별 통계")
+            print("💡 인덱스 권장 (상세 조회가 full scan이 되지 않도록)")
             print("=" * 80)
-            if by_type:
-                current_type = None
-                for row in by_type:
-                    if current_type != row['aggregatetype']:
-                        if current_type is not None:
-                            print()
-                        current_type = row['aggregatetype']
-                        print(f"  {row['aggregatetype']}:")
-                    print(f"    {row['status']:12} | {row['count']:6}개")
-                print()
-            else:
-                print("  데이터가 없습니다.\n")
-            
+            for column in missing_columns:
+                print(f"  {RECOMMENDED_INDEXES[column]}")
+            print()
+
+
+# --watch: 연결 1개 유지 + 인덱스 범위 쿼리만 사용하는 증분 폴링
+DEFAULT_WATCH_INTERVAL_SECONDS = 5.0
+DEFAULT_WATCH_WINDOW_TICKS = 12
+DEFAULT_WATCH_OVERLAP_SECONDS = 30.0
+WATCH_DRAIN_BATCH_SIZE = 5000
+
+# PENDING 수/가장 오래된 PENDING: idx_outbox_pending_claim(created_at, id) WHERE status='PENDING'
+WATCH_BACKLOG_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM outbox WHERE status = 'PENDING') AS pending,
+        (SELECT MIN(created_at) FROM outbox WHERE status = 'PENDING') AS oldest_pending,
+        NOW() AS db_now
+"""
+
+# 처리된 row: (processed_at, id) keyset - WATCH_KEYSET_INDEX 범위 스캔
+WATCH_DRAINED_SQL = """
+    SELECT processed_at, id, EXTRACT(EPOCH FROM (processed_at - created_at)) AS latency_sec
+    FROM outbox
+    WHERE status = 'PROCESSED'
+      AND (processed_at, id) > (%s, %s::uuid)
+    ORDER BY processed_at, id
+    LIMIT %s
+"""
+
+# 미처리 backlog(PENDING/PROCESSING)의 재시도 횟수 분포 - idx_outbox_status_created 범위
+WATCH_RETRY_SQL = """
+    SELECT retry_count, COUNT(*) AS count
+    FROM outbox
+    WHERE status IN ('PENDING', 'PROCESSING')
+    GROUP BY retry_count
+    ORDER BY retry_count
+"""
+
+MIN_UUID = "00000000-0000-0000-0000-000000000000"
+
+# keyset 조건 (processed_at, id) > (...) 를 범위 스캔으로 만드는 인덱스
+WATCH_KEYSET_COLUMNS = ("processed_at", "id")
+WATCH_KEYSET_INDEX = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_outbox_processed_keyset "
+    "ON outbox(processed_at, id) WHERE status = 'PROCESSED';"
+)
+
+
+def percentile(sorted_values, q):
+    """정렬된 값 목록의 q(0~1) 분위수 (nearest-rank)"""
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def fetch_drained_since(cur, high_watermark, seen, overlap_seconds, floor):
+    """
+    high_watermark - overlap 이후 처리 완료된 row들의 latency 목록과 새 high watermark
+    - processed_at은 UPDATE 시점 값이라 늦게 commit된 row가 커서보다 이전 processed_at으로 보일 수 있다
+      → 매 tick 커서 뒤 overlap 구간을 다시 스캔하고, 이미 센 id(seen)는 건너뛴다
+    - floor(watch 시작 시각) 이전 처리분은 세지 않는다
+    """
+    low = max(floor, high_watermark - timedelta(seconds=overlap_seconds))
+    cursor_key = (low, MIN_UUID)
+    latencies = []
+    while True:
+        cur.execute(WATCH_DRAINED_SQL, (cursor_key[0], cursor_key[1], WATCH_DRAIN_BATCH_SIZE))
+        rows = cur.fetchall()
+        for row in rows:
+            row_id = str(row["id"])
+            if row_id in seen:
+                continue
+            seen[row_id] = row["processed_at"]
+            latencies.append(float(row["latency_sec"]))
+            high_watermark = max(high_watermark, row["processed_at"])
+        if rows:
+            cursor_key = (rows[-1]["processed_at"], str(rows[-1]["id"]))
+        if len(rows) < WATCH_DRAIN_BATCH_SIZE:
+            break
+
+    # 다음 tick의 overlap 구간보다 오래된 id는 다시 스캔되지 않으므로 정리
+    next_low = high_watermark - timedelta(seconds=overlap_seconds)
+    for row_id in [row_id for row_id, processed_at in seen.items() if processed_at < next_low]:
+        del seen[row_id]
+    return latencies, high_watermark
+
+
+def check_watch_index(cur):
+    """keyset 폴링을 받쳐줄 인덱스가 없으면 경고 + 권장 인덱스 출력"""
+    indexes = fetch_outbox_indexes(cur)
+    if any(index_supports(columns, predicate, "PROCESSED", WATCH_KEYSET_COLUMNS) for _, columns, predicate in indexes):
+        return True
+    print("⚠️  (processed_at, id) WHERE status='PROCESSED' 인덱스 없음 → drain 조회가 매 tick full scan이 될 수 있습니다")
+    print(f"  💡 {WATCH_KEYSET_INDEX}")
+    return False
+
+
+def watch_outbox(
+    conn,
+    interval_seconds=DEFAULT_WATCH_INTERVAL_SECONDS,
+    window_ticks=DEFAULT_WATCH_WINDOW_TICKS,
+    overlap_seconds=DEFAULT_WATCH_OVERLAP_SECONDS,
+):
+    """PENDING backlog / drain rate / oldest-pending age / retry 분포를 rolling으로 출력"""
+    from collections import deque
+
+    # 매 쿼리가 새 스냅샷을 보도록 (idle in transaction 방지)
+    conn.autocommit = True
+    window = deque(maxlen=window_ticks)
+
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        check_watch_index(cur)
+        cur.execute(WATCH_BACKLOG_SQL)
+        backlog = cur.fetchone()
+        started_at = high_watermark = backlog["db_now"]
+        seen = {}
+        prev_pending = backlog["pending"]
+        prev_at = time.monotonic()
+
+        print(
+            f"👀 Outbox watch (interval={interval_seconds}s, window={window_ticks} ticks, "
+            f"overlap={overlap_seconds}s) - Ctrl+C로 종료"
+        )
+        print(f"{'time':8} | {'pending':>8} | {'Δ':>6} | {'drain/s':>8} | {'in/s':>8} | {'oldest':>8} | {'p50':>7} | {'p95':>7} | retry")
+        try:
+            while True:
+                time.sleep(interval_seconds)
+
+                latencies, high_watermark = fetch_drained_since(cur, high_watermark, seen, overlap_seconds, started_at)
+                cur.execute(WATCH_BACKLOG_SQL)
+                backlog = cur.fetchone()
+                cur.execute(WATCH_RETRY_SQL)
+                retry = cur.fetchall()
+
+                now = time.monotonic()
+                elapsed = now - prev_at
+                pending = backlog["pending"]
+                delta = pending - prev_pending
+                drained = len(latencies)
+                # 유입량 = backlog 증감 + 처리량 (FAILED 전환은 무시하는 근사치)
+                window.append((elapsed, drained, max(0, delta + drained), latencies))
+                prev_pending = pending
+                prev_at = now
+
+                total_elapsed = sum(w[0] for w in window)
+                drain_rate = sum(w[1] for w in window) / total_elapsed if total_elapsed else 0.0
+                arrival_rate = sum(w[2] for w in window) / total_elapsed if total_elapsed else 0.0
+                window_latencies = sorted(l for w in window for l in w[3])
+                p50 = percentile(window_latencies, 0.5)
+                p95 = percentile(window_latencies, 0.95)
+
+                oldest = backlog["oldest_pending"]
+                oldest_age = (backlog["db_now"] - oldest).total_seconds() if oldest else 0.0
+                retry_text = " ".join(f"{r['retry_count']}:{r['count']}" for r in retry) or "-"
+
+                print(
+                    f"{datetime.now():%H:%M:%S} | {pending:8} | {delta:+6} | {drain_rate:8.1f} | {arrival_rate:8.1f} | "
+                    f"{oldest_age:7.0f}s | {_fmt_sec(p50):>7} | {_fmt_sec(p95):>7} | {retry_text}",
+                    flush=True,
+                )
+        except KeyboardInterrupt:
+            print("\n종료")
+
+
+def _fmt_sec(value):
+    return "-" if value is None else f"{value:.2f}s"
+
+
+# --listen: 트리거 기반 LISTEN/NOTIFY 모니터 (steady state에서 DB 쿼리 없음)
+NOTIFY_CHANNEL = "outbox_status"
+LATENCY_BUCKETS_SECONDS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+INSTALL_NOTIFY_SQL = f"""
+    CREATE OR REPLACE FUNCTION outbox_notify_status() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' AND NEW.status IS NOT DISTINCT FROM OLD.status THEN
+            RETURN NEW;
+        END IF;
+        PERFORM pg_notify('{NOTIFY_CHANNEL}', json_build_object(
+            'id', NEW.id,
+            'aggregatetype', NEW.aggregatetype,
+            'status', NEW.status,
+            'old_status', CASE WHEN TG_OP = 'UPDATE' THEN OLD.status END,
+            'retry_count', NEW.retry_count,
+            'latency_sec', CASE WHEN NEW.processed_at IS NOT NULL
+                                THEN EXTRACT(EPOCH FROM (NEW.processed_at - NEW.created_at)) END
+        )::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS outbox_status_notify ON outbox;
+    CREATE TRIGGER outbox_status_notify
+        AFTER INSERT OR UPDATE OF status ON outbox
+        FOR EACH ROW EXECUTE FUNCTION outbox_notify_status();
+"""
+
+UNINSTALL_NOTIFY_SQL = """
+    DROP TRIGGER IF EXISTS outbox_status_notify ON outbox;
+    DROP FUNCTION IF EXISTS outbox_notify_status();
+"""
+
+# 시작 시 1회만: 미처리 backlog 기준값 (idx_outbox_status_created 범위)
+LISTEN_BASELINE_SQL = """
+    SELECT status, COUNT(*) AS count
+    FROM outbox
+    WHERE status IN ('PENDING', 'PROCESSING')
+    GROUP BY status
+"""
+
+
+class LatencyHistogram:
+    """누적 버킷 히스토그램 (Prometheus histogram과 같은 le 버킷)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_SECONDS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for idx, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[idx] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """버킷 상한 기준 근사 분위수"""
+        if not self.total:
+            return None
+        rank = math.ceil(q * self.total)
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[idx] if idx < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def cumulative(self):
+        """[(le, 누적 count)] (+Inf 포함)"""
+        result = []
+        running = 0
+        for upper, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            result.append((upper, running))
+        return result
+
+
+def install_notify_trigger(conn):
+    with conn.cursor() as cur:
+        cur.execute(INSTALL_NOTIFY_SQL)
+    conn.commit()
+    print(f"✅ outbox 상태 전이 트리거 설치 완료 (channel={NOTIFY_CHANNEL})")
+
+
+def uninstall_notify_trigger(conn):
+    with conn.cursor() as cur:
+        cur.execute(UNINSTALL_NOTIFY_SQL)
+    conn.commit()
+    print("✅ outbox 상태 전이 트리거 제거 완료")
+
+
+def listen_outbox(conn, interval_seconds=DEFAULT_WATCH_INTERVAL_SECONDS):
+    """NOTIFY 이벤트로 backlog/전이 카운터/처리 latency 히스토그램을 메모리에서 갱신"""
+    import select
+    from collections import Counter
+
+    conn.autocommit = True
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("SELECT 1 FROM pg_trigger WHERE tgname = 'outbox_status_notify'")
+        if cur.fetchone() is None:
+            print("❌ outbox_status_notify 트리거가 없습니다. 먼저 --install-notify를 실행하세요.")
+            sys.exit(1)
+        cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        # LISTEN 이후에 baseline을 읽어야 사이에 발생한 전이를 놓치지 않는다
+        cur.execute(LISTEN_BASELINE_SQL)
+        backlog = Counter({row["status"]: row["count"] for row in cur.fetchall()})
+
+    transitions = Counter()
+    processed_by_type = Counter()
+    histogram = LatencyHistogram()
+    events = 0
+    last_print = time.monotonic()
+
+    print(f"👂 Outbox LISTEN {NOTIFY_CHANNEL} (report every {interval_seconds}s) - Ctrl+C로 종료")
+    try:
+        while True:
+            timeout = max(0.0, interval_seconds - (time.monotonic() - last_print))
+            if select.select([conn], [], [], timeout) != ([], [], []):
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        event = json.loads(notify.payload)
+                    except ValueError:
+                        continue
+                    events += 1
+                    old_status = event.get("old_status")
+                    status = event.get("status")
+                    if old_status:
+                        backlog[old_status] -= 1
+                    backlog[status] += 1
+                    transitions[f"{old_status or 'NEW'}→{status}"] += 1
+                    if status == "PROCESSED":
+                        processed_by_type[event.get("aggregatetype")] += 1
+                        if event.get("latency_sec") is not None:
+                            histogram.observe(float(event["latency_sec"]))
+
+            if time.monotonic() - last_print >= interval_seconds:
+                last_print = time.monotonic()
+                p50, p95, p99 = (histogram.quantile(q) for q in (0.5, 0.95, 0.99))
+                print(
+                    f"{datetime.now():%H:%M:%S} | events={events} | "
+                    f"PENDING={backlog['PENDING']} PROCESSING={backlog['PROCESSING']} | "
+                    f"processed={histogram.total} p50<={_fmt_sec(p50)} p95<={_fmt_sec(p95)} p99<={_fmt_sec(p99)}",
+                    flush=True,
+                )
+                if transitions:
+                    print("         " + " ".join(f"{k}:{v}" for k, v in sorted(transitions.items())))
+    except KeyboardInterrupt:
+        print("\n종료")
+        if processed_by_type:
+            print("AggregateType별 PROCESSED:")
+            for aggregate_type, count in processed_by_type.most_common():
+                print(f"  {aggregate_type:20} | {count}")
+        print("처리 latency 히스토그램 (누적):")
+        for upper, count in histogram.cumulative():
+            print(f"  le={upper:<6} | {count}")
+
+
+# --exporter: Prometheus text format /metrics (쿼리 결과는 TTL 동안 캐시 → scrape 빈도와 DB 부하 분리)
+DEFAULT_EXPORTER_HOST = "127.0.0.1"
+DEFAULT_EXPORTER_PORT = 9187
+DEFAULT_EXPORTER_CACHE_SECONDS = 30.0
+EXPORTER_LATENCY_WINDOW_MINUTES = 15
+RAW_DOCUMENT_TABLES = ("raw_product_document", "raw_brand_document", "raw_category_document")
+
+# 최근 N분 처리분의 latency 분위수 - (status, processed_at) 인덱스 범위
+# sliding window 값은 줄어들 수 있으므로 histogram(누적 시리즈)이 아니라 gauge로 노출
+EXPORTER_LATENCY_QUANTILES = (0.5, 0.95)
+EXPORTER_LATENCY_SQL = """
+    SELECT aggregatetype,
+           COUNT(*) AS count,
+           {quantiles},
+           MAX(latency) AS max
+    FROM (
+        SELECT aggregatetype, EXTRACT(EPOCH FROM (processed_at - created_at)) AS latency
+        FROM outbox
+        WHERE status = 'PROCESSED'
+          AND processed_at > NOW() - INTERVAL '{minutes} minutes'
+    ) AS recent
+    GROUP BY aggregatetype
+""".format(
+    quantiles=",\n           ".join(
+        f"percentile_cont({q}) WITHIN GROUP (ORDER BY latency) AS q_{idx}"
+        for idx, q in enumerate(EXPORTER_LATENCY_QUANTILES)
+    ),
+    minutes=EXPORTER_LATENCY_WINDOW_MINUTES,
+)
+
+# 통계 기반 추정치 + 크기 (COUNT(*) 없음)
+TABLE_STATS_SQL = """
+    SELECT c.relname AS table_name,
+           GREATEST(c.reltuples, 0)::bigint AS row_estimate,
+           pg_relation_size(c.oid) AS table_bytes,
+           pg_indexes_size(c.oid) AS index_bytes,
+           pg_total_relation_size(c.oid) AS total_bytes
+    FROM pg_class c
+    WHERE c.relkind = 'r' AND c.relname = ANY(%s)
+"""
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsWriter:
+    """Prometheus text exposition format (0.0.4) 작성기"""
+
+    def __init__(self):
+        self.lines = []
+        self.declared = set()
+
+    def _declare(self, name, metric_type, help_text):
+        if name not in self.declared:
+            self.lines.append(f"# HELP {name} {help_text}")
+            self.lines.append(f"# TYPE {name} {metric_type}")
+            self.declared.add(name)
+
+    def _sample(self, name, value, labels=None):
+        label_text = ""
+        if labels:
+            label_text = "{" + ",".join(f'{k}="{_label_value(v)}"' for k, v in labels.items()) + "}"
+        self.lines.append(f"{name}{label_text} {float(value)!r}")
+
+    def add(self, name, metric_type, help_text, value, labels=None):
+        self._declare(name, metric_type, help_text)
+        self._sample(name, value, labels)
+
+    def render(self):
+        return "\n".join(self.lines) + "\n"
+
+
+def collect_outbox_metrics(conn, writer):
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(OUTBOX_SUMMARY_SQL)
+        for row in cur.fetchall():
+            for status in OUTBOX_STATUSES:
+                writer.add(
+                    "outbox_rows", "gauge", "Outbox row count by status and aggregatetype",
+                    row[status.lower()], {"status": status, "aggregatetype": row["aggregatetype"]},
+                )
+
+        cur.execute(WATCH_BACKLOG_SQL)
+        backlog = cur.fetchone()
+        oldest = backlog["oldest_pending"]
+        age = (backlog["db_now"] - oldest).total_seconds() if oldest else 0.0
+        writer.add("outbox_oldest_pending_age_seconds", "gauge", "Age of the oldest PENDING outbox row", age)
+
+        cur.execute(EXPORTER_LATENCY_SQL)
+        window = f"last {EXPORTER_LATENCY_WINDOW_MINUTES}m, recomputed per collection"
+        for row in cur.fetchall():
+            labels = {"aggregatetype": row["aggregatetype"]}
+            writer.add(
+                "outbox_processed_window_rows", "gauge",
+                f"Rows processed in the sliding window ({window})", row["count"], labels,
+            )
+            for idx, q in enumerate(EXPORTER_LATENCY_QUANTILES):
+                writer.add(
+                    "outbox_processed_latency_window_seconds", "gauge",
+                    f"created->processed latency quantile of rows processed in the sliding window ({window})",
+                    row[f"q_{idx}"], {**labels, "quantile": q},
+                )
+            writer.add(
+                "outbox_processed_latency_window_max_seconds", "gauge",
+                f"Max created->processed latency in the sliding window ({window})", row["max"], labels,
+            )
+
+
+def collect_table_metrics(conn, writer, tables, database):
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(TABLE_STATS_SQL, (list(tables),))
+        for row in cur.fetchall():
+            labels = {"database": database, "table": row["table_name"]}
+            writer.add("pg_table_rows_estimate", "gauge", "Row estimate from pg_class.reltuples", row["row_estimate"], labels)
+            writer.add("pg_table_size_bytes", "gauge", "Heap size (pg_relation_size)", row["table_bytes"], labels)
+            writer.add("pg_table_index_size_bytes", "gauge", "Index size (pg_indexes_size)", row["index_bytes"], labels)
+            writer.add("pg_table_total_size_bytes", "gauge", "Total size (pg_total_relation_size)", row["total_bytes"], labels)
+
+
+class CachedMetrics:
+    """
+    scrape마다 DB를 치지 않도록 렌더링 결과를 TTL 동안 캐시
+    - 동시 scrape는 lock으로 직렬화되어 수집이 한 번만 일어난다
+    - 수집이 실패하면 outbox/rawdata 연결을 모두 닫고, 다음 수집에서 다시 연결한다
+      (DB 재시작/idle timeout 뒤에도 프로세스 재시작 없이 outbox_exporter_up이 복구됨)
+    """
+
+    def __init__(self, outbox_conn, cache_seconds=DEFAULT_EXPORTER_CACHE_SECONDS):
+        import threading
+
+        self.outbox_conn = outbox_conn
+        self.rawdata_conn = None
+        self.rawdata_enabled = True
+        self.cache_seconds = cache_seconds
+        self.lock = threading.Lock()
+        self.rendered = None
+        self.rendered_at = 0.0
+
+    def _outbox_connection(self):
+        if self.outbox_conn is None or self.outbox_conn.closed:
+            try:
+                self.outbox_conn = connect_from_env()
+            except SystemExit:
+                # connect_from_env는 CLI용으로 실패 시 sys.exit → exporter는 다음 scrape에서 재시도
+                raise RuntimeError("outbox DB 재연결 실패")
+            self.outbox_conn.autocommit = True
+        return self.outbox_conn
+
+    def _close_connections(self):
+        for conn in (self.outbox_conn, self.rawdata_conn):
+            if conn is not None and not conn.closed:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        self.outbox_conn = None
+        self.rawdata_conn = None
+
+    def _rawdata_connection(self):
+        if not self.rawdata_enabled:
+            return None
+        if self.rawdata_conn is None or self.rawdata_conn.closed:
+            # rawdata DB는 크롤러와 같은 RAWDATA_* 환경 변수 사용 (없으면 rawdata 메트릭 생략)
+            sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools", "crawler"))
+            try:
+                from rawdata_db import connect_pg
+                self.rawdata_conn = connect_pg()
+                self.rawdata_conn.autocommit = True
+            except (ImportError, ValueError) as e:
+                print(f"⚠️  rawdata 메트릭 비활성화: {e}", file=sys.stderr)
+                self.rawdata_enabled = False
+                return None
+        return self.rawdata_conn
+
+    def _collect(self):
+        writer = MetricsWriter()
+        started = time.perf_counter()
+        up = 1
+        try:
+            outbox_conn = self._outbox_connection()
+            collect_outbox_metrics(outbox_conn, writer)
+            collect_table_metrics(outbox_conn, writer, ("outbox", "outbox_archive"), "ivmlite")
+            rawdata_conn = self._rawdata_connection()
+            if rawdata_conn is not None:
+                collect_table_metrics(rawdata_conn, writer, RAW_DOCUMENT_TABLES, "rawdata")
+        except Exception as e:
+            print(f"❌ 메트릭 수집 실패: {e}", file=sys.stderr)
+            up = 0
+            self._close_connections()
+        writer.add("outbox_exporter_up", "gauge", "1 if the last collection succeeded", up)
+        writer.add(
+            "outbox_exporter_collect_seconds", "gauge", "Duration of the last collection",
+            time.perf_counter() - started,
+        )
+        return writer.render()
+
+    def render(self):
+        with self.lock:
+            if self.rendered is None or time.monotonic() - self.rendered_at >= self.cache_seconds:
+                self.rendered = self._collect()
+                self.rendered_at = time.monotonic()
+            return self.rendered
+
+
+def serve_exporter(
+    conn,
+    port=DEFAULT_EXPORTER_PORT,
+    cache_seconds=DEFAULT_EXPORTER_CACHE_SECONDS,
+    host=DEFAULT_EXPORTER_HOST,
+):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    conn.autocommit = True
+    metrics = CachedMetrics(conn, cache_seconds)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"📈 Outbox exporter: http://{host}:{port}/metrics (cache={cache_seconds}s) - Ctrl+C로 종료")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n종료")
+    finally:
+        server.server_close()
+        metrics._close_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Outbox 테이블 조회")
+    parser.add_argument(
+        "--skip-unindexed-details",
+        action="store_true",
+        help="받쳐줄 인덱스가 없는 상태별 상세 목록은 조회하지 않음 (full scan 회피)",
+    )
+    parser.add_argument("--watch", action="store_true", help="증분 폴링으로 drain 상황을 계속 출력")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_WATCH_INTERVAL_SECONDS,
+        help="--watch 폴링 간격(초, 기본: 5)",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=DEFAULT_WATCH_WINDOW_TICKS,
+        help="--watch rolling 계산에 쓰는 tick 수 (기본: 12)",
+    )
+    parser.add_argument(
+        "--overlap",
+        type=float,
+        default=DEFAULT_WATCH_OVERLAP_SECONDS,
+        help="--watch 늦게 commit된 처리분을 잡기 위해 커서 뒤를 다시 스캔하는 구간(초, 기본: 30)",
+    )
+    parser.add_argument(
+        "--listen",
+        action="store_true",
+        help="트리거 NOTIFY 기반 실시간 모니터 (사전에 --install-notify 필요)",
+    )
+    parser.add_argument("--install-notify", action="store_true", help="outbox 상태 전이 NOTIFY 트리거 설치")
+    parser.add_argument("--uninstall-notify", action="store_true", help="outbox 상태 전이 NOTIFY 트리거 제거")
+    parser.add_argument("--exporter", action="store_true", help="Prometheus /metrics 엔드포인트 서비스")
+    parser.add_argument(
+        "--metrics-host",
+        type=str,
+        default=DEFAULT_EXPORTER_HOST,
+        help="--exporter 바인드 주소 (기본: 127.0.0.1, 외부 scrape 허용 시 0.0.0.0)",
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_EXPORTER_PORT, help="--exporter 포트 (기본: 9187)")
+    parser.add_argument(
+        "--cache-seconds",
+        type=float,
+        default=DEFAULT_EXPORTER_CACHE_SECONDS,
+        help="--exporter 쿼리 결과 캐시 TTL (기본: 30초)",
+    )
+    args = parser.parse_args()
+
+    conn = connect_from_env()
+    try:
+        if args.install_notify:
+            install_notify_trigger(conn)
+            return
+        if args.uninstall_notify:
+            uninstall_notify_trigger(conn)
+            return
+        if args.exporter:
+            serve_exporter(conn, args.port, args.cache_seconds, args.metrics_host)
+            return
+        if args.listen:
+            listen_outbox(conn, args.interval)
+            return
+        if args.watch:
+            watch_outbox(conn, args.interval, args.window, args.overlap)
+            return
+        print_report(conn, skip_unindexed_details=args.skip_unindexed_details)
     except Exception as e:
         print(f"❌ 쿼리 실행 실패: {e}")
         import traceback
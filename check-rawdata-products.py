@@ -22,10 +22,16 @@
   # 방법 2: .env 파일에서 DB_URL 사용 (ivmlite와 같은 호스트)
   # .env에 DB_URL, DB_USER, DB_PASSWORD가 있으면 자동으로 rawdata DB에 연결
   python3 check-rawdata-products.py
+
+  # 운영 DB: 통계 추정치 기반 빠른 모드 (전체 스캔 없음)
+  python3 check-rawdata-products.py --fast
 """
 
+import argparse
+import concurrent.futures
 import os
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
 import re
@@ -92,14 +98,149 @@ sys.path.insert(0, str(Path(__file__).parent / "tools" / "crawler"))
 
 from rawdata_db import connect_pg, get_pg_config
 
+RAW_TABLES = ("raw_product_document", "raw_brand_document", "raw_category_document")
+
+# 정확 모드 동시 연결 상한 (쿼리 수만큼 연결을 열지 않도록)
+DEFAULT_MAX_CONNECTIONS = 3
+
+# 최근 7일 일별 건수: idx_raw_product_document_created_at 범위 스캔
+DAILY_SQL = """
+    SELECT 
+        DATE(created_at) as date,
+        COUNT(*) as count
+    FROM raw_product_document
+    WHERE created_at >= NOW() - INTERVAL '7 days'
+    GROUP BY DATE(created_at)
+    ORDER BY date DESC
+"""
+
+SAMPLES_SQL = """
+    SELECT product_id, created_at
+    FROM raw_product_document
+    ORDER BY created_at DESC
+    LIMIT 10
+"""
+
+SIZES_SQL = """
+    SELECT 
+        pg_size_pretty(pg_total_relation_size('raw_product_document')) as total_size,
+        pg_size_pretty(pg_relation_size('raw_product_document')) as table_size,
+        pg_size_pretty(pg_indexes_size('raw_product_document')) as indexes_size
+"""
+
+# 정확 모드: 전체 스캔 쿼리 포함 (별도 연결에서 병렬 실행)
+EXACT_QUERIES = {
+    "product_count": "SELECT COUNT(*) FROM raw_product_document",
+    "period": """
+        SELECT 
+            MIN(created_at) as oldest,
+            MAX(created_at) as newest,
+            MAX(updated_at) as last_updated
+        FROM raw_product_document
+    """,
+    "daily": DAILY_SQL,
+    "samples": SAMPLES_SQL,
+    "brand_count": "SELECT COUNT(*) FROM raw_brand_document",
+    "category_count": "SELECT COUNT(*) FROM raw_category_document",
+    "sizes": SIZES_SQL,
+}
+
+# 빠른 모드: 통계 추정치 + created_at 인덱스만 사용 (운영 DB에서 안전)
+# - n_live_tup(autovacuum 통계)가 있으면 우선, 없으면 reltuples(ANALYZE 추정치)
+# - updated_at은 인덱스가 없어 생략
+FAST_QUERIES = {
+    "estimates": """
+        SELECT c.relname,
+               COALESCE(NULLIF(s.n_live_tup, 0), GREATEST(c.reltuples, 0))::bigint AS estimate
+        FROM pg_class c
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE c.relkind = 'r' AND c.relname = ANY(%s)
+    """,
+    "period": """
+        SELECT 
+            (SELECT created_at FROM raw_product_document ORDER BY created_at ASC LIMIT 1) as oldest,
+            (SELECT created_at FROM raw_product_document ORDER BY created_at DESC LIMIT 1) as newest,
+            NULL as last_updated
+    """,
+    "daily": DAILY_SQL,
+    "samples": SAMPLES_SQL,
+    "sizes": SIZES_SQL,
+}
+
+QUERY_PARAMS = {
+    "estimates": (list(RAW_TABLES),),
+}
+
 
 def format_number(num: int) -> str:
     """숫자를 읽기 쉬운 형식으로 포맷"""
     return f"{num:,}"
 
 
-def check_rawdata_products():
-    """rawdata DB의 상품 데이터 통계 확인"""
+def format_count(count, approx: str = "") -> str:
+    """개수 표시 (None이면 조회 실패)"""
+    return "(조회 실패)" if count is None else f"{approx}{format_number(count)}개"
+
+
+def _run_query(conn, name: str, sql: str):
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, QUERY_PARAMS.get(name))
+        rows = cursor.fetchall()
+        return name, rows, None, time.perf_counter() - started
+    except Exception as e:
+        conn.rollback()
+        return name, None, e, time.perf_counter() - started
+    finally:
+        cursor.close()
+
+
+def _run_query_on_new_connection(name: str, sql: str):
+    started = time.perf_counter()
+    try:
+        conn = connect_pg()
+    except Exception as e:
+        # 연결 실패도 쿼리별 오류로 돌려서 나머지 결과는 그대로 출력
+        return name, None, e, time.perf_counter() - started
+    try:
+        return _run_query(conn, name, sql)
+    finally:
+        conn.close()
+
+
+def run_queries(queries: dict, parallel: bool, max_connections: int = DEFAULT_MAX_CONNECTIONS) -> tuple:
+    """
+    쿼리 묶음 실행. (결과, 오류, 쿼리별 소요 시간) 반환
+    - parallel=True: 최대 max_connections개 연결에서 동시에 실행
+    """
+    if parallel:
+        max_workers = max(1, min(max_connections, len(queries)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            outcomes = list(executor.map(lambda item: _run_query_on_new_connection(*item), queries.items()))
+    else:
+        conn = connect_pg()
+        try:
+            outcomes = [_run_query(conn, name, sql) for name, sql in queries.items()]
+        finally:
+            conn.close()
+
+    results, errors, timings = {}, {}, {}
+    for name, rows, error, elapsed in outcomes:
+        timings[name] = elapsed
+        if error is not None:
+            errors[name] = error
+        else:
+            results[name] = rows
+    return results, errors, timings
+
+
+def check_rawdata_products(fast: bool = False, max_connections: int = DEFAULT_MAX_CONNECTIONS):
+    """
+    rawdata DB의 상품 데이터 통계 확인
+    - fast=True: pg_class/pg_stat_user_tables 추정치 + created_at 인덱스 쿼리만 사용
+    - fast=False: 정확한 COUNT/집계를 최대 max_connections개 연결에서 병렬 실행하고 쿼리별 시간 출력
+    """
     try:
         # 환경 변수 확인 (디버깅용)
         debug = os.getenv("DEBUG", "").lower() == "true"
@@ -124,48 +265,49 @@ def check_rawdata_products():
         print(f"   사용자: {config.user}")
         print()
         
-        # DB 연결
-        print("📡 데이터베이스 연결 중...")
-        conn = connect_pg()
-        cursor = conn.cursor()
+        # DB 연결 + 쿼리 실행
+        if fast:
+            print("📡 빠른 모드: 통계 추정치/인덱스 쿼리만 실행...")
+            results, errors, timings = run_queries(FAST_QUERIES, parallel=False)
+            estimates = {name: count for name, count in results.get("estimates", [])}
+            # estimates 조회 자체가 실패하면 None (조회 실패로 표시)
+            default = 0 if "estimates" in results else None
+            total_count = estimates.get("raw_product_document", default)
+            brand_count = estimates.get("raw_brand_document", default)
+            category_count = estimates.get("raw_category_document", default)
+            approx = "≈"
+        else:
+            print(f"📡 정확 모드: {len(EXACT_QUERIES)}개 쿼리를 최대 {max_connections}개 연결에서 병렬 실행...")
+            results, errors, timings = run_queries(EXACT_QUERIES, parallel=True, max_connections=max_connections)
+            # 조회 실패한 개수는 None → 0으로 취급하지 않고 실패로 표시
+            total_count = results["product_count"][0][0] if "product_count" in results else None
+            brand_count = results["brand_count"][0][0] if "brand_count" in results else None
+            category_count = results["category_count"][0][0] if "category_count" in results else None
+            approx = ""
+
+        for name, error in errors.items():
+            print(f"\n⚠️  {name} 조회 실패: {error}")
         
         # 1. 전체 상품 수 확인
         print("\n📊 === Raw 상품 데이터 통계 ===")
-        cursor.execute("SELECT COUNT(*) FROM raw_product_document")
-        total_count = cursor.fetchone()[0]
-        print(f"총 상품 수: {format_number(total_count)}개")
+        print(f"총 상품 수: {format_count(total_count, approx)}")
         
-        if total_count == 0:
+        # 개수 조회가 성공해서 0일 때만 종료 (실패 시에는 나머지 성공한 결과를 계속 출력)
+        if total_count == 0 and not fast:
             print("\n⚠️  상품 데이터가 없습니다.")
-            conn.close()
             return
         
         # 2. 최신/오래된 데이터 확인
-        cursor.execute("""
-            SELECT 
-                MIN(created_at) as oldest,
-                MAX(created_at) as newest,
-                MAX(updated_at) as last_updated
-            FROM raw_product_document
-        """)
-        oldest, newest, last_updated = cursor.fetchone()
-        print(f"\n📅 데이터 기간:")
-        print(f"   최초 생성: {oldest}")
-        print(f"   최신 생성: {newest}")
-        print(f"   마지막 업데이트: {last_updated}")
+        if "period" in results:
+            oldest, newest, last_updated = results["period"][0]
+            print(f"\n📅 데이터 기간:")
+            print(f"   최초 생성: {oldest}")
+            print(f"   최신 생성: {newest}")
+            print(f"   마지막 업데이트: {last_updated if last_updated is not None else '(빠른 모드에서는 생략)'}")
         
         # 3. 일별 통계 (최근 7일)
         print(f"\n📈 최근 7일간 일별 상품 수:")
-        cursor.execute("""
-            SELECT 
-                DATE(created_at) as date,
-                COUNT(*) as count
-            FROM raw_product_document
-            WHERE created_at >= NOW() - INTERVAL '7 days'
-            GROUP BY DATE(created_at)
-            ORDER BY date DESC
-        """)
-        daily_stats = cursor.fetchall()
+        daily_stats = results.get("daily")
         if daily_stats:
             for date, count in daily_stats:
                 print(f"   {date}: {format_number(count)}개")
@@ -174,43 +316,27 @@ def check_rawdata_products():
         
         # 4. 샘플 상품 ID 확인
         print(f"\n🔍 샘플 상품 ID (최대 10개):")
-        cursor.execute("""
-            SELECT product_id, created_at
-            FROM raw_product_document
-            ORDER BY created_at DESC
-            LIMIT 10
-        """)
-        samples = cursor.fetchall()
-        for product_id, created_at in samples:
+        for product_id, created_at in results.get("samples", []):
             print(f"   - {product_id} (생성: {created_at})")
         
         # 5. 브랜드/카테고리 통계도 함께 확인
-        cursor.execute("SELECT COUNT(*) FROM raw_brand_document")
-        brand_count = cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM raw_category_document")
-        category_count = cursor.fetchone()[0]
-        
         print(f"\n📦 관련 데이터:")
-        print(f"   브랜드 수: {format_number(brand_count)}개")
-        print(f"   카테고리 수: {format_number(category_count)}개")
+        print(f"   브랜드 수: {format_count(brand_count, approx)}")
+        print(f"   카테고리 수: {format_count(category_count, approx)}")
         
         # 6. 테이블 크기 확인 (PostgreSQL)
-        try:
-            cursor.execute("""
-                SELECT 
-                    pg_size_pretty(pg_total_relation_size('raw_product_document')) as total_size,
-                    pg_size_pretty(pg_relation_size('raw_product_document')) as table_size,
-                    pg_size_pretty(pg_indexes_size('raw_product_document')) as indexes_size
-            """)
-            total_size, table_size, indexes_size = cursor.fetchone()
+        if "sizes" in results:
+            total_size, table_size, indexes_size = results["sizes"][0]
             print(f"\n💾 테이블 크기:")
             print(f"   총 크기: {total_size}")
             print(f"   테이블: {table_size}")
             print(f"   인덱스: {indexes_size}")
-        except Exception as e:
-            print(f"\n⚠️  테이블 크기 조회 실패: {e}")
         
-        conn.close()
+        # 7. 쿼리별 소요 시간
+        print(f"\n⏱️  쿼리 소요 시간:")
+        for name, elapsed in sorted(timings.items(), key=lambda x: x[1], reverse=True):
+            print(f"   {name:16} {elapsed * 1000:9.1f}ms")
+        
         print(f"\n✅ 확인 완료!")
         
     except ValueError as e:
@@ -228,4 +354,17 @@ def check_rawdata_products():
 
 
 if __name__ == "__main__":
-    check_rawdata_products()
+    parser = argparse.ArgumentParser(description="rawdata DB raw 상품 데이터 확인")
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="COUNT(*) 대신 통계 추정치 사용 (운영 DB에서 안전한 빠른 모드)",
+    )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=DEFAULT_MAX_CONNECTIONS,
+        help=f"정확 모드 동시 연결 수 상한 (기본: {DEFAULT_MAX_CONNECTIONS})",
+    )
+    args = parser.parse_args()
+    check_rawdata_products(fast=args.fast, max_connections=args.max_connections)
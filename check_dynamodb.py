@@ -1,48 +1,194 @@
 #!/usr/bin/env python3
+"""
+DynamoDB 테이블 확인 스크립트
+
+사용 예:
+  python3 check_dynamodb.py                      # 테이블 목록 + 추정 아이템 수 + 샘플
+  python3 check_dynamodb.py --stats              # DescribeTable 메타데이터 기반 통계(JSON)
+  python3 check_dynamodb.py --stats --exact      # 병렬 세그먼트 COUNT Scan으로 정확한 개수(JSON)
+
+참고: DescribeTable의 ItemCount/TableSizeBytes는 약 6시간 주기로 갱신되는 추정치다.
+정확한 개수가 필요할 때만 --exact를 사용한다 (전체 테이블을 읽으므로 RCU 소모).
+"""
+import argparse
+import concurrent.futures
+import json
 import os
+import sys
+import threading
+import time
+
 import boto3
 from botocore.exceptions import ClientError
 
-# DynamoDB 연결 (Remote-only: 기본은 AWS 엔드포인트, endpoint override는 opt-in)
-endpoint = os.getenv("DYNAMODB_ENDPOINT", "")
-region = os.getenv("AWS_REGION", "ap-northeast-2")
+DEFAULT_SCAN_SEGMENTS = 4
+DEFAULT_MAX_PAGES_PER_SECOND = 10.0
+
+
+class RateLimiter:
+    """스레드 간 공유되는 단순 간격 기반 rate limiter (초당 최대 호출 수)"""
+
+    def __init__(self, max_per_second: float):
+        self.interval = 1.0 / max_per_second if max_per_second > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def acquire(self) -> None:
+        if self.interval <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def create_client():
+    # DynamoDB 연결 (Remote-only: 기본은 AWS 엔드포인트, endpoint override는 opt-in)
+    endpoint = os.getenv("DYNAMODB_ENDPOINT", "")
+    region = os.getenv("AWS_REGION", "ap-northeast-2")
+
+    client_kwargs = {
+        "service_name": "dynamodb",
+        "region_name": region,
+    }
+    if endpoint:
+        client_kwargs["endpoint_url"] = endpoint
+
+    return boto3.client(**client_kwargs)
+
+
+def list_all_tables(dynamodb) -> list:
+    names = []
+    for page in dynamodb.get_paginator("list_tables").paginate():
+        names.extend(page.get("TableNames", []))
+    return names
+
+
+def describe_table_stats(dynamodb, table_name: str) -> dict:
+    """DescribeTable 메타데이터 기반 통계 (RCU 소모 없음)"""
+    table = dynamodb.describe_table(TableName=table_name)["Table"]
+    return {
+        "table": table_name,
+        "status": table.get("TableStatus"),
+        "itemCount": table.get("ItemCount", 0),
+        "tableSizeBytes": table.get("TableSizeBytes", 0),
+        "source": "describe_table",
+    }
 
-client_kwargs = {
-    "service_name": "dynamodb",
-    "region_name": region,
-}
-if endpoint:
-    client_kwargs["endpoint_url"] = endpoint
 
-dynamodb = boto3.client(**client_kwargs)
+def _count_segment(dynamodb, table_name: str, segment: int, total_segments: int, limiter: RateLimiter) -> tuple:
+    count = 0
+    scanned = 0
+    kwargs = {
+        "TableName": table_name,
+        "Select": "COUNT",
+        "Segment": segment,
+        "TotalSegments": total_segments,
+    }
+    while True:
+        limiter.acquire()
+        response = dynamodb.scan(**kwargs)
+        count += response["Count"]
+        scanned += response.get("ScannedCount", 0)
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return count, scanned
+        kwargs["ExclusiveStartKey"] = last_key
 
-try:
+
+def exact_item_count(dynamodb, table_name: str, total_segments: int, max_pages_per_second: float) -> dict:
+    """페이지네이션 + 병렬 세그먼트 COUNT Scan (전체 페이지 합산)"""
+    limiter = RateLimiter(max_pages_per_second)
+    started = time.perf_counter()
+    count = 0
+    scanned = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=total_segments) as executor:
+        futures = [
+            executor.submit(_count_segment, dynamodb, table_name, segment, total_segments, limiter)
+            for segment in range(total_segments)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            segment_count, segment_scanned = future.result()
+            count += segment_count
+            scanned += segment_scanned
+    return {
+        "itemCount": count,
+        "scannedCount": scanned,
+        "source": "scan",
+        "segments": total_segments,
+        "elapsedSeconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def collect_stats(dynamodb, exact: bool, segments: int, max_pages_per_second: float) -> dict:
+    tables = []
+    for table_name in list_all_tables(dynamodb):
+        stats = describe_table_stats(dynamodb, table_name)
+        if exact:
+            stats["estimatedItemCount"] = stats["itemCount"]
+            stats.update(exact_item_count(dynamodb, table_name, segments, max_pages_per_second))
+        tables.append(stats)
+    return {"collectedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "tables": tables}
+
+
+def print_overview(dynamodb) -> None:
     # 테이블 목록 확인
     print("📋 테이블 목록:")
-    tables = dynamodb.list_tables()
-    for table_name in tables.get('TableNames', []):
+    table_names = list_all_tables(dynamodb)
+    for table_name in table_names:
         print(f"  - {table_name}")
-        
-        # 각 테이블의 아이템 개수 확인
-        response = dynamodb.scan(
-            TableName=table_name,
-            Select='COUNT'
-        )
-        print(f"    → 아이템 개수: {response['Count']}개")
-        
+
+        # 각 테이블의 아이템 개수 확인 (DescribeTable 추정치, Scan 없음)
+        stats = describe_table_stats(dynamodb, table_name)
+        print(f"    → 아이템 개수(추정): {stats['itemCount']}개, 크기: {stats['tableSizeBytes']} bytes")
+
         # 실제 데이터 일부 확인 (최대 5개)
-        if response['Count'] > 0:
-            items = dynamodb.scan(TableName=table_name, Limit=5)
+        items = dynamodb.scan(TableName=table_name, Limit=5)
+        if items.get("Items"):
             print(f"    → 저장된 데이터 예시:")
-            for item in items.get('Items', [])[:5]:
-                pk = item.get('PK', {}).get('S', '')
-                sk = item.get('SK', {}).get('S', '')
+            for item in items.get("Items", [])[:5]:
+                pk = item.get("PK", {}).get("S", "")
+                sk = item.get("SK", {}).get("S", "")
                 print(f"       • PK={pk}, SK={sk}")
-    
-    if not tables.get('TableNames'):
+
+    if not table_names:
         print("  ⚠️  테이블이 없습니다.")
-        
-except ClientError as e:
-    print(f"❌ 오류: {e}")
-except Exception as e:
-    print(f"❌ 연결 실패: {e}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="DynamoDB 테이블 확인")
+    parser.add_argument("--stats", action="store_true", help="테이블 통계를 JSON으로 출력 (모니터링용)")
+    parser.add_argument("--exact", action="store_true", help="--stats와 함께: 세그먼트 COUNT Scan으로 정확한 개수")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SCAN_SEGMENTS, help="병렬 Scan TotalSegments")
+    parser.add_argument(
+        "--max-pages-per-second",
+        type=float,
+        default=DEFAULT_MAX_PAGES_PER_SECOND,
+        help="COUNT Scan 페이지 요청 상한 (전체 세그먼트 합계, 0이면 제한 없음)",
+    )
+    args = parser.parse_args()
+
+    dynamodb = create_client()
+
+    if args.stats:
+        try:
+            stats = collect_stats(dynamodb, args.exact, args.segments, args.max_pages_per_second)
+        except Exception as e:
+            print(json.dumps({"error": str(e)}), file=sys.stderr)
+            return 1
+        print(json.dumps(stats, ensure_ascii=False))
+        return 0
+
+    try:
+        print_overview(dynamodb)
+    except ClientError as e:
+        print(f"❌ 오류: {e}")
+    except Exception as e:
+        print(f"❌ 연결 실패: {e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,35 @@
 """
 PostgreSQL → DynamoDB 마이그레이션 스크립트
 raw_data, slices, inverted_index 테이블을 DynamoDB로 이전
+
+사용 예:
+  python3 scripts/migrate-to-dynamodb.py                      # 기존과 동일 (String JSON)
+  python3 scripts/migrate-to-dynamodb.py --codec zstd         # 페이로드 압축 저장
+  python3 scripts/migrate-to-dynamodb.py --benchmark-codecs   # 코덱별 WCU 비교 (쓰기 없음)
+  python3 scripts/migrate-to-dynamodb.py --latest-marker pointer  # LATEST는 엔티티별 1회, 포인터만
+  python3 scripts/migrate-to-dynamodb.py --benchmark-conversion 5000  # 행 변환 경로 비교
+  python3 scripts/migrate-to-dynamodb.py --verify --verify-segments 16  # 마이그레이션 결과 검증
 """
 
+import argparse
 import boto3
-import psycopg2
+import concurrent.futures
+import gzip
+import hashlib
 import json
+import math
+import psycopg2
+import random
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal
+from typing import Dict, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd 코덱은 선택 의존성
+    zstandard = None
 
 # PostgreSQL 연결 설정
 PG_HOST = "ivm-lite.crcikgmci55c.ap-northeast-2.rds.amazonaws.com"
@@ -27,6 +49,25 @@ import os
 AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY_ID", "YOUR_AWS_ACCESS_KEY_ID")
 AWS_SECRET_KEY = os.getenv("AWS_SECRET_ACCESS_KEY", "YOUR_AWS_SECRET_ACCESS_KEY")
 
+# 페이로드 코덱
+# - none: 기존과 동일하게 String 속성(payload_json / data)에 JSON 저장 (런타임 기본 reader 호환)
+# - gzip/zstd: {속성}_bin(Binary) + {속성}_codec 마커로 저장. 읽는 쪽이 코덱을 지원해야 한다.
+PAYLOAD_CODECS = ("none", "gzip", "zstd")
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 6
+
+# DynamoDB 아이템 크기 제한 및 WCU 단위
+DYNAMODB_ITEM_LIMIT_BYTES = 400 * 1024
+NEAR_LIMIT_RATIO = 0.8
+WCU_UNIT_BYTES = 1024
+SIZE_HISTOGRAM_BUCKETS_KB = (1, 4, 16, 64, 128, 256, 350, 400)
+
+# LATEST 마커 쓰기 방식
+# - copy: 모든 row마다 전체 페이로드 복사본을 LATEST로 put (기존 동작, 버전 도착 순서에 따라 덮어씀)
+# - latest: 엔티티별 최대 버전 row만 LATEST 전체 복사본을 put
+# - pointer: 엔티티별 최대 버전 row만 페이로드 없는 포인터(latest_sk)를 LATEST로 put
+LATEST_MARKER_MODES = ("copy", "latest", "pointer")
+
 def get_pg_connection():
     """PostgreSQL 연결"""
     return psycopg2.connect(
@@ -59,135 +100,327 @@ def convert_to_dynamodb_format(obj):
     else:
         return obj
 
-def migrate_raw_data():
-    """raw_data 테이블 마이그레이션"""
-    print("\n=== RawData 마이그레이션 시작 ===")
+def encode_payload(attr: str, payload_json: str, codec: str) -> Dict:
+    """
+    JSON 페이로드를 코덱에 맞는 DynamoDB 속성으로 변환
+    - none: {attr: payload_json}
+    - gzip/zstd: {attr_bin: bytes, attr_codec: codec}
+    """
+    if codec == "none":
+        return {attr: payload_json}
+
+    raw = payload_json.encode("utf-8")
+    if codec == "gzip":
+        # mtime=0: 동일 입력 → 동일 바이트 (결정성)
+        compressed = gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+    elif codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd 코덱을 사용하려면 'pip install zstandard'가 필요합니다.")
+        compressed = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    else:
+        raise ValueError(f"Unknown payload codec: {codec}")
+
+    return {f"{attr}_bin": compressed, f"{attr}_codec": codec}
+
+
+def estimate_item_size(item: Dict) -> int:
+    """DynamoDB 아이템 크기 추정 (속성 이름 + 값, 바이트)"""
+    size = 0
+    for name, value in item.items():
+        size += len(name.encode("utf-8"))
+        if isinstance(value, str):
+            size += len(value.encode("utf-8"))
+        elif isinstance(value, (bytes, bytearray)):
+            size += len(value)
+        elif isinstance(value, bool) or value is None:
+            size += 1
+        elif isinstance(value, (int, float, Decimal)):
+            # Number: 유효 자릿수 2자리당 1바이트 + 1바이트
+            size += len(str(value).lstrip("-").replace(".", "")) // 2 + 2
+        else:
+            size += len(json.dumps(value, default=str).encode("utf-8"))
+    return size
+
+
+def wcu_for_size(size_bytes: int) -> int:
+    """PutItem 1회의 WCU (1KB 단위 올림)"""
+    return max(1, math.ceil(size_bytes / WCU_UNIT_BYTES))
+
+
+@dataclass
+class MigrationReport:
+    """마이그레이션 아이템 크기/WCU 통계"""
+    codec: str
+    items: int = 0
+    total_bytes: int = 0
+    total_wcu: int = 0
+    near_limit: int = 0
+    over_limit: int = 0
+    max_bytes: int = 0
+    failed: int = 0
+    histogram: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, item: Dict, size: Optional[int] = None) -> int:
+        """아이템 하나를 통계에 반영 (마이그레이션에서는 PutItem 성공한 아이템만)"""
+        if size is None:
+            size = estimate_item_size(item)
+        self.items += 1
+        self.total_bytes += size
+        self.total_wcu += wcu_for_size(size)
+        self.max_bytes = max(self.max_bytes, size)
+        if size > DYNAMODB_ITEM_LIMIT_BYTES:
+            self.over_limit += 1
+        elif size >= DYNAMODB_ITEM_LIMIT_BYTES * NEAR_LIMIT_RATIO:
+            self.near_limit += 1
+        bucket = _size_bucket_label(size)
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+        return size
+
+    def print_summary(self, title: str) -> None:
+        print(f"--- {title} 크기 리포트 (codec={self.codec}) ---")
+        print(f"  아이템: {self.items}건, 총 {self.total_bytes / 1024:.1f}KB, 최대 {self.max_bytes / 1024:.1f}KB")
+        print(f"  WCU(PutItem 합계): {self.total_wcu}")
+        print(f"  400KB 근접(>={int(NEAR_LIMIT_RATIO * 100)}%): {self.near_limit}건, 초과: {self.over_limit}건")
+        if self.failed:
+            print(f"  PutItem 실패(통계 제외): {self.failed}건")
+        for label in _size_bucket_labels():
+            count = self.histogram.get(label, 0)
+            if count:
+                print(f"    {label:>12} | {count}")
+
+
+def _size_bucket_labels() -> List[str]:
+    labels = [f"<={kb}KB" for kb in SIZE_HISTOGRAM_BUCKETS_KB]
+    labels.append(f">{SIZE_HISTOGRAM_BUCKETS_KB[-1]}KB")
+    return labels
+
+
+def _size_bucket_label(size_bytes: int) -> str:
+    for kb in SIZE_HISTOGRAM_BUCKETS_KB:
+        if size_bytes <= kb * 1024:
+            return f"<={kb}KB"
+    return f">{SIZE_HISTOGRAM_BUCKETS_KB[-1]}KB"
+
+
+def put_item_checked(table, item: Dict, report: MigrationReport) -> None:
+    """PutItem 후 성공한 아이템만 리포트에 기록 (400KB 초과는 요청 전에 실패 처리)"""
+    size = estimate_item_size(item)
+    if size > DYNAMODB_ITEM_LIMIT_BYTES:
+        report.over_limit += 1
+        report.failed += 1
+        raise ValueError(f"item size {size} bytes exceeds DynamoDB limit (codec={report.codec})")
+    try:
+        table.put_item(Item=item)
+    except Exception:
+        report.failed += 1
+        raise
+    report.record(item, size)
+
+
+# latest_version: 엔티티별 최대 버전 (Postgres 윈도우 함수로 계산)
+# content::text: psycopg2의 JSON decode → json.dumps 재인코딩을 건너뛰고 Postgres가 직렬화한 텍스트를 그대로 사용
+#   (jsonb 텍스트 출력은 ensure_ascii=False json.dumps와 같은 구분자/UTF-8 형식)
+RAW_DATA_SELECT_SQL = """
+    SELECT tenant_id, entity_key, version, schema_id, schema_version, 
+           content::text AS content_json, content_hash, created_at,
+           MAX(version) OVER (PARTITION BY tenant_id, entity_key) AS latest_version
+    FROM raw_data
+"""
+
+SLICES_SELECT_SQL = """
+    SELECT tenant_id, entity_key, slice_version, slice_type, 
+           content::text AS content_json, content_hash, created_at,
+           MAX(slice_version) OVER (PARTITION BY tenant_id, entity_key, slice_type) AS latest_version
+    FROM slices
+"""
+
+def build_raw_data_items(row, codec: str = "none", latest_marker: str = "copy") -> List[Dict]:
+    """raw_data row → [versioned item, (LATEST 마커)]"""
+    (tenant_id, entity_key, version, schema_id, schema_version,
+     content_json, content_hash, created_at, latest_version) = row
     
-    conn = get_pg_connection()
-    cur = conn.cursor()
-    dynamodb = get_dynamodb()
-    table = dynamodb.Table(DATA_TABLE)
+    # DynamoDB 키 형식
+    pk = f"TENANT#{tenant_id}#ENTITY#{entity_key}"
+    sk = f"RAWDATA#v{version}"
     
-    cur.execute("""
-        SELECT tenant_id, entity_key, version, schema_id, schema_version, 
-               content, content_hash, created_at
-        FROM raw_data
-    """)
+    # content는 이미 JSON 텍스트 (코덱 적용은 versioned/LATEST 공통으로 한 번만)
+    payload_json = content_json or '{}'
+    payload_attrs = encode_payload('payload_json', payload_json, codec)
     
-    rows = cur.fetchall()
-    print(f"마이그레이션할 raw_data: {len(rows)}건")
+    item = {
+        'PK': pk,
+        'SK': sk,
+        'tenant_id': tenant_id,
+        'entity_key': entity_key,
+        'version': version,
+        'schema_id': schema_id,
+        'schema_version': schema_version,
+        **payload_attrs,
+        'payload_hash': content_hash or '',
+        'created_at': created_at.isoformat() if created_at else '',
+    }
     
-    for row in rows:
-        tenant_id, entity_key, version, schema_id, schema_version, content, content_hash, created_at = row
-        
-        # DynamoDB 키 형식
-        pk = f"TENANT#{tenant_id}#ENTITY#{entity_key}"
-        sk = f"RAWDATA#v{version}"
-        
-        # content를 JSON 문자열로 변환
-        payload_json = json.dumps(content, ensure_ascii=False) if content else '{}'
-        
-        item = {
+    # Latest 마커 (copy 외 모드에서는 최대 버전 row에서만)
+    if latest_marker != "copy" and version != latest_version:
+        return [item]
+    if latest_marker == "pointer":
+        latest_item = {
             'PK': pk,
-            'SK': sk,
+            'SK': 'RAWDATA#LATEST',
             'tenant_id': tenant_id,
             'entity_key': entity_key,
             'version': version,
-            'schema_id': schema_id,
-            'schema_version': schema_version,
-            'payload_json': payload_json,
-            'payload_hash': content_hash or '',
-            'created_at': created_at.isoformat() if created_at else '',
+            'latest_sk': sk,
+            'payload_hash': item['payload_hash'],
+            'created_at': item['created_at'],
         }
-        
-        # Latest 마커도 추가
+    else:
+        latest_item = {**item, 'SK': 'RAWDATA#LATEST'}
+    return [item, latest_item]
+
+def build_slice_items(row, codec: str = "none", latest_marker: str = "copy") -> List[Dict]:
+    """slices row → [versioned item, (LATEST 마커)]"""
+    tenant_id, entity_key, version, slice_type, content_json, content_hash, created_at, latest_version = row
+    
+    # DynamoDB 키 형식
+    pk = f"TENANT#{tenant_id}#ENTITY#{entity_key}"
+    sk = f"SLICE#v{version}#{slice_type}"
+    
+    # content는 이미 JSON 텍스트
+    data_json = content_json or '{}'
+    data_attrs = encode_payload('data', data_json, codec)
+    
+    item = {
+        'PK': pk,
+        'SK': sk,
+        'tenant_id': tenant_id,
+        'entity_key': entity_key,
+        'version': version,
+        'slice_type': slice_type,
+        **data_attrs,
+        'hash': content_hash or '',
+        'created_at': created_at.isoformat() if created_at else '',
+    }
+    
+    # Latest 마커 (copy 외 모드에서는 최대 버전 row에서만)
+    if latest_marker != "copy" and version != latest_version:
+        return [item]
+    if latest_marker == "pointer":
         latest_item = {
             'PK': pk,
-            'SK': 'RAWDATA#LATEST',
+            'SK': f'SLICE#LATEST#{slice_type}',
             'tenant_id': tenant_id,
             'entity_key': entity_key,
             'version': version,
-            'schema_id': schema_id,
-            'schema_version': schema_version,
-            'payload_json': payload_json,
-            'payload_hash': content_hash or '',
-            'created_at': created_at.isoformat() if created_at else '',
+            'slice_type': slice_type,
+            'latest_sk': sk,
+            'hash': item['hash'],
+            'created_at': item['created_at'],
         }
-        
+    else:
+        latest_item = {**item, 'SK': f'SLICE#LATEST#{slice_type}'}
+    return [item, latest_item]
+
+def migrate_raw_data(codec: str = "none", report: Optional[MigrationReport] = None,
+                     latest_marker: str = "copy"):
+    """raw_data 테이블 마이그레이션"""
+    print("\n=== RawData 마이그레이션 시작 ===")
+    report = report or MigrationReport(codec=codec)
+    
+    conn = get_pg_connection()
+    cur = conn.cursor()
+    dynamodb = get_dynamodb()
+    table = dynamodb.Table(DATA_TABLE)
+    
+    cur.execute(RAW_DATA_SELECT_SQL)
+    
+    rows = cur.fetchall()
+    print(f"마이그레이션할 raw_data: {len(rows)}건")
+    
+    for row in rows:
+        tenant_id, entity_key, version = row[0], row[1], row[2]
         try:
-            table.put_item(Item=item)
-            table.put_item(Item=latest_item)
+            for item in build_raw_data_items(row, codec, latest_marker):
+                put_item_checked(table, item, report)
             print(f"  ✓ {tenant_id}/{entity_key} v{version}")
         except Exception as e:
             print(f"  ✗ {tenant_id}/{entity_key}: {e}")
     
     cur.close()
     conn.close()
+    report.print_summary("RawData")
     print(f"=== RawData 마이그레이션 완료: {len(rows)}건 ===\n")
+    return report
 
-def migrate_slices():
+def migrate_slices(codec: str = "none", report: Optional[MigrationReport] = None,
+                   latest_marker: str = "copy"):
     """slices 테이블 마이그레이션"""
     print("\n=== Slices 마이그레이션 시작 ===")
+    report = report or MigrationReport(codec=codec)
     
     conn = get_pg_connection()
     cur = conn.cursor()
     dynamodb = get_dynamodb()
     table = dynamodb.Table(DATA_TABLE)
     
-    cur.execute("""
-        SELECT tenant_id, entity_key, slice_version, slice_type, 
-               content, content_hash, created_at
-        FROM slices
-    """)
+    cur.execute(SLICES_SELECT_SQL)
     
     rows = cur.fetchall()
     print(f"마이그레이션할 slices: {len(rows)}건")
     
     for row in rows:
-        tenant_id, entity_key, version, slice_type, content, content_hash, created_at = row
-        
-        # DynamoDB 키 형식
-        pk = f"TENANT#{tenant_id}#ENTITY#{entity_key}"
-        sk = f"SLICE#v{version}#{slice_type}"
-        
-        # content를 JSON 문자열로 변환
-        data_json = json.dumps(content, ensure_ascii=False) if content else '{}'
-        
-        item = {
-            'PK': pk,
-            'SK': sk,
-            'tenant_id': tenant_id,
-            'entity_key': entity_key,
-            'version': version,
-            'slice_type': slice_type,
-            'data': data_json,
-            'hash': content_hash or '',
-            'created_at': created_at.isoformat() if created_at else '',
-        }
-        
-        # Latest 마커도 추가
-        latest_item = {
-            'PK': pk,
-            'SK': f'SLICE#LATEST#{slice_type}',
-            'tenant_id': tenant_id,
-            'entity_key': entity_key,
-            'version': version,
-            'slice_type': slice_type,
-            'data': data_json,
-            'hash': content_hash or '',
-            'created_at': created_at.isoformat() if created_at else '',
-        }
-        
+        tenant_id, entity_key, version, slice_type = row[0], row[1], row[2], row[3]
         try:
-            table.put_item(Item=item)
-            table.put_item(Item=latest_item)
+            for item in build_slice_items(row, codec, latest_marker):
+                put_item_checked(table, item, report)
             print(f"  ✓ {tenant_id}/{entity_key}/{slice_type} v{version}")
         except Exception as e:
             print(f"  ✗ {tenant_id}/{entity_key}/{slice_type}: {e}")
     
     cur.close()
     conn.close()
+    report.print_summary("Slices")
     print(f"=== Slices 마이그레이션 완료: {len(rows)}건 ===\n")
+    return report
+
+def benchmark_codecs(codecs: List[str], latest_marker: str = "copy"):
+    """
+    쓰기 없이 raw_data/slices 아이템을 코덱별로 만들어 크기/WCU를 비교한다.
+    (PutItem WCU = ceil(item_size / 1KB), --latest-marker 모드의 LATEST put 포함)
+    """
+    print("\n=== 코덱 WCU 벤치마크 (dry-run, DynamoDB 쓰기 없음) ===")
+    
+    conn = get_pg_connection()
+    cur = conn.cursor()
+    cur.execute(RAW_DATA_SELECT_SQL)
+    raw_rows = cur.fetchall()
+    cur.execute(SLICES_SELECT_SQL)
+    slice_rows = cur.fetchall()
+    cur.close()
+    conn.close()
+    
+    reports: Dict[str, MigrationReport] = {}
+    for codec in codecs:
+        report = MigrationReport(codec=codec)
+        started = time.perf_counter()
+        for row in raw_rows:
+            for item in build_raw_data_items(row, codec, latest_marker):
+                report.record(item)
+        for row in slice_rows:
+            for item in build_slice_items(row, codec, latest_marker):
+                report.record(item)
+        elapsed = time.perf_counter() - started
+        report.print_summary(f"raw_data+slices ({elapsed:.2f}s)")
+        reports[codec] = report
+    
+    baseline = reports.get("none")
+    if baseline and baseline.total_wcu:
+        print("\n  codec  |    WCU   | 절감률 |   총 크기(KB)")
+        for codec, report in reports.items():
+            saving = 100.0 * (1 - report.total_wcu / baseline.total_wcu)
+            print(f"  {codec:6} | {report.total_wcu:8} | {saving:5.1f}% | {report.total_bytes / 1024:12.1f}")
+    print("=== 코덱 WCU 벤치마크 완료 ===\n")
+    return reports
 
 def migrate_inverted_index():
     """inverted_index 테이블 마이그레이션"""
@@ -314,19 +547,293 @@ def migrate_contracts():
     
     print(f"=== Contract 마이그레이션 완료: {count}건 ===\n")
 
+# 변환 벤치마크 샘플: 두 경로가 같은 행을 읽도록 동일 정렬/LIMIT
+BENCHMARK_LEGACY_SQL = """
+    SELECT tenant_id, entity_key, version, schema_id, schema_version,
+           content, content_hash, created_at, version AS latest_version
+    FROM raw_data
+    ORDER BY tenant_id, entity_key, version
+    LIMIT %s
+"""
+
+BENCHMARK_TEXT_SQL = """
+    SELECT tenant_id, entity_key, version, schema_id, schema_version,
+           content::text AS content_json, content_hash, created_at, version AS latest_version
+    FROM raw_data
+    ORDER BY tenant_id, entity_key, version
+    LIMIT %s
+"""
+
+def benchmark_conversion(sample_size: int, rounds: int = 3):
+    """
+    raw_data 행 → DynamoDB 아이템 경로 벤치마크 (DynamoDB 쓰기 없음)
+    - before: content(jsonb)를 psycopg2가 json.loads로 decode → json.dumps 재인코딩 → 아이템 생성
+    - after:  content::text를 그대로 아이템 생성에 사용 (현재 마이그레이션 경로)
+    fetch(드라이버 decode 포함)부터 build_raw_data_items까지 측정한다.
+    """
+    print(f"\n=== 변환 벤치마크 (sample={sample_size}, rounds={rounds}) ===")
+    
+    conn = get_pg_connection()
+    cur = conn.cursor()
+    
+    def before_path():
+        cur.execute(BENCHMARK_LEGACY_SQL, (sample_size,))
+        items = 0
+        for row in cur.fetchall():
+            content = row[5]
+            content_json = json.dumps(content, ensure_ascii=False) if content else '{}'
+            items += len(build_raw_data_items(row[:5] + (content_json,) + row[6:]))
+        return items
+    
+    def after_path():
+        cur.execute(BENCHMARK_TEXT_SQL, (sample_size,))
+        return sum(len(build_raw_data_items(row)) for row in cur.fetchall())
+    
+    results = {}
+    try:
+        for name, fn in (("before (decode + json.dumps)", before_path), ("after (content::text)", after_path)):
+            best = None
+            rows = 0
+            for _ in range(rounds):
+                started = time.perf_counter()
+                rows = fn()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            results[name] = best
+            rate = rows / best if best else float("inf")
+            print(f"  {name:30} | {best * 1000:9.1f}ms | {rate:12.0f} items/s")
+    finally:
+        cur.close()
+        conn.close()
+    
+    before, after = results.values()
+    if after:
+        print(f"  speedup: {before / after:.2f}x")
+    print("=== 변환 벤치마크 완료 ===\n")
+
+# 검증용 버킷: md5(PK) 앞 N hex 문자 (2 → 256개 키 범위)
+VERIFY_BUCKET_HEX_CHARS = 2
+DEFAULT_VERIFY_SEGMENTS = 8
+
+# 버킷별 (건수, digest 합) - 순서 무관하게 합산 가능한 digest를 SQL과 동일 규칙으로 계산
+# digest(item) = md5(PK|SK|hash) 앞 15 hex(60bit) 정수
+VERIFY_SOURCE_SQL = """
+    SELECT 'TENANT#' || tenant_id || '#ENTITY#' || entity_key AS pk,
+           'RAWDATA#v' || version AS sk,
+           content_hash AS hash
+    FROM raw_data
+    UNION ALL
+    SELECT 'TENANT#' || tenant_id || '#ENTITY#' || entity_key AS pk,
+           'SLICE#v' || slice_version || '#' || slice_type AS sk,
+           content_hash AS hash
+    FROM slices
+"""
+
+def get_dynamodb_client():
+    """DynamoDB low-level 클라이언트 (스레드별 Scan용)"""
+    return boto3.client(
+        'dynamodb',
+        region_name=AWS_REGION,
+        aws_access_key_id=AWS_ACCESS_KEY,
+        aws_secret_access_key=AWS_SECRET_KEY
+    )
+
+def verify_bucket_of(pk: str) -> str:
+    return hashlib.md5(pk.encode("utf-8")).hexdigest()[:VERIFY_BUCKET_HEX_CHARS]
+
+def verify_item_digest(pk: str, sk: str, content_hash: str) -> int:
+    return int(hashlib.md5(f"{pk}|{sk}|{content_hash}".encode("utf-8")).hexdigest()[:15], 16)
+
+def _merge_digests(target: Dict[str, List[int]], source: Dict[str, List[int]]) -> None:
+    for bucket, (count, digest) in source.items():
+        acc = target.setdefault(bucket, [0, 0])
+        acc[0] += count
+        acc[1] += digest
+
+def scan_segment_digests(segment: int, total_segments: int,
+                         buckets: Optional[set] = None) -> Dict[str, List[int]]:
+    """Scan 세그먼트 하나를 돌며 versioned RAWDATA/SLICE 아이템의 버킷 digest 계산"""
+    client = get_dynamodb_client()
+    paginator = client.get_paginator('scan')
+    digests: Dict[str, List[int]] = {}
+    pages = paginator.paginate(
+        TableName=DATA_TABLE,
+        Segment=segment,
+        TotalSegments=total_segments,
+        ProjectionExpression="PK, SK, payload_hash, #h",
+        ExpressionAttributeNames={"#h": "hash"},
+    )
+    for page in pages:
+        for item in page.get('Items', []):
+            pk = item['PK']['S']
+            sk = item['SK']['S']
+            if sk.startswith('RAWDATA#v'):
+                content_hash = item.get('payload_hash', {}).get('S', '')
+            elif sk.startswith('SLICE#v'):
+                content_hash = item.get('hash', {}).get('S', '')
+            else:
+                # LATEST 마커 / 인덱스 등은 검증 대상 아님
+                continue
+            bucket = verify_bucket_of(pk)
+            if buckets is not None and bucket not in buckets:
+                continue
+            acc = digests.setdefault(bucket, [0, 0])
+            acc[0] += 1
+            acc[1] += verify_item_digest(pk, sk, content_hash)
+    return digests
+
+def collect_dynamodb_digests(total_segments: int, buckets: Optional[set] = None) -> Dict[str, List[int]]:
+    """병렬 세그먼트 Scan (TotalSegments) 결과를 버킷별로 합산"""
+    digests: Dict[str, List[int]] = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=total_segments) as executor:
+        futures = [
+            executor.submit(scan_segment_digests, segment, total_segments, buckets)
+            for segment in range(total_segments)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            _merge_digests(digests, future.result())
+    return digests
+
+def collect_postgres_digests(buckets: Optional[set] = None) -> Dict[str, List[int]]:
+    """동일한 버킷/digest 규칙을 SQL로 계산 (행을 클라이언트로 가져오지 않음)"""
+    conn = get_pg_connection()
+    cur = conn.cursor()
+    sql = f"""
+        SELECT substr(md5(pk), 1, {VERIFY_BUCKET_HEX_CHARS}) AS bucket,
+               COUNT(*),
+               SUM(('x' || substr(md5(pk || '|' || sk || '|' || hash), 1, 15))::bit(60)::bigint)
+        FROM ({VERIFY_SOURCE_SQL}) src
+    """
+    params = ()
+    if buckets is not None:
+        sql += f" WHERE substr(md5(pk), 1, {VERIFY_BUCKET_HEX_CHARS}) = ANY(%s)"
+        params = (sorted(buckets),)
+    sql += " GROUP BY 1"
+    cur.execute(sql, params)
+    digests = {bucket: [count, int(digest)] for bucket, count, digest in cur.fetchall()}
+    cur.close()
+    conn.close()
+    return digests
+
+def verify_migration(total_segments: int = DEFAULT_VERIFY_SEGMENTS, sample_ratio: float = 1.0,
+                     seed: Optional[int] = None) -> List[str]:
+    """
+    Postgres(raw_data/slices) ↔ DynamoDB(versioned 아이템) 버킷 digest 비교
+    - 불일치 버킷 목록을 반환 (해당 키 범위만 재마이그레이션하면 된다)
+    - sample_ratio < 1.0이면 버킷 일부만 검증 (SQL 집계 범위 축소)
+    """
+    print(f"\n=== 마이그레이션 검증 시작 (segments={total_segments}, sample={sample_ratio}) ===")
+    
+    all_buckets = [format(i, f"0{VERIFY_BUCKET_HEX_CHARS}x") for i in range(16 ** VERIFY_BUCKET_HEX_CHARS)]
+    buckets = None
+    if sample_ratio < 1.0:
+        k = max(1, int(len(all_buckets) * sample_ratio))
+        buckets = set(random.Random(seed).sample(all_buckets, k))
+        print(f"  샘플 버킷: {k}/{len(all_buckets)}")
+    
+    started = time.perf_counter()
+    source = collect_postgres_digests(buckets)
+    print(f"  Postgres digest: {len(source)}개 버킷 ({time.perf_counter() - started:.1f}s)")
+    
+    started = time.perf_counter()
+    target = collect_dynamodb_digests(total_segments, buckets)
+    print(f"  DynamoDB digest: {len(target)}개 버킷 ({time.perf_counter() - started:.1f}s)")
+    
+    mismatched = []
+    for bucket in sorted(set(source) | set(target)):
+        src_count, src_digest = source.get(bucket, [0, 0])
+        dst_count, dst_digest = target.get(bucket, [0, 0])
+        if src_count != dst_count or src_digest != dst_digest:
+            mismatched.append(bucket)
+            print(f"  ✗ bucket {bucket}: postgres={src_count}건 dynamodb={dst_count}건")
+    
+    if mismatched:
+        print(f"\n  불일치 버킷 {len(mismatched)}개. 재마이그레이션 대상 조건:")
+        print(f"    substr(md5('TENANT#' || tenant_id || '#ENTITY#' || entity_key), 1, {VERIFY_BUCKET_HEX_CHARS})"
+              f" IN ({', '.join(repr(b) for b in mismatched)})")
+    else:
+        print("  ✓ 모든 버킷 일치")
+    print("=== 마이그레이션 검증 완료 ===\n")
+    return mismatched
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="PostgreSQL → DynamoDB 마이그레이션")
+    parser.add_argument(
+        "--codec",
+        choices=PAYLOAD_CODECS,
+        default="none",
+        help="raw_data/slices 페이로드 압축 코덱 (기본: none, 런타임 reader 호환)",
+    )
+    parser.add_argument(
+        "--benchmark-codecs",
+        action="store_true",
+        help="쓰기 없이 코덱별 아이템 크기/WCU만 비교",
+    )
+    parser.add_argument(
+        "--latest-marker",
+        choices=LATEST_MARKER_MODES,
+        default="copy",
+        help="LATEST 마커 쓰기 방식 (copy: row마다 전체 복사, latest: 최대 버전만, pointer: 최대 버전만 포인터)",
+    )
+    parser.add_argument(
+        "--benchmark-conversion",
+        type=int,
+        metavar="N",
+        default=0,
+        help="raw_data N건 샘플로 content decode+dumps vs content::text 경로 비교 (쓰기 없음)",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="마이그레이션 없이 Postgres ↔ DynamoDB 버킷 digest 비교",
+    )
+    parser.add_argument(
+        "--verify-segments",
+        type=int,
+        default=DEFAULT_VERIFY_SEGMENTS,
+        help="병렬 Scan TotalSegments (기본: 8)",
+    )
+    parser.add_argument(
+        "--verify-sample",
+        type=float,
+        default=1.0,
+        help="검증할 버킷 비율 (0~1, 기본: 1.0 전체)",
+    )
+    parser.add_argument("--verify-seed", type=int, default=None, help="버킷 샘플링 seed")
+    args = parser.parse_args()
+    # 코덱 의존성은 행마다가 아니라 시작 시 한 번만 확인
+    if args.codec == "zstd" and zstandard is None:
+        parser.error("--codec zstd를 사용하려면 'pip install zstandard'가 필요합니다.")
+    return args
+
 def main():
+    args = parse_args()
+    
+    if args.verify:
+        mismatched = verify_migration(args.verify_segments, args.verify_sample, args.verify_seed)
+        raise SystemExit(1 if mismatched else 0)
+    
+    if args.benchmark_conversion:
+        benchmark_conversion(args.benchmark_conversion)
+        return
+    
+    if args.benchmark_codecs:
+        codecs = [c for c in PAYLOAD_CODECS if c != "zstd" or zstandard is not None]
+        benchmark_codecs(codecs, latest_marker=args.latest_marker)
+        return
+    
     print("=" * 60)
-    print("PostgreSQL → DynamoDB 마이그레이션")
+    print(f"PostgreSQL → DynamoDB 마이그레이션 (codec={args.codec}, latest={args.latest_marker})")
     print("=" * 60)
     
     # 1. Contract (스키마) 마이그레이션
     migrate_contracts()
     
     # 2. RawData 마이그레이션
-    migrate_raw_data()
+    migrate_raw_data(codec=args.codec, latest_marker=args.latest_marker)
     
     # 3. Slices 마이그레이션
-    migrate_slices()
+    migrate_slices(codec=args.codec, latest_marker=args.latest_marker)
     
     # 4. InvertedIndex 마이그레이션
     migrate_inverted_index()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+브랜드 upsert 레지스트리 (실행/샤드 간 중복 upsert 방지)
+
+크롤러는 제품마다 브랜드 문서를 만들어 upsert하는데, 실행 중 메모리(saved_brands)로만
+중복을 막으면 실행/샤드마다 같은 브랜드 문서를 다시 쓰고 그때마다 commit한다.
+
+BrandRegistry는
+- 시작 시 raw_brand_document에서 (brand_id, 내용 해시)를 한 번 읽어 두고
+- 새 브랜드이거나 내용이 바뀐 브랜드만 모아서
+- batch_size마다 execute_values 한 번으로 upsert한다.
+
+내용 해시는 meta(createdAt/updatedAt 등 매번 바뀌는 값)를 뺀 문서를 키 정렬 JSON으로 만든 SHA-256이다.
+DB 쪽 upsert도 meta를 뺀 내용이 다를 때만 갱신하므로, 동시에 도는 샤드가 같은 브랜드를 보내도
+실제 쓰기는 한 번만 일어난다.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from psycopg2.extras import execute_values
+
+from document_json import dumps_document
+
+DEFAULT_BRAND_FLUSH_SIZE = 50
+
+LOAD_BRAND_HASH_SOURCE_SQL = "SELECT brand_id, document - 'meta' FROM raw_brand_document"
+
+UPSERT_BRANDS_SQL = """
+    INSERT INTO raw_brand_document (brand_id, document)
+    VALUES %s
+    ON CONFLICT (brand_id) DO UPDATE
+    SET document = EXCLUDED.document, updated_at = NOW()
+    WHERE raw_brand_document.document - 'meta' IS DISTINCT FROM EXCLUDED.document - 'meta'
+    RETURNING brand_id
+"""
+
+
+def brand_content_hash(document: Dict) -> str:
+    """meta를 제외한 브랜드 문서 내용 해시 (DB jsonb 키 순서와 무관)"""
+    content = {key: value for key, value in document.items() if key != "meta"}
+    canonical = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class BrandRegistry:
+    """raw_brand_document 기준 브랜드 upsert 캐시 (새 브랜드/변경된 브랜드만 배치 upsert)"""
+
+    def __init__(self, conn, batch_size: int = DEFAULT_BRAND_FLUSH_SIZE):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.hashes: Dict[str, str] = {}
+        self.seen_names: Set[str] = set()
+        self.pending: Dict[str, Tuple[Dict, str]] = {}  # brand_id → (문서, 내용 해시)
+        self.written = 0
+        self.unchanged = 0
+
+    def load(self) -> "BrandRegistry":
+        cursor = self.conn.cursor()
+        cursor.execute(LOAD_BRAND_HASH_SOURCE_SQL)
+        self.hashes = {brand_id: brand_content_hash(content) for brand_id, content in cursor.fetchall()}
+        cursor.close()
+        return self
+
+    def add(self, brand_name: str, build_document: Callable[[str], Dict]) -> Optional[str]:
+        """
+        브랜드 등록 (이번 실행에서 처음 보는 이름만 문서 생성)
+        - 저장된 내용과 같으면 건너뛰고, 새 브랜드/변경 시 pending에 쌓아 batch_size마다 flush
+        """
+        if not brand_name or brand_name == "Unknown" or brand_name in self.seen_names:
+            return None
+        self.seen_names.add(brand_name)
+
+        document = build_document(brand_name)
+        brand_id = document["brandId"]
+        content_hash = brand_content_hash(document)
+        if self.hashes.get(brand_id) == content_hash:
+            self.unchanged += 1
+            return brand_id
+
+        self.pending[brand_id] = (document, content_hash)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        return brand_id
+
+    def flush(self) -> int:
+        """pending 브랜드를 한 번에 upsert + commit → 실제로 쓰인 행 수"""
+        if not self.pending:
+            return 0
+        cursor = self.conn.cursor()
+        try:
+            rows = execute_values(
+                cursor,
+                UPSERT_BRANDS_SQL,
+                [(brand_id, dumps_document(document)) for brand_id, (document, _) in self.pending.items()],
+                template="(%s, %s::jsonb)",
+                fetch=True,
+            )
+            self.conn.commit()
+        finally:
+            cursor.close()
+        # commit 이후에만 해시 반영 → 실패 시 다음 실행에서 다시 시도
+        self.hashes.update((brand_id, content_hash) for brand_id, (_, content_hash) in self.pending.items())
+        self.pending.clear()
+        self.written += len(rows)
+        return len(rows)
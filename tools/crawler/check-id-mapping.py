@@ -1,35 +1,81 @@
 #!/usr/bin/env python3
 """
 ID 매핑 일관성 확인: 제품-카테고리, 제품-브랜드 매핑 검증
+
+참조 키 집계와 매핑 여부 판정은 모두 서버에서 수행한다 (GROUP BY + LEFT JOIN anti-join).
+클라이언트로는 distinct 브랜드/카테고리 수만큼의 행만 전송된다.
 """
 
-import json
 import sys
-from collections import defaultdict
 from pathlib import Path
 
 import psycopg2
 
 # rawdata_db 유틸 import
 sys.path.append(str(Path(__file__).resolve().parent))
-from rawdata_db import connect_pg, ensure_raw_tables, init_rawdata_database_and_schema
+from rawdata_db import connect_pg, ensure_raw_tables, init_rawdata_database_and_schema, product_key_sql
 
 
-def build_category_id(category):
-    """카테고리 ID 생성 (extract-categories-from-products.py와 동일한 로직)"""
-    if not category:
-        return None
-    
-    large = category.get("large", {})
-    medium = category.get("medium", {})
-    small = category.get("small", {})
-    
-    large_code = large.get("code", "")
-    medium_code = medium.get("code", "")
-    small_code = small.get("code", "")
-    
-    category_id = f"{large_code}_{medium_code}_{small_code}".strip("_")
-    return category_id if category_id else None
+# 제품에서 참조하는 키별 제품 수 + 매핑 여부 (referenced/missing 합계는 window로 함께 계산)
+def _reference_sql(key_sql: str, target_table: str, target_key: str) -> str:
+    return f"""
+        WITH refs AS (
+            SELECT {key_sql} AS ref_key, COUNT(*) AS product_count
+            FROM raw_product_document
+            WHERE NOT is_synthetic
+              AND {key_sql} <> ''
+            GROUP BY 1
+        )
+        SELECT
+            r.ref_key,
+            r.product_count,
+            t.{target_key} IS NOT NULL AS mapped,
+            COUNT(*) OVER () AS referenced,
+            COUNT(*) FILTER (WHERE t.{target_key} IS NULL) OVER () AS missing
+        FROM refs r
+        LEFT JOIN {target_table} t ON t.{target_key} = r.ref_key
+        ORDER BY r.product_count DESC, r.ref_key
+        LIMIT %(limit)s
+    """
+
+
+# 매핑 안 된 키만 (anti-join)
+def _missing_sql(key_sql: str, target_table: str, target_key: str) -> str:
+    return f"""
+        WITH refs AS (
+            SELECT DISTINCT {key_sql} AS ref_key
+            FROM raw_product_document
+            WHERE NOT is_synthetic
+              AND {key_sql} <> ''
+        )
+        SELECT r.ref_key
+        FROM refs r
+        LEFT JOIN {target_table} t ON t.{target_key} = r.ref_key
+        WHERE t.{target_key} IS NULL
+        ORDER BY 1
+        LIMIT %(limit)s
+    """
+
+
+def fetch_references(cursor, sql: str, limit=None):
+    """(rows[(key, count, mapped)], referenced, missing)"""
+    cursor.execute(sql, {"limit": limit})
+    rows = cursor.fetchall()
+    if not rows:
+        return [], 0, 0
+    referenced, missing = rows[0][3], rows[0][4]
+    return [(key, count, mapped) for key, count, mapped, _, _ in rows], referenced, missing
+
+
+def fetch_missing(cursor, sql: str, limit: int = 10):
+    cursor.execute(sql, {"limit": limit})
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _rate(referenced: int, missing: int) -> str:
+    mapped = referenced - missing
+    percent = mapped / referenced * 100 if referenced else 0.0
+    return f"{percent:.1f}% ({mapped}/{referenced})"
 
 
 def check_mappings():
@@ -38,84 +84,55 @@ def check_mappings():
     ensure_raw_tables(conn)
     cursor = conn.cursor()
     
+    # generated column(brand_code/category_key)이 있으면 인덱스로, 없으면 JSONB 표현식으로 조회
+    keys = product_key_sql(conn)
+    brand_code, category_key = keys["brand_code"], keys["category_key"]
+    
     # 1. 브랜드 매핑 확인
     print("=== 브랜드 ID 매핑 확인 ===")
-    cursor.execute("""
-        SELECT brand_id FROM raw_brand_document
-    """)
-    existing_brands = {row[0] for row in cursor.fetchall()}
-    print(f"총 브랜드 수: {len(existing_brands)}")
-    
-    cursor.execute("""
-        SELECT product_id, document->'masterInfo'->'brand'->>'code' as brand_code
-        FROM raw_product_document
-        WHERE product_id NOT LIKE '%SYN%'
-          AND document->'masterInfo'->'brand'->>'code' IS NOT NULL
-    """)
-    
-    brand_refs = defaultdict(int)
-    missing_brands = set()
-    
-    for product_id, brand_code in cursor.fetchall():
-        if brand_code:
-            brand_refs[brand_code] += 1
-            if brand_code not in existing_brands:
-                missing_brands.add(brand_code)
-    
-    print(f"제품에서 참조하는 브랜드 수: {len(brand_refs)}")
-    print(f"매핑되지 않은 브랜드 수: {len(missing_brands)}")
-    if missing_brands:
-        print(f"  매핑 안 된 브랜드 (상위 10개): {list(missing_brands)[:10]}")
+    cursor.execute("SELECT COUNT(*) FROM raw_brand_document")
+    total_brands = cursor.fetchone()[0]
+    print(f"총 브랜드 수: {total_brands}")
+    
+    top_brands, brand_referenced, brand_missing = fetch_references(
+        cursor, _reference_sql(brand_code, "raw_brand_document", "brand_id"), limit=10
+    )
+    print(f"제품에서 참조하는 브랜드 수: {brand_referenced}")
+    print(f"매핑되지 않은 브랜드 수: {brand_missing}")
+    if brand_missing:
+        missing = fetch_missing(cursor, _missing_sql(brand_code, "raw_brand_document", "brand_id"))
+        print(f"  매핑 안 된 브랜드 (상위 10개): {missing}")
     
     # 2. 카테고리 매핑 확인
     print("\n=== 카테고리 ID 매핑 확인 ===")
-    cursor.execute("""
-        SELECT category_id FROM raw_category_document
-    """)
-    existing_categories = {row[0] for row in cursor.fetchall()}
-    print(f"총 카테고리 수: {len(existing_categories)}")
-    
-    cursor.execute("""
-        SELECT product_id, document->'masterInfo'->'standardCategory' as category
-        FROM raw_product_document
-        WHERE product_id NOT LIKE '%SYN%'
-          AND document->'masterInfo'->'standardCategory' IS NOT NULL
-    """)
-    
-    category_refs = defaultdict(int)
-    missing_categories = set()
-    
-    for product_id, category_json in cursor.fetchall():
-        if category_json:
-            category = json.loads(json.dumps(category_json))
-            category_id = build_category_id(category)
-            if category_id:
-                category_refs[category_id] += 1
-                if category_id not in existing_categories:
-                    missing_categories.add(category_id)
-    
-    print(f"제품에서 참조하는 카테고리 수: {len(category_refs)}")
-    print(f"매핑되지 않은 카테고리 수: {len(missing_categories)}")
-    if missing_categories:
-        print(f"  매핑 안 된 카테고리: {list(missing_categories)[:10]}")
+    cursor.execute("SELECT COUNT(*) FROM raw_category_document")
+    total_categories = cursor.fetchone()[0]
+    print(f"총 카테고리 수: {total_categories}")
+    
+    categories, category_referenced, category_missing = fetch_references(
+        cursor, _reference_sql(category_key, "raw_category_document", "category_id")
+    )
+    print(f"제품에서 참조하는 카테고리 수: {category_referenced}")
+    print(f"매핑되지 않은 카테고리 수: {category_missing}")
+    if category_missing:
+        missing = fetch_missing(cursor, _missing_sql(category_key, "raw_category_document", "category_id"))
+        print(f"  매핑 안 된 카테고리: {missing}")
     
     # 3. 매핑 통계
     print("\n=== 매핑 통계 ===")
-    print(f"브랜드 매핑률: {(len(brand_refs) - len(missing_brands)) / len(brand_refs) * 100:.1f}% ({len(brand_refs) - len(missing_brands)}/{len(brand_refs)})")
-    print(f"카테고리 매핑률: {(len(category_refs) - len(missing_categories)) / len(category_refs) * 100:.1f}% ({len(category_refs) - len(missing_categories)}/{len(category_refs)})")
+    print(f"브랜드 매핑률: {_rate(brand_referenced, brand_missing)}")
+    print(f"카테고리 매핑률: {_rate(category_referenced, category_missing)}")
     
     # 4. 상위 브랜드 매핑 상태
     print("\n=== 상위 브랜드 매핑 상태 ===")
-    sorted_brands = sorted(brand_refs.items(), key=lambda x: x[1], reverse=True)
-    for brand_code, count in sorted_brands[:10]:
-        status = "✓" if brand_code in existing_brands else "✗"
+    for brand_code, count, mapped in top_brands:
+        status = "✓" if mapped else "✗"
         print(f"  {status} {brand_code}: {count}개 제품")
     
     # 5. 카테고리별 제품 수
     print("\n=== 카테고리별 제품 수 ===")
-    sorted_categories = sorted(category_refs.items(), key=lambda x: x[1], reverse=True)
-    for category_id, count in sorted_categories:
-        status = "✓" if category_id in existing_categories else "✗"
+    for category_id, count, mapped in categories:
+        status = "✓" if mapped else "✗"
         print(f"  {status} {category_id}: {count}개 제품")
     
     cursor.close()
@@ -123,14 +140,14 @@ def check_mappings():
     
     return {
         "brands": {
-            "total": len(existing_brands),
-            "referenced": len(brand_refs),
-            "missing": len(missing_brands),
+            "total": total_brands,
+            "referenced": brand_referenced,
+            "missing": brand_missing,
         },
         "categories": {
-            "total": len(existing_categories),
-            "referenced": len(category_refs),
-            "missing": len(missing_categories),
+            "total": total_categories,
+            "referenced": category_referenced,
+            "missing": category_missing,
         },
     }
 
@@ -2,36 +2,141 @@
 """
 MECCA 브랜드 크롤링 스크립트
 https://www.mecca.com/en-au/brands/ 페이지에서 브랜드 정보를 수집하여 PostgreSQL에 삽입
+
+- 이미 저장된 브랜드는 ANY(%s) 한 번의 조회로 찾는다
+- 브랜드 상세 페이지는 제한된 동시성 + 초당 요청 상한으로 병렬 수집
+- 상세 정보는 로컬 캐시(JSON)에 TTL 동안 재사용하고, 만료 후에는 ETag/Last-Modified로
+  조건부 요청을 보내 페이지가 바뀌지 않았으면(304) 다시 파싱하지 않는다
+- 캐시를 쓰면 이미 저장된 브랜드도 캐시/조건부 요청으로 상세 정보를 갱신하고,
+  logoUrl/description이 바뀐 문서만 UPDATE한다 (--no-details-cache면 신규 브랜드만 조회)
+- 캐시 파일은 중간에 실패해도 그때까지 받은 항목을 저장한다
+
+사용 예:
+  python3 tools/crawler/crawl-mecca-brands.py
+  python3 tools/crawler/crawl-mecca-brands.py --concurrency 8 --details-ttl-hours 24
 """
 
+import argparse
+import concurrent.futures
 import json
+import os
 import re
 import sys
+import tempfile
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 from urllib.parse import urljoin
 
 import psycopg2
 import requests
 from bs4 import BeautifulSoup
+from psycopg2.extras import execute_values
 
 # rawdata_db 유틸 import
 sys.path.append(str(Path(__file__).resolve().parent))
-from rawdata_db import connect_pg, ensure_raw_tables, init_rawdata_database_and_schema
+from product_ids import name_based_brand_code
+from rawdata_db import connect_pg, dumps_document, ensure_raw_tables, init_rawdata_database_and_schema
 
 BASE_URL = "https://www.mecca.com/en-au/brands/"
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+
+DEFAULT_FETCH_CONCURRENCY = 4
+DEFAULT_MAX_REQUESTS_PER_SECOND = 4.0
+DEFAULT_DETAILS_CACHE_PATH = "build/brand-details-cache.json"
+DEFAULT_DETAILS_TTL_HOURS = 24 * 7
+
+
+class RateLimiter:
+    """스레드 간 공유되는 단순 간격 기반 rate limiter (초당 최대 호출 수)"""
+
+    def __init__(self, max_per_second: float):
+        self.interval = 1.0 / max_per_second if max_per_second > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def acquire(self) -> None:
+        if self.interval <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class BrandDetailsCache:
+    """
+    브랜드 상세 정보 로컬 캐시: {url: {"details", "fetchedAt", "etag", "lastModified"}}
+    - fetchedAt + TTL 이내면 요청 없이 재사용
+    - 만료된 항목은 저장된 ETag/Last-Modified로 조건부 요청 (304면 details 재사용)
+    """
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.entries: Dict[str, dict] = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except ValueError:
+                print(f"  Warning: ignoring unreadable cache {self.path}", file=sys.stderr)
+        self.hits = 0
+        self.not_modified = 0
+        self.fetched = 0
+
+    def fresh(self, url: str) -> Optional[dict]:
+        entry = self.entries.get(url)
+        if entry and time.time() - entry.get("fetchedAt", 0) < self.ttl_seconds:
+            with self.lock:
+                self.hits += 1
+            return entry["details"]
+        return None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        entry = self.entries.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("lastModified"):
+            headers["If-Modified-Since"] = entry["lastModified"]
+        return headers
+
+    def revalidated(self, url: str) -> Optional[dict]:
+        """304 응답: 캐시 항목의 유효기간만 갱신"""
+        with self.lock:
+            entry = self.entries.get(url)
+            if not entry:
+                return None
+            entry["fetchedAt"] = time.time()
+            self.not_modified += 1
+            return entry["details"]
+
+    def put(self, url: str, details: dict, response) -> None:
+        with self.lock:
+            self.entries[url] = {
+                "details": details,
+                "fetchedAt": time.time(),
+                "etag": response.headers.get("ETag"),
+                "lastModified": response.headers.get("Last-Modified"),
+            }
+            self.fetched += 1
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
 
 
 def normalize_brand_code(brand_name: str) -> str:
-    """브랜드 이름을 코드로 변환"""
-    # 영문/숫자만 남기고 대문자로 변환
-    code = re.sub(r"[^A-Z0-9]", "", brand_name.upper())
-    # 숫자로 시작하는 경우 앞에 BRAND_ 추가
-    if code and code[0].isdigit():
-        code = f"BRAND_{code}"
-    return code if code else f"BRAND_{hash(brand_name) % 10000}"
+    """브랜드 이름을 코드로 변환 (영문/숫자 대문자, 없으면 keyed digest)"""
+    return name_based_brand_code(brand_name)
 
 
 def extract_brands_from_page(html: str) -> list[dict]:
@@ -71,12 +176,28 @@ def extract_brands_from_page(html: str) -> list[dict]:
     return brands
 
 
-def fetch_brand_details(brand_url: str) -> Optional[dict]:
-    """브랜드 상세 페이지에서 추가 정보 추출"""
+def fetch_brand_details(
+    brand_url: str,
+    cache: Optional[BrandDetailsCache] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> Optional[dict]:
+    """브랜드 상세 페이지에서 추가 정보 추출 (캐시가 있으면 TTL/조건부 요청으로 재사용)"""
+    if cache:
+        cached = cache.fresh(brand_url)
+        if cached is not None:
+            return cached
+
     try:
-        response = requests.get(brand_url, timeout=10, headers={
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-        })
+        headers = {"User-Agent": USER_AGENT}
+        if cache:
+            headers.update(cache.conditional_headers(brand_url))
+        if limiter:
+            limiter.acquire()
+        response = requests.get(brand_url, timeout=10, headers=headers)
+        if response.status_code == 304 and cache:
+            cached = cache.revalidated(brand_url)
+            if cached is not None:
+                return cached
         response.raise_for_status()
         soup = BeautifulSoup(response.text, "html.parser")
 
@@ -94,6 +215,8 @@ def fetch_brand_details(brand_url: str) -> Optional[dict]:
         if logo_elem:
             details["logoUrl"] = logo_elem.get("src") or logo_elem.get("content")
 
+        if cache:
+            cache.put(brand_url, details, response)
         return details
     except Exception as e:
         print(f"  Warning: Could not fetch details for {brand_url}: {e}", file=sys.stderr)
@@ -144,59 +267,147 @@ def create_brand_document(brand: dict, brand_code: str, details: Optional[dict]
     }
 
 
-def insert_brands_to_db(brands: list[dict], conn):
-    """브랜드 데이터를 데이터베이스에 삽입"""
-    cursor = conn.cursor()
-    inserted = 0
-    skipped = 0
-
-    for brand in brands:
-        brand_code = normalize_brand_code(brand["name"])
-
-        # 중복 확인
-        cursor.execute(
-            "SELECT brand_id FROM raw_brand_document WHERE brand_id = %s",
-            (brand_code,),
-        )
-        if cursor.fetchone():
-            skipped += 1
-            continue
+UPDATE_BRAND_DETAILS_SQL = """
+    UPDATE raw_brand_document AS b
+    SET document = b.document
+            || jsonb_build_object('logoUrl', v.logo_url, 'description', v.description)
+            || jsonb_build_object(
+                'meta',
+                COALESCE(b.document->'meta', '{}'::jsonb)
+                    || jsonb_build_object('updatedAt', v.updated_at, 'updatedBy', 'crawler')
+            ),
+        updated_at = NOW()
+    FROM (VALUES %s) AS v(brand_id, logo_url, description, updated_at)
+    WHERE b.brand_id = v.brand_id
+      AND (b.document->>'logoUrl' IS DISTINCT FROM v.logo_url
+           OR b.document->>'description' IS DISTINCT FROM v.description)
+    RETURNING b.brand_id
+"""
 
-        # 상세 정보 가져오기 (선택적)
-        details = None
-        if brand.get("url"):
-            details = fetch_brand_details(brand["url"])
-            time.sleep(0.5)  # Rate limiting
 
-        # 문서 생성
-        document = create_brand_document(brand, brand_code, details)
+def insert_brands_to_db(
+    brands: list[dict],
+    conn,
+    concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+    max_requests_per_second: float = DEFAULT_MAX_REQUESTS_PER_SECOND,
+    cache: Optional[BrandDetailsCache] = None,
+):
+    """
+    브랜드 데이터를 데이터베이스에 반영 → (inserted, updated, skipped)
+    - 신규 브랜드: 상세 조회 후 한 번에 INSERT
+    - 기존 브랜드: 캐시가 있을 때만 캐시/조건부 요청으로 상세 조회, logoUrl/description이 바뀐 문서만 UPDATE
+    """
+    cursor = conn.cursor()
 
-        # 삽입
-        cursor.execute(
+    # 같은 코드로 모이는 이름은 첫 번째만 사용
+    by_code: Dict[str, dict] = {}
+    for brand in brands:
+        by_code.setdefault(normalize_brand_code(brand["name"]), brand)
+
+    # 기존 브랜드 + 저장된 상세 값 (한 번의 조회)
+    cursor.execute(
+        """
+        SELECT brand_id, document->>'logoUrl', document->>'description'
+        FROM raw_brand_document
+        WHERE brand_id = ANY(%s)
+        """,
+        (list(by_code),),
+    )
+    existing = {brand_id: (logo_url, description) for brand_id, logo_url, description in cursor.fetchall()}
+    new_brands = {code: brand for code, brand in by_code.items() if code not in existing}
+    refresh_brands = {code: brand for code, brand in by_code.items() if code in existing} if cache else {}
+
+    # 상세 정보 가져오기 (선택적, 제한된 동시성)
+    details_by_code: Dict[str, Optional[dict]] = {}
+    limiter = RateLimiter(max_requests_per_second)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {
+            executor.submit(fetch_brand_details, brand["url"], cache, limiter): code
+            for code, brand in {**new_brands, **refresh_brands}.items()
+            if brand.get("url")
+        }
+        for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            details_by_code[futures[future]] = future.result()
+            if done % 25 == 0:
+                print(f"  Fetched details {done}/{len(futures)}...", file=sys.stderr)
+
+    # 신규 브랜드: 문서 생성 + 삽입
+    rows = [
+        (code, dumps_document(create_brand_document(brand, code, details_by_code.get(code))))
+        for code, brand in new_brands.items()
+    ]
+    inserted = 0
+    if rows:
+        inserted = len(execute_values(
+            cursor,
             """
             INSERT INTO raw_brand_document (brand_id, document)
-            VALUES (%s, %s::jsonb)
+            VALUES %s
             ON CONFLICT (brand_id) DO NOTHING
+            RETURNING brand_id
             """,
-            (brand_code, json.dumps(document)),
-        )
-        inserted += 1
+            rows,
+            template="(%s, %s::jsonb)",
+            fetch=True,
+        ))
 
-        if inserted % 10 == 0:
-            print(f"  Inserted {inserted} brands...", file=sys.stderr)
-            conn.commit()
+    # 기존 브랜드: 상세 값이 바뀐 문서만 갱신 (조회 실패(None)는 건드리지 않음)
+    now = datetime.utcnow().isoformat() + "Z"
+    changes = []
+    for code in refresh_brands:
+        details = details_by_code.get(code)
+        if details is None:
+            continue
+        values = (details.get("logoUrl"), details.get("description"))
+        if values != existing[code]:
+            changes.append((code, *values, now))
+    updated = 0
+    if changes:
+        updated = len(execute_values(
+            cursor,
+            UPDATE_BRAND_DETAILS_SQL,
+            changes,
+            template="(%s, %s::text, %s::text, %s::text)",
+            fetch=True,
+        ))
 
     conn.commit()
     cursor.close()
-    return inserted, skipped
+    return inserted, updated, len(brands) - inserted - updated
 
 
 def main():
+    parser = argparse.ArgumentParser(description="MECCA 브랜드 크롤링")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_FETCH_CONCURRENCY,
+        help="브랜드 상세 페이지 동시 요청 수",
+    )
+    parser.add_argument(
+        "--max-requests-per-second",
+        type=float,
+        default=DEFAULT_MAX_REQUESTS_PER_SECOND,
+        help="상세 페이지 요청 상한 (전체 합계, 0이면 제한 없음)",
+    )
+    parser.add_argument(
+        "--details-cache",
+        type=str,
+        default=DEFAULT_DETAILS_CACHE_PATH,
+        help="브랜드 상세 정보 캐시 파일 경로",
+    )
+    parser.add_argument(
+        "--details-ttl-hours",
+        type=float,
+        default=DEFAULT_DETAILS_TTL_HOURS,
+        help="캐시를 요청 없이 재사용할 시간 (0이면 매번 조건부 요청)",
+    )
+    parser.add_argument("--no-details-cache", action="store_true", help="상세 정보 캐시를 사용하지 않음")
+    args = parser.parse_args()
+
     print("Fetching MECCA brands page...", file=sys.stderr)
     try:
-        response = requests.get(BASE_URL, timeout=30, headers={
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-        })
+        response = requests.get(BASE_URL, timeout=30, headers={"User-Agent": USER_AGENT})
         response.raise_for_status()
     except Exception as e:
         print(f"Error fetching page: {e}", file=sys.stderr)
@@ -447,11 +658,28 @@ def main():
         print(f"Error connecting to database: {e}", file=sys.stderr)
         return 1
 
+    cache = None
+    if not args.no_details_cache:
+        cache = BrandDetailsCache(args.details_cache, args.details_ttl_hours * 3600)
+
     print("Inserting brands...", file=sys.stderr)
     try:
-        inserted, skipped = insert_brands_to_db(brands, conn)
-        print(f"Done! Inserted: {inserted}, Skipped: {skipped}", file=sys.stderr)
+        inserted, updated, skipped = insert_brands_to_db(
+            brands,
+            conn,
+            concurrency=args.concurrency,
+            max_requests_per_second=args.max_requests_per_second,
+            cache=cache,
+        )
+        print(f"Done! Inserted: {inserted}, Updated: {updated}, Skipped: {skipped}", file=sys.stderr)
     finally:
+        # DB 단계에서 실패해도 이미 받은 상세 정보/ETag는 다음 실행에서 재사용
+        if cache:
+            cache.save()
+            print(
+                f"Details cache: {cache.hits} fresh, {cache.not_modified} not modified, {cache.fetched} fetched",
+                file=sys.stderr,
+            )
         conn.close()
 
     return 0
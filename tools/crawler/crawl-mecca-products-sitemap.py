@@ -16,8 +16,6 @@ MECCA sitemap 기반 제품 크롤링 (requests + JSON-LD)
 """
 
 import argparse
-import importlib.util
-import json
 import sys
 import time
 import xml.etree.ElementTree as ET
@@ -26,28 +24,25 @@ from pathlib import Path
 from typing import Iterable, List, Optional, Set, Tuple
 from urllib.parse import urlparse
 
-import psycopg2
 import requests
 
 # rawdata_db 유틸 import
 sys.path.append(str(Path(__file__).resolve().parent))
-from rawdata_db import connect_pg, ensure_raw_tables, init_rawdata_database_and_schema
+# Playwright 크롤러 파일 대신 순수 헬퍼 모듈만 import (playwright/bs4 로드 없음)
+import mecca_products as mecca
+from brand_registry import BrandRegistry
+from rawdata_db import (
+    connect_pg,
+    dumps_document,
+    ensure_raw_tables,
+    init_rawdata_database_and_schema,
+    is_synthetic_product_id,
+)
 
 DEFAULT_SITEMAP_INDEX_URL = "https://www.mecca.com/en-au/sitemap.xml"
 DEFAULT_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
 
 
-def load_mecca_module():
-    # 현재 스크립트 위치 기준으로 playwright 모듈 로드
-    current_dir = Path(__file__).resolve().parent
-    path = current_dir / "crawl-mecca-products-playwright.py"
-    spec = importlib.util.spec_from_file_location("mecca_crawler", str(path))
-    module = importlib.util.module_from_spec(spec)
-    assert spec and spec.loader
-    spec.loader.exec_module(module)
-    return module
-
-
 def fetch_text(url: str, timeout_seconds: int = 30) -> str:
     response = requests.get(url, timeout=timeout_seconds, headers={"User-Agent": DEFAULT_USER_AGENT})
     response.raise_for_status()
@@ -124,41 +119,21 @@ def upsert_category(conn, mecca, category: str) -> None:
         VALUES (%s, %s::jsonb)
         ON CONFLICT (category_id) DO UPDATE SET document = EXCLUDED.document
         """,
-        (cat_doc["categoryId"], json.dumps(cat_doc)),
-    )
-    conn.commit()
-
-
-def maybe_upsert_brand(conn, mecca, brand_name: str, saved_brands: Set[str]) -> None:
-    if not brand_name or brand_name == "Unknown":
-        return
-    if brand_name in saved_brands:
-        return
-    cursor = conn.cursor()
-    brand_doc = mecca.create_brand_document(brand_name)
-    cursor.execute(
-        """
-        INSERT INTO raw_brand_document (brand_id, document)
-        VALUES (%s, %s::jsonb)
-        ON CONFLICT (brand_id) DO UPDATE SET document = EXCLUDED.document
-        """,
-        (brand_doc["brandId"], json.dumps(brand_doc)),
+        (cat_doc["categoryId"], dumps_document(cat_doc)),
     )
     conn.commit()
-    saved_brands.add(brand_name)
 
 
-def insert_product(conn, mecca, product_data: dict, category: str) -> Tuple[bool, str]:
-    doc = mecca.create_product_document(product_data, category)
-    product_id = doc["masterInfo"]["gdsCd"]
+def insert_product(conn, mecca, product_data: dict, category: str, timestamps: dict) -> Tuple[bool, str]:
+    product_id, doc_json = mecca.encode_product_document(product_data, category, timestamps)
     cursor = conn.cursor()
     cursor.execute(
         """
-        INSERT INTO raw_product_document (product_id, document)
-        VALUES (%s, %s::jsonb)
+        INSERT INTO raw_product_document (product_id, document, is_synthetic)
+        VALUES (%s, %s::jsonb, %s)
         ON CONFLICT (product_id) DO NOTHING
         """,
-        (product_id, json.dumps(doc)),
+        (product_id, doc_json, is_synthetic_product_id(product_id)),
     )
     inserted = cursor.rowcount == 1
     if inserted:
@@ -196,13 +171,12 @@ def main() -> int:
     if args.shard_index < 0 or args.shard_index >= args.shard_count:
         raise SystemExit("--shard-index must be in [0, shard-count)")
 
-    mecca = load_mecca_module()
-
     init_rawdata_database_and_schema()
     conn = connect_pg()
     ensure_tables(conn)
     existing = load_existing_product_ids(conn)
-    saved_brands: Set[str] = set()
+    # 브랜드는 DB에 저장된 내용 해시와 비교해 새/변경분만 배치 upsert (실행/샤드 간 중복 쓰기 방지)
+    brands = BrandRegistry(conn).load()
     upsert_category(conn, mecca, args.default_category)
 
     inserted = 0
@@ -211,48 +185,59 @@ def main() -> int:
     sitemaps = iter_candidate_sitemaps(args.sitemap_index_url)[: args.max_sitemaps]
     print(f"Found {len(sitemaps)} sitemaps to scan (max={args.max_sitemaps})", file=sys.stderr)
 
-    for sitemap_url in sitemaps:
-        if inserted >= args.limit:
-            break
-
-        try:
-            xml = fetch_text(sitemap_url, timeout_seconds=60)
-        except Exception as e:
-            print(f"Failed to fetch sitemap: {sitemap_url} ({e})", file=sys.stderr)
-            continue
-
-        for loc in iter_urlset_locs(xml):
+    try:
+        for sitemap_url in sitemaps:
             if inserted >= args.limit:
                 break
-            if not is_mecca_product_url(loc):
-                continue
-            if not shard_filter(loc, args.shard_count, args.shard_index):
-                continue
 
-            scanned_urls += 1
-            code = mecca.extract_product_code_from_url(loc)
-            if code and code in existing:
+            try:
+                xml = fetch_text(sitemap_url, timeout_seconds=60)
+            except Exception as e:
+                print(f"Failed to fetch sitemap: {sitemap_url} ({e})", file=sys.stderr)
                 continue
 
-            product_data = mecca.fetch_product_details_from_jsonld(loc)
-            if not product_data:
-                continue
-
-            brand_name = product_data.get("brand") or "Unknown"
-            maybe_upsert_brand(conn, mecca, brand_name, saved_brands)
-
-            ok, product_id = insert_product(conn, mecca, product_data, args.default_category)
-            if ok:
-                inserted += 1
-                existing.add(product_id)
-                if inserted % 25 == 0:
-                    print(f"Inserted {inserted}/{args.limit} (scanned={scanned_urls})", file=sys.stderr)
-
-            if args.sleep_ms > 0:
-                time.sleep(args.sleep_ms / 1000.0)
-
-    conn.close()
-    print(f"Done. inserted={inserted} scanned={scanned_urls} shard={args.shard_index}/{args.shard_count}", file=sys.stderr)
+            # 문서 시각 필드는 sitemap(배치)마다 한 번만 계산
+            timestamps = mecca.document_timestamps()
+            for loc in iter_urlset_locs(xml):
+                if inserted >= args.limit:
+                    break
+                if not is_mecca_product_url(loc):
+                    continue
+                if not shard_filter(loc, args.shard_count, args.shard_index):
+                    continue
+
+                scanned_urls += 1
+                code = mecca.extract_product_code_from_url(loc)
+                if code and code in existing:
+                    continue
+
+                product_data = mecca.fetch_product_details_from_jsonld(loc)
+                if not product_data:
+                    continue
+
+                brand_name = product_data.get("brand") or "Unknown"
+                brands.add(brand_name, mecca.create_brand_document)
+
+                ok, product_id = insert_product(conn, mecca, product_data, args.default_category, timestamps)
+                if ok:
+                    inserted += 1
+                    existing.add(product_id)
+                    if inserted % 25 == 0:
+                        print(f"Inserted {inserted}/{args.limit} (scanned={scanned_urls})", file=sys.stderr)
+
+                if args.sleep_ms > 0:
+                    time.sleep(args.sleep_ms / 1000.0)
+    finally:
+        # 중간에 실패/중단돼도 모아 둔 브랜드는 저장 (제품은 insert_product에서 건별 commit)
+        conn.rollback()
+        brands.flush()
+        conn.close()
+
+    print(
+        f"Done. inserted={inserted} scanned={scanned_urls} shard={args.shard_index}/{args.shard_count} "
+        f"brands_written={brands.written} brands_unchanged={brands.unchanged}",
+        file=sys.stderr,
+    )
     return 0
 
 
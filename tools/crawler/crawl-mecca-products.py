@@ -9,13 +9,13 @@ MECCA 제품 크롤링 스크립트
 """
 
 import argparse
-import json
 import re
 import sys
 import time
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from urllib.parse import urljoin, urlparse
 
 import psycopg2
@@ -24,16 +24,176 @@ from bs4 import BeautifulSoup
 
 # rawdata_db 유틸 import
 sys.path.append(str(Path(__file__).resolve().parent))
-from rawdata_db import connect_pg, ensure_raw_tables, init_rawdata_database_and_schema
+from document_template import DocumentTemplate, Slot, benchmark_template
+from product_ids import IdCollisionDetector, name_based_product_code
+from rawdata_db import connect_pg, ensure_raw_tables, init_rawdata_database_and_schema, is_synthetic_product_id
 
 BASE_URL = "https://www.mecca.com/en-au"
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
 
 
 def normalize_product_code(product_name: str, brand_name: str) -> str:
-    """제품 이름과 브랜드로부터 제품 코드 생성"""
-    code = re.sub(r"[^A-Z0-9]", "", (brand_name + product_name).upper())
-    return code[:50] if code else f"PRDT_{hash(product_name) % 100000}"
+    """제품 이름과 브랜드로부터 제품 코드 생성 (fallback은 keyed digest → 실행/샤드와 무관하게 동일)"""
+    return name_based_product_code(product_name, brand_name)
+
+
+# 리스팅 링크 분류 규칙 (모듈 로드 시 한 번만 구성 → 앵커마다 리스트/정규식을 다시 만들지 않음)
+# 카테고리/네비게이션 페이지: 경로의 첫 번째나 두 번째 파트가 여기에 있으면 제외
+LISTING_EXCLUDE_SEGMENTS = frozenset({
+    "new", "brands", "categories", "makeup", "skincare",
+    "fragrance", "haircare", "body", "wellness", "men",
+    "gifts", "shop", "view", "learn", "find", "book",
+    "stores", "services", "help", "account", "wishlist",
+    "services-events", "mecca-memo", "bag", "filter",
+    "sort", "page", "search", "travel-sized", "mini",
+})
+# 일반적인 카테고리 단어: 제품 파트에 포함되거나 세 번째 파트와 같으면 제외
+LISTING_CATEGORY_WORDS = frozenset({
+    "travel", "mini", "concern", "type", "ingredient",
+    "wash", "washes", "soap", "sanitizer", "scrubs",
+    "exfoliators", "perfumes", "cologne", "extrait",
+})
+CATEGORY_WORD_PATTERN = re.compile("|".join(sorted(LISTING_CATEGORY_WORDS, key=len, reverse=True)))
+SKIP_HREF_PREFIXES = ("#", "javascript:")
+INVALID_PRODUCT_NAMES = frozenset({"new", "view all", "shop now", "learn more", "view products", "add to"})
+
+# 제품 카드 = 링크에서 가장 가까운 article/div/li/section
+CARD_TAGS = ["article", "div", "li", "section"]
+_PRODUCT_TITLE_CLASS = re.compile(r"product.*name|product.*title", re.I)
+_TITLE_CLASS = re.compile(r"product.*name|title", re.I)
+# 제품명 선택자 (앞쪽이 우선)
+NAME_SELECTORS = (
+    ("h2", _PRODUCT_TITLE_CLASS),
+    ("h3", _PRODUCT_TITLE_CLASS),
+    ("span", _TITLE_CLASS),
+    ("div", _TITLE_CLASS),
+)
+BRAND_TAGS = frozenset({"span", "div", "a"})
+BRAND_CLASS_PATTERN = re.compile(r"brand", re.I)
+_CARD_FIELD_TAGS = sorted({tag for tag, _ in NAME_SELECTORS} | BRAND_TAGS)
+
+DEFAULT_LINK_BENCHMARK_ITERATIONS = 20
+
+
+def classify_product_url(full_url: str) -> Optional[Tuple[str, str]]:
+    """제품 상세 URL이면 (브랜드 파트, 제품 파트), 카테고리/네비게이션 등이면 None"""
+    # MECCA 도메인이 아니면 제외
+    if "mecca.com" not in full_url:
+        return None
+
+    # 제품 상세 페이지 패턴: /en-au/brand-name/product-name/ 또는 /en-au/makeup/brand/product/
+    path_parts = [p for p in urlparse(full_url).path.split("/") if p]
+
+    # 최소 3개 파트 필요 (en-au, brand, product)
+    if len(path_parts) < 3:
+        return None
+    if path_parts[0] == "en-au":
+        path_parts = path_parts[1:]
+
+    brand_part, product_part = path_parts[0], path_parts[1]
+    if brand_part in LISTING_EXCLUDE_SEGMENTS or product_part in LISTING_EXCLUDE_SEGMENTS:
+        return None
+
+    # 브랜드명이나 제품명이 너무 짧으면 제외 (하이픈 없는 단일 단어 제품명은 10자 이상)
+    if len(brand_part) < 3 or len(product_part) < 5:
+        return None
+    if "-" not in product_part and len(product_part) < 10:
+        return None
+
+    if CATEGORY_WORD_PATTERN.search(product_part.lower()):
+        return None
+    # 세 번째 파트가 일반적인 카테고리 단어면 카테고리 페이지
+    if len(path_parts) > 2 and path_parts[2] in LISTING_CATEGORY_WORDS:
+        return None
+    return brand_part, product_part
+
+
+def card_name_and_brand(card) -> Tuple[Optional[str], Optional[str]]:
+    """카드 하위 요소를 한 번만 순회해 (제품명, 브랜드명) 추출 - 선택자 우선순위는 NAME_SELECTORS 순"""
+    name_matches: List = [None] * len(NAME_SELECTORS)
+    brand_elem = None
+    for elem in card.find_all(_CARD_FIELD_TAGS):
+        classes = elem.get("class")
+        if not classes:
+            continue
+        class_text = classes if isinstance(classes, str) else " ".join(classes)
+        for idx, (tag, pattern) in enumerate(NAME_SELECTORS):
+            if name_matches[idx] is None and elem.name == tag and pattern.search(class_text):
+                name_matches[idx] = elem
+        if brand_elem is None and elem.name in BRAND_TAGS and BRAND_CLASS_PATTERN.search(class_text):
+            brand_elem = elem
+        if brand_elem is not None and name_matches[0] is not None:
+            break
+
+    name_elem = next((elem for elem in name_matches if elem is not None), None)
+    return (
+        name_elem.get_text(strip=True) if name_elem else None,
+        brand_elem.get_text(strip=True) if brand_elem else None,
+    )
+
+
+def extract_links_from_soup(soup) -> List[Dict]:
+    """
+    리스팅 페이지 하나에서 제품 링크 추출
+    - URL 분류(문자열 연산)를 먼저 해서 대부분의 앵커는 DOM 탐색 없이 걸러낸다
+    - 카드별 제품명/브랜드는 카드당 한 번만 계산 (이미지/이름/버튼 링크가 같은 카드를 공유)
+    """
+    products = []
+    seen_urls = set()
+    card_fields: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+
+    for link in soup.find_all("a", href=True):
+        href = link.get("href", "")
+        if not href or href.startswith(SKIP_HREF_PREFIXES):
+            continue
+
+        # 절대 URL로 변환
+        full_url = urljoin(BASE_URL, href)
+        if full_url in seen_urls:
+            continue
+
+        classified = classify_product_url(full_url)
+        if classified is None:
+            continue
+        _, product_part = classified
+
+        # 링크의 부모 카드에서 정보 찾기
+        card = link.find_parent(CARD_TAGS) or link
+        fields = card_fields.get(id(card))
+        if fields is None:
+            fields = card_fields[id(card)] = card_name_and_brand(card)
+        product_name, brand_name = fields
+
+        # 링크 텍스트에서 추출 (최후의 수단)
+        if not product_name:
+            link_text = link.get_text(strip=True)
+            if link_text and len(link_text) > 5 and len(link_text) < 100:
+                # 여러 줄인 경우 첫 번째는 브랜드, 두 번째는 제품명
+                lines = [l.strip() for l in link_text.split("\n") if l.strip()]
+                if len(lines) >= 2:
+                    brand_name = lines[0]
+                    product_name = lines[1]
+                else:
+                    product_name = link_text
+
+        # URL에서 제품명 추출 (최후의 수단)
+        if not product_name:
+            product_name = product_part.replace("-", " ").title()
+
+        # 유효성 검사
+        if not product_name or len(product_name) < 5:
+            continue
+        if product_name.lower() in INVALID_PRODUCT_NAMES:
+            continue
+
+        seen_urls.add(full_url)
+        products.append({
+            "name": product_name,
+            "brand": brand_name or "",
+            "url": full_url,
+        })
+
+    return products
 
 
 def extract_product_links(listing_url: str, max_pages: int = 5) -> List[Dict]:
@@ -55,143 +215,10 @@ def extract_product_links(listing_url: str, max_pages: int = 5) -> List[Dict]:
             response.raise_for_status()
             soup = BeautifulSoup(response.text, "html.parser")
             
-            # 제품 링크 찾기 (더 구체적인 패턴)
-            # MECCA 제품 URL 패턴: /brand-name/product-name/product-code
-            all_links = soup.find_all("a", href=True)
-            found_count = 0
-            seen_urls = set()
+            page_products = extract_links_from_soup(soup)
+            products.extend(page_products)
             
-            for link in all_links:
-                href = link.get("href", "")
-                if not href or href.startswith("#") or href.startswith("javascript:"):
-                    continue
-                
-                # 절대 URL로 변환
-                full_url = urljoin(BASE_URL, href)
-                if full_url in seen_urls:
-                    continue
-                
-                # MECCA 도메인이 아니면 제외
-                if "mecca.com" not in full_url:
-                    continue
-                
-                # 제품 상세 페이지 패턴 확인: /en-au/brand-name/product-name/ 또는 /en-au/makeup/brand/product/
-                url_path = urlparse(full_url).path
-                path_parts = [p for p in url_path.strip("/").split("/") if p]
-                
-                # 최소 3개 파트 필요 (en-au, brand, product)
-                if len(path_parts) < 3:
-                    continue
-                
-                # en-au 제거
-                if path_parts and path_parts[0] == "en-au":
-                    path_parts = path_parts[1:]
-                
-                # 최소 2개 파트 필요 (brand, product)
-                if len(path_parts) < 2:
-                    continue
-                
-                # 카테고리/네비게이션 페이지 제외
-                exclude_segments = [
-                    "new", "brands", "categories", "makeup", "skincare", 
-                    "fragrance", "haircare", "body", "wellness", "men", 
-                    "gifts", "shop", "view", "learn", "find", "book",
-                    "stores", "services", "help", "account", "wishlist",
-                    "services-events", "mecca-memo", "bag", "filter",
-                    "sort", "page", "search", "travel-sized", "mini"
-                ]
-                # 첫 번째나 두 번째 파트가 exclude_segments에 있으면 제외
-                if any(seg in path_parts[:2] for seg in exclude_segments):
-                    continue
-                
-                # 제품 페이지는 보통 브랜드명-제품명 형태
-                # 예: /mecca-max/off-duty-blush-stick/
-                brand_part = path_parts[0]
-                product_part = path_parts[1] if len(path_parts) > 1 else ""
-                
-                # 브랜드명이나 제품명이 너무 짧으면 제외
-                if len(brand_part) < 3 or len(product_part) < 5:
-                    continue
-                
-                # 제품명이 하이픈으로 구분된 여러 단어여야 함 (일반적으로)
-                # 단, 단일 단어 제품명도 있을 수 있으므로 너무 엄격하지 않게
-                if len(product_part.split("-")) == 1 and len(product_part) < 10:
-                    # 단일 단어인 경우 더 긴 길이 요구
-                    if len(product_part) < 12:
-                        continue
-                
-                # 일반적인 카테고리 단어 제외
-                category_words = ["travel", "mini", "concern", "type", "ingredient", 
-                                 "wash", "washes", "soap", "sanitizer", "scrubs", 
-                                 "exfoliators", "perfumes", "cologne", "extrait"]
-                if any(word in product_part.lower() for word in category_words):
-                    continue
-                
-                # URL이 카테고리 페이지처럼 보이면 제외 (3개 이상 파트는 보통 카테고리)
-                if len(path_parts) > 2:
-                    # 세 번째 파트가 일반적인 카테고리 단어면 제외
-                    if path_parts[2] in category_words:
-                        continue
-                
-                # 제품명과 브랜드명 추출
-                product_name = None
-                brand_name = None
-                
-                # 링크의 부모 요소에서 정보 찾기
-                parent = link.find_parent(["article", "div", "li", "section"])
-                if not parent:
-                    parent = link
-                
-                # 제품명 찾기
-                name_selectors = [
-                    ("h2", re.compile(r"product.*name|product.*title", re.I)),
-                    ("h3", re.compile(r"product.*name|product.*title", re.I)),
-                    ("span", re.compile(r"product.*name|title", re.I)),
-                    ("div", re.compile(r"product.*name|title", re.I)),
-                ]
-                
-                for tag, pattern in name_selectors:
-                    name_elem = parent.find(tag, class_=pattern)
-                    if name_elem:
-                        product_name = name_elem.get_text(strip=True)
-                        break
-                
-                # 브랜드명 찾기
-                brand_elem = parent.find(["span", "div", "a"], class_=re.compile(r"brand", re.I))
-                if brand_elem:
-                    brand_name = brand_elem.get_text(strip=True)
-                
-                # 링크 텍스트에서 추출 (최후의 수단)
-                if not product_name:
-                    link_text = link.get_text(strip=True)
-                    if link_text and len(link_text) > 5 and len(link_text) < 100:
-                        # 여러 줄인 경우 첫 번째는 브랜드, 두 번째는 제품명
-                        lines = [l.strip() for l in link_text.split("\n") if l.strip()]
-                        if len(lines) >= 2:
-                            brand_name = lines[0]
-                            product_name = lines[1]
-                        else:
-                            product_name = link_text
-                
-                # URL에서 제품명 추출 (최후의 수단)
-                if not product_name:
-                    product_name = product_part.replace("-", " ").title()
-                
-                # 유효성 검사
-                if not product_name or len(product_name) < 5:
-                    continue
-                if product_name.lower() in ["new", "view all", "shop now", "learn more", "view products", "add to"]:
-                    continue
-                
-                seen_urls.add(full_url)
-                products.append({
-                    "name": product_name,
-                    "brand": brand_name or "",
-                    "url": full_url,
-                })
-                found_count += 1
-            
-            if found_count == 0:
+            if not page_products:
                 break
                 
             page += 1
@@ -204,6 +231,23 @@ def extract_product_links(listing_url: str, max_pages: int = 5) -> List[Dict]:
     return products
 
 
+def benchmark_link_classifier(html_path: str, iterations: int = DEFAULT_LINK_BENCHMARK_ITERATIONS) -> None:
+    """저장해 둔 리스팅 HTML로 앵커 분류 처리량(anchors/sec) 측정 (HTML 파싱 시간 제외)"""
+    soup = BeautifulSoup(Path(html_path).read_text(encoding="utf-8"), "html.parser")
+    anchors = len(soup.find_all("a", href=True))
+    products = extract_links_from_soup(soup)
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        extract_links_from_soup(soup)
+    elapsed = time.perf_counter() - started
+
+    rate = anchors * iterations / elapsed if elapsed > 0 else float("inf")
+    print(f"Link classifier benchmark ({anchors} anchors × {iterations})", file=sys.stderr)
+    print(f"  products found: {len(products)}", file=sys.stderr)
+    print(f"  {rate:>10,.0f} anchors/sec", file=sys.stderr)
+
+
 def extract_product_details(product_url: str) -> Optional[Dict]:
     """제품 상세 페이지에서 정보 추출"""
     try:
@@ -269,208 +313,270 @@ def extract_product_details(product_url: str) -> Optional[Dict]:
         return None
 
 
-def create_product_document(
-    product: Dict,
-    category: str,
-    listing_info: Optional[Dict] = None
-) -> Dict:
-    """제품 문서 생성 (스키마 준수)"""
-    now = datetime.utcnow().isoformat() + "Z"
-    product_code = normalize_product_code(product.get("name", ""), product.get("brand", ""))
-    
-    # 카테고리 매핑
-    category_map = {
-        "makeup": {"large": "화장품", "medium": "메이크업", "small": "기타"},
-        "skincare": {"large": "화장품", "medium": "스킨케어", "small": "기타"},
-        "fragrance": {"large": "향수", "medium": "향수", "small": "기타"},
-        "haircare": {"large": "헤어케어", "medium": "헤어케어", "small": "기타"},
-        "body": {"large": "바디케어", "medium": "바디케어", "small": "기타"},
-    }
-    cat_info = category_map.get(category, {"large": "기타", "medium": "기타", "small": "기타"})
-    
-    brand_name = product.get("brand", "Unknown")
-    product_name = product.get("name", "Unknown Product")
-    
-    return {
-        "_meta": {
-            "schemaVersion": 1,
-            "savedAt": now,
-            "clientInfo": {
-                "userAgent": USER_AGENT,
-                "appVersion": "1.0.0",
-            },
+# 카테고리 매핑
+CATEGORY_MAP = {
+    "makeup": {"large": "화장품", "medium": "메이크업", "small": "기타"},
+    "skincare": {"large": "화장품", "medium": "스킨케어", "small": "기타"},
+    "fragrance": {"large": "향수", "medium": "향수", "small": "기타"},
+    "haircare": {"large": "헤어케어", "medium": "헤어케어", "small": "기타"},
+    "body": {"large": "바디케어", "medium": "바디케어", "small": "기타"},
+}
+DEFAULT_CATEGORY_INFO = {"large": "기타", "medium": "기타", "small": "기타"}
+ENGLISH_NAME_PATTERN = re.compile(r"^[A-Za-z0-9\s&.'-]+$")
+
+# 제품 문서 스켈레톤 (스키마 준수) - 제품별 값은 Slot, 나머지는 템플릿 생성 시 1회 인코딩
+PRODUCT_DOCUMENT_TEMPLATE = DocumentTemplate({
+    "_meta": {
+        "schemaVersion": 1,
+        "savedAt": Slot("now"),
+        "clientInfo": {
+            "userAgent": USER_AGENT,
+            "appVersion": "1.0.0",
         },
-        "_audit": {
-            "createdBy": "crawler",
-            "createdAt": now,
-            "updatedBy": "crawler",
-            "updatedAt": now,
+    },
+    "_audit": {
+        "createdBy": "crawler",
+        "createdAt": Slot("now"),
+        "updatedBy": "crawler",
+        "updatedAt": Slot("now"),
+    },
+    "masterInfo": {
+        "gtin": Slot("gtin"),
+        "manufacturerGtin": None,
+        "gdsCd": Slot("product_code"),
+        "gaCode": None,
+        "gdsNm": Slot("product_name"),
+        "gdsEngNm": Slot("product_name_en"),
+        "standardCategory": Slot("standard_category"),
+        "packaging": None,
+        "productDimensions": None,
+        "caseDimensions": None,
+        "boxDimensions": None,
+        "manufacturingCountry": {"code": "AU", "name": "호주"},
+        "manufacturer": Slot("brand_name"),
+        "supplier": {"code": "MECCA", "name": "MECCA"},
+        "supplierType": "RETAILER",
+        "supplierIsImporter": True,
+        "md": {"empNo": "MECCA001", "name": "MECCA MD"},
+        "scm": {"empNo": "MECCA002", "name": "MECCA SCM"},
+        "brand": {
+            "code": Slot("brand_code"),
+            "krName": Slot("brand_name"),
+            "enName": Slot("brand_name"),
         },
-        "masterInfo": {
-            "gtin": f"MECCA{product_code[:10]}",
-            "manufacturerGtin": None,
-            "gdsCd": product_code,
-            "gaCode": None,
-            "gdsNm": product_name,
-            "gdsEngNm": product_name if re.match(r"^[A-Za-z0-9\s&.'-]+$", product_name) else None,
-            "standardCategory": {
-                "large": {"code": cat_info["large"][:2].upper(), "name": cat_info["large"]},
-                "medium": {"code": cat_info["medium"][:2].upper(), "name": cat_info["medium"]},
-                "small": {"code": cat_info["small"][:2].upper(), "name": cat_info["small"]},
-            },
-            "packaging": None,
-            "productDimensions": None,
-            "caseDimensions": None,
-            "boxDimensions": None,
-            "manufacturingCountry": {"code": "AU", "name": "호주"},
-            "manufacturer": brand_name,
-            "supplier": {"code": "MECCA", "name": "MECCA"},
-            "supplierType": "RETAILER",
-            "supplierIsImporter": True,
-            "md": {"empNo": "MECCA001", "name": "MECCA MD"},
-            "scm": {"empNo": "MECCA002", "name": "MECCA SCM"},
-            "brand": {
-                "code": normalize_product_code(brand_name, ""),
-                "krName": brand_name,
-                "enName": brand_name,
-            },
-            "flags": {
-                "dermoYn": False,
-                "premBrndYn": False,
-                "ebGdsYn": True,
-                "onlineExclGdsYn": False,
-                "harmgdsYn": False,
-                "selBanYn": False,
-                "medapYn": False,
-                "infnSelImpsYn": False,
-                "poutTlmtDdNumYn": False,
-                "medicalDeviceYn": False,
-            },
-            "onyoneSpNm": None,
-            "buyTypNm": "일반구매",
-            "gdsStatNm": "정상",
-            "manBabySpNm": None,
-            "gdsRegYmd": datetime.now().strftime("%Y-%m-%d"),
-            "validPrdDdNum": None,
-            "poutTlmtDdNum": None,
-            "infnSelImpsYnValue": None,
-            "salesEndPlannedDate": None,
-            "salesEndDate": None,
-            "salesEndReason": None,
-            "foodStorageMethod": None,
-            "healthSupplementAvailableDays": None,
-            "derivingProductYn": False,
-            "derivingProduct": None,
-            "clearanceYn": False,
-            "clearanceBaseDays": None,
-            "clearanceDisposalType": None,
-            "disposalAllowed": True,
-            "returnAllowed": True,
-            "shelfLifeManageYn": False,
-            "shelfLifeAvailableDays": None,
-            "shelfLifeInboundAvailableDays": None,
-            "shelfLifeOutboundAvailableDays": None,
+        "flags": {
+            "dermoYn": False,
+            "premBrndYn": False,
+            "ebGdsYn": True,
+            "onlineExclGdsYn": False,
+            "harmgdsYn": False,
+            "selBanYn": False,
+            "medapYn": False,
+            "infnSelImpsYn": False,
+            "poutTlmtDdNumYn": False,
+            "medicalDeviceYn": False,
         },
-        "onlineInfo": {
-            "prdtNo": product_code,
-            "agoodsNo": None,
-            "aGoodsNm": None,
-            "prdtName": product_name,
-            "onlinePrdtName": product_name,
-            "prdtSbttlName": None,
-            "prdtStatCode": "01",
-            "prdtStatCodeName": "판매중",
-            "sellStatCode": "01",
-            "sellStatCodeName": "판매중",
-            "displayYn": "Y",
-            "saleEndText": None,
-            "prdtGbnCode": "01",
-            "prdtGbnCodeName": "일반상품",
-            "onlineMd": {"empNo": "MECCA003", "name": "MECCA Online MD"},
-            "onlineBrand": {
-                "code": normalize_product_code(brand_name, ""),
-                "name": brand_name,
-                "useYn": True,
-            },
-            "orderQuantity": {
-                "min": 1,
-                "max": 10,
-                "increaseUnit": 1,
-            },
-            "orderLimits": {
-                "brandMin": None,
-                "brandMax": None,
-                "classMin": None,
-                "classMax": None,
-            },
-            "appExcluPrdtYn": False,
+        "onyoneSpNm": None,
+        "buyTypNm": "일반구매",
+        "gdsStatNm": "정상",
+        "manBabySpNm": None,
+        "gdsRegYmd": Slot("reg_ymd"),
+        "validPrdDdNum": None,
+        "poutTlmtDdNum": None,
+        "infnSelImpsYnValue": None,
+        "salesEndPlannedDate": None,
+        "salesEndDate": None,
+        "salesEndReason": None,
+        "foodStorageMethod": None,
+        "healthSupplementAvailableDays": None,
+        "derivingProductYn": False,
+        "derivingProduct": None,
+        "clearanceYn": False,
+        "clearanceBaseDays": None,
+        "clearanceDisposalType": None,
+        "disposalAllowed": True,
+        "returnAllowed": True,
+        "shelfLifeManageYn": False,
+        "shelfLifeAvailableDays": None,
+        "shelfLifeInboundAvailableDays": None,
+        "shelfLifeOutboundAvailableDays": None,
+    },
+    "onlineInfo": {
+        "prdtNo": Slot("product_code"),
+        "agoodsNo": None,
+        "aGoodsNm": None,
+        "prdtName": Slot("product_name"),
+        "onlinePrdtName": Slot("product_name"),
+        "prdtSbttlName": None,
+        "prdtStatCode": "01",
+        "prdtStatCodeName": "판매중",
+        "sellStatCode": "01",
+        "sellStatCodeName": "판매중",
+        "displayYn": "Y",
+        "saleEndText": None,
+        "prdtGbnCode": "01",
+        "prdtGbnCodeName": "일반상품",
+        "onlineMd": {"empNo": "MECCA003", "name": "MECCA Online MD"},
+        "onlineBrand": {
+            "code": Slot("brand_code"),
+            "name": Slot("brand_name"),
+            "useYn": True,
         },
-        "languageDisplayList": [],
-        "shippingInfo": {
-            "hsCode": {"code": "3304", "name": "화장품"},
-            "exportCategory": {"code": "EXP001", "name": "일반"},
-            "posterYn": False,
-            "taxCode": None,
-            "restrictedCountries": None,
+        "orderQuantity": {
+            "min": 1,
+            "max": 10,
+            "increaseUnit": 1,
         },
-        "reservationSale": {
-            "rsvCheckYn": False,
-            "restrictionPeriod": None,
-            "restrictShipmentYn": False,
-            "expectedInbound": None,
+        "orderLimits": {
+            "brandMin": None,
+            "brandMax": None,
+            "classMin": None,
+            "classMax": None,
         },
-        "options": [],
-        "displayCategories": [],
-        "thumbnailImages": [
+        "appExcluPrdtYn": False,
+    },
+    "languageDisplayList": [],
+    "shippingInfo": {
+        "hsCode": {"code": "3304", "name": "화장품"},
+        "exportCategory": {"code": "EXP001", "name": "일반"},
+        "posterYn": False,
+        "taxCode": None,
+        "restrictedCountries": None,
+    },
+    "reservationSale": {
+        "rsvCheckYn": False,
+        "restrictionPeriod": None,
+        "restrictShipmentYn": False,
+        "expectedInbound": None,
+    },
+    "options": [],
+    "displayCategories": [],
+    "thumbnailImages": Slot("thumbnail_images"),
+    "additionalInfo": {
+        "srchKeyWordText": Slot("search_keywords"),
+    },
+    "emblemInfo": {
+        "cleanBeautyYn": False,
+        "crueltyFreeYn": False,
+        "dermaTestedYn": False,
+        "glutenFreeYn": False,
+        "parabenFreeYn": False,
+        "veganYn": False,
+    },
+    "descriptionInfo": {
+        "sellingPoint": Slot("description"),
+        "whyWeLoveIt": None,
+        "featuredIngredients": None,
+        "howToUse": None,
+    },
+    "techSpecInfo": {
+        "type": "HTML",
+        "htmlContent": None,
+        "images": [],
+    },
+    "noticeInfo": {
+        "noticeItemCode": "NOTICE001",
+        "ingredients": None,
+    },
+    "globalInfo": {
+        "prop65": None,
+        "prop65Message": None,
+    },
+    "videoInfo": {
+        "exposureType": "MAIN",
+        "entries": [],
+    },
+    "misc": {
+        "colorChipUseYn": None,
+    },
+})
+
+
+@lru_cache(maxsize=None)
+def _standard_category(category: str) -> Dict:
+    cat_info = CATEGORY_MAP.get(category, DEFAULT_CATEGORY_INFO)
+    return {
+        "large": {"code": cat_info["large"][:2].upper(), "name": cat_info["large"]},
+        "medium": {"code": cat_info["medium"][:2].upper(), "name": cat_info["medium"]},
+        "small": {"code": cat_info["small"][:2].upper(), "name": cat_info["small"]},
+    }
+
+
+def document_timestamps() -> Dict[str, str]:
+    """문서 시각 필드 (배치/실행마다 한 번 계산해 product_document_values에 넘긴다)"""
+    return {
+        "now": datetime.utcnow().isoformat() + "Z",
+        "reg_ymd": datetime.now().strftime("%Y-%m-%d"),
+    }
+
+
+def product_document_values(product: Dict, category: str, timestamps: Optional[Dict[str, str]] = None) -> Dict:
+    """제품별로 달라지는 필드만 계산 (timestamps가 없으면 지금 시각)"""
+    product_code = normalize_product_code(product.get("name", ""), product.get("brand", ""))
+    brand_name = product.get("brand", "Unknown")
+    product_name = product.get("name", "Unknown Product")
+    image_url = product.get("imageUrl")
+    
+    return {
+        **(timestamps or document_timestamps()),
+        "product_code": product_code,
+        "gtin": f"MECCA{product_code[:10]}",
+        "product_name": product_name,
+        "product_name_en": product_name if ENGLISH_NAME_PATTERN.match(product_name) else None,
+        # 캐시된 dict를 문서가 공유하지 않도록 단계별 복사 (build 결과를 호출자가 수정해도 캐시 유지)
+        "standard_category": {level: dict(info) for level, info in _standard_category(category).items()},
+        "brand_name": brand_name,
+        "brand_code": normalize_product_code(brand_name, ""),
+        "thumbnail_images": [
             {
                 "index": 0,
-                "path": product.get("imageUrl", "").split("/")[-1] if product.get("imageUrl") else "",
-                "fullUrl": product.get("imageUrl", ""),
+                "path": image_url.split("/")[-1],
+                "fullUrl": image_url,
                 "originalName": None,
                 "typeCode": "MAIN",
                 "seq": 1,
             }
-        ] if product.get("imageUrl") else [],
-        "additionalInfo": {
-            "srchKeyWordText": f"{brand_name},{product_name}",
-        },
-        "emblemInfo": {
-            "cleanBeautyYn": False,
-            "crueltyFreeYn": False,
-            "dermaTestedYn": False,
-            "glutenFreeYn": False,
-            "parabenFreeYn": False,
-            "veganYn": False,
-        },
-        "descriptionInfo": {
-            "sellingPoint": product.get("description"),
-            "whyWeLoveIt": None,
-            "featuredIngredients": None,
-            "howToUse": None,
-        },
-        "techSpecInfo": {
-            "type": "HTML",
-            "htmlContent": None,
-            "images": [],
-        },
-        "noticeInfo": {
-            "noticeItemCode": "NOTICE001",
-            "ingredients": None,
-        },
-        "globalInfo": {
-            "prop65": None,
-            "prop65Message": None,
-        },
-        "videoInfo": {
-            "exposureType": "MAIN",
-            "entries": [],
-        },
-        "misc": {
-            "colorChipUseYn": None,
-        },
+        ] if image_url else [],
+        "search_keywords": f"{brand_name},{product_name}",
+        "description": product.get("description"),
     }
 
 
+def create_product_document(
+    product: Dict,
+    category: str,
+    listing_info: Optional[Dict] = None,
+    timestamps: Optional[Dict[str, str]] = None,
+) -> Dict:
+    """제품 문서 생성 (스키마 준수)"""
+    return PRODUCT_DOCUMENT_TEMPLATE.build(product_document_values(product, category, timestamps))
+
+
+def encode_product_document(
+    product: Dict, category: str, timestamps: Optional[Dict[str, str]] = None
+) -> Tuple[str, str]:
+    """(product_code, 제품 문서 JSON) - 정적 섹션은 사전 인코딩된 조각 재사용"""
+    values = product_document_values(product, category, timestamps)
+    return values["product_code"], PRODUCT_DOCUMENT_TEMPLATE.render(values)
+
+
+def benchmark_document_builder(iterations: int) -> None:
+    product = {
+        "name": "Off Duty Blush Stick",
+        "brand": "MECCA MAX",
+        "url": f"{BASE_URL}/mecca-max/off-duty-blush-stick/",
+        "imageUrl": "https://www.mecca.com/dw/image/v2/off-duty-blush-stick.jpg",
+        "description": "A creamy blush stick for a natural flush.",
+    }
+    timestamps = document_timestamps()
+    print(f"Document builder benchmark ({iterations} docs)", file=sys.stderr)
+    benchmark_template(
+        PRODUCT_DOCUMENT_TEMPLATE,
+        lambda: product_document_values(product, "makeup", timestamps),
+        iterations,
+    )
+
+
 def insert_products_to_db(products: List[Dict], conn, category: str, limit: Optional[int] = None):
     """제품 데이터를 데이터베이스에 삽입"""
     cursor = conn.cursor()
@@ -480,8 +586,18 @@ def insert_products_to_db(products: List[Dict], conn, category: str, limit: Opti
     
     products_to_process = products[:limit] if limit else products
     
+    id_collisions = IdCollisionDetector()
+    # 문서 시각 필드는 배치(이번 호출)마다 한 번만 계산
+    timestamps = document_timestamps()
+    
     for idx, product in enumerate(products_to_process, 1):
         product_code = normalize_product_code(product.get("name", ""), product.get("brand", ""))
+        fingerprint = IdCollisionDetector.fingerprint(
+            product.get("name", ""), product.get("brand", ""), product.get("url", "")
+        )
+        if not id_collisions.check(product_code, fingerprint):
+            errors += 1
+            continue
         
         print(f"  [{idx}/{len(products_to_process)}] Processing: {product.get('name', 'Unknown')}", file=sys.stderr)
         
@@ -503,16 +619,16 @@ def insert_products_to_db(products: List[Dict], conn, category: str, limit: Opti
         
         # 문서 생성
         try:
-            document = create_product_document(product, category)
+            _, document_json = encode_product_document(product, category, timestamps)
             
             # 삽입
             cursor.execute(
                 """
-                INSERT INTO raw_product_document (product_id, document)
-                VALUES (%s, %s::jsonb)
+                INSERT INTO raw_product_document (product_id, document, is_synthetic)
+                VALUES (%s, %s::jsonb, %s)
                 ON CONFLICT (product_id) DO NOTHING
                 """,
-                (product_code, json.dumps(document)),
+                (product_code, document_json, is_synthetic_product_id(product_code)),
             )
             inserted += 1
             
@@ -551,8 +667,29 @@ def main():
         default=3,
         help="크롤링할 최대 페이지 수",
     )
+    parser.add_argument(
+        "--benchmark-links",
+        type=str,
+        default=None,
+        metavar="HTML_FILE",
+        help="크롤링 없이 저장된 리스팅 HTML로 링크 분류 처리량 벤치마크",
+    )
+    parser.add_argument(
+        "--benchmark-docs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="크롤링 없이 제품 문서 생성 처리량 벤치마크 (N개)",
+    )
     args = parser.parse_args()
     
+    if args.benchmark_docs:
+        benchmark_document_builder(args.benchmark_docs)
+        return 0
+    if args.benchmark_links:
+        benchmark_link_classifier(args.benchmark_links)
+        return 0
+    
     listing_url = f"{BASE_URL}/{args.category}/"
     
     print(f"Crawling MECCA {args.category} products...", file=sys.stderr)
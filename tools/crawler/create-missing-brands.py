@@ -1,18 +1,114 @@
 #!/usr/bin/env python3
 """
 매핑되지 않은 브랜드를 제품 데이터에서 추출하여 생성
+
+제품이 참조하지만 raw_brand_document에 없는 브랜드를 anti-join으로 찾아
+단일 INSERT ... SELECT ... ON CONFLICT DO NOTHING 으로 일괄 생성한다.
 """
 
-import json
 import sys
-from datetime import datetime
 from pathlib import Path
 
 import psycopg2
 
 # rawdata_db 유틸 import
 sys.path.append(str(Path(__file__).resolve().parent))
-from rawdata_db import connect_pg, ensure_raw_tables, init_rawdata_database_and_schema
+from rawdata_db import (
+    BRAND_CODE_SQL,
+    connect_pg,
+    ensure_raw_tables,
+    init_rawdata_database_and_schema,
+    product_key_sql,
+)
+
+
+# 브랜드 코드별 이름은 대표값(MIN) 하나만 사용
+MISSING_BRANDS_CTE = f"""
+    WITH refs AS (
+        SELECT
+            {BRAND_CODE_SQL} AS code,
+            MIN(document->'masterInfo'->'brand'->>'krName') AS kr_name,
+            MIN(document->'masterInfo'->'brand'->>'enName') AS en_name
+        FROM raw_product_document
+        WHERE NOT is_synthetic
+          AND {BRAND_CODE_SQL} <> ''
+        GROUP BY 1
+    ),
+    missing AS (
+        SELECT
+            r.code,
+            COALESCE(NULLIF(r.kr_name, ''), r.code) AS kr_name,
+            COALESCE(NULLIF(r.en_name, ''), r.code) AS en_name
+        FROM refs r
+        LEFT JOIN raw_brand_document b ON b.brand_id = r.code
+        WHERE b.brand_id IS NULL
+    )
+"""
+
+# brand_code generated column이 있을 때: anti-join은 인덱스만으로 처리하고,
+# 누락 브랜드마다 대표 제품 1건의 JSONB에서만 이름을 읽는다
+MISSING_BRANDS_INDEXED_CTE = """
+    WITH refs AS (
+        SELECT DISTINCT brand_code AS code
+        FROM raw_product_document
+        WHERE NOT is_synthetic
+          AND brand_code <> ''
+    ),
+    missing AS (
+        SELECT
+            r.code,
+            COALESCE(NULLIF(s.kr_name, ''), r.code) AS kr_name,
+            COALESCE(NULLIF(s.en_name, ''), r.code) AS en_name
+        FROM refs r
+        LEFT JOIN raw_brand_document b ON b.brand_id = r.code
+        CROSS JOIN LATERAL (
+            SELECT
+                p.document->'masterInfo'->'brand'->>'krName' AS kr_name,
+                p.document->'masterInfo'->'brand'->>'enName' AS en_name
+            FROM raw_product_document p
+            WHERE p.brand_code = r.code
+              AND NOT p.is_synthetic
+            LIMIT 1
+        ) s
+        WHERE b.brand_id IS NULL
+    )
+"""
+
+INSERT_MISSING_BRANDS_SQL = """
+    INSERT INTO raw_brand_document (brand_id, document)
+    SELECT
+        m.code,
+        jsonb_build_object(
+            'brandId', m.code,
+            'brandCode', m.code,
+            'brandName', m.kr_name,
+            'brandNameEn', m.en_name,
+            'logoUrl', NULL,
+            'bannerUrl', NULL,
+            'description', m.kr_name || ' 브랜드',
+            'slogan', NULL,
+            'story', NULL,
+            'websiteUrl', NULL,
+            'countryCode', NULL,
+            'foundedYear', NULL,
+            'tier', 'STANDARD',
+            'displayYn', true,
+            'searchKeywords', jsonb_build_array(m.kr_name, m.en_name),
+            'mainCategoryIds', '[]'::jsonb,
+            'socialLinks', '{}'::jsonb,
+            'tags', '[]'::jsonb,
+            'meta', jsonb_build_object(
+                'createdAt', to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"Z"'),
+                'updatedAt', to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"Z"'),
+                'createdBy', 'brand-extractor',
+                'updatedBy', 'brand-extractor',
+                'version', 1
+            )
+        )
+    FROM missing m
+    ON CONFLICT (brand_id) DO NOTHING
+    RETURNING brand_id, document->>'brandName'
+"""
 
 
 def create_missing_brands():
@@ -21,89 +117,35 @@ def create_missing_brands():
     ensure_raw_tables(conn)
     cursor = conn.cursor()
     
-    # 기존 브랜드 목록
-    cursor.execute("SELECT brand_id FROM raw_brand_document")
-    existing_brands = {row[0] for row in cursor.fetchall()}
+    # brand_code generated column이 있으면 인덱스 기반 CTE 사용
+    indexed = product_key_sql(conn)["brand_code"] == "brand_code"
+    cte = MISSING_BRANDS_INDEXED_CTE if indexed else MISSING_BRANDS_CTE
     
-    # 제품에서 참조하는 브랜드 추출
-    cursor.execute("""
-        SELECT DISTINCT 
-            document->'masterInfo'->'brand'->>'code' as brand_code,
-            document->'masterInfo'->'brand'->>'krName' as brand_kr_name,
-            document->'masterInfo'->'brand'->>'enName' as brand_en_name
-        FROM raw_product_document
-        WHERE product_id NOT LIKE '%SYN%'
-          AND document->'masterInfo'->'brand'->>'code' IS NOT NULL
-    """)
-    
-    missing_brands = []
-    for brand_code, brand_kr_name, brand_en_name in cursor.fetchall():
-        if brand_code and brand_code not in existing_brands:
-            missing_brands.append({
-                "code": brand_code,
-                "krName": brand_kr_name or brand_code,
-                "enName": brand_en_name or brand_code,
-            })
+    try:
+        cursor.execute(cte + INSERT_MISSING_BRANDS_SQL)
+        created = cursor.fetchall()
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"  오류: {e}")
+        cursor.close()
+        conn.close()
+        return
     
-    if not missing_brands:
+    if not created:
         print("매핑되지 않은 브랜드가 없습니다.")
         cursor.close()
         conn.close()
         return
     
-    print(f"매핑되지 않은 브랜드 {len(missing_brands)}개 발견")
-    
-    # 브랜드 문서 생성 및 삽입
-    inserted = 0
-    for brand in missing_brands:
-        brand_id = brand["code"]
-        brand_doc = {
-            "brandId": brand_id,
-            "brandCode": brand_id,
-            "brandName": brand["krName"],
-            "brandNameEn": brand["enName"],
-            "logoUrl": None,
-            "bannerUrl": None,
-            "description": f"{brand['krName']} 브랜드",
-            "slogan": None,
-            "story": None,
-            "websiteUrl": None,
-            "countryCode": None,
-            "foundedYear": None,
-            "tier": "STANDARD",
-            "displayYn": True,
-            "searchKeywords": [brand["krName"], brand["enName"]],
-            "mainCategoryIds": [],
-            "socialLinks": {},
-            "tags": [],
-            "meta": {
-                "createdAt": datetime.utcnow().isoformat() + "Z",
-                "updatedAt": datetime.utcnow().isoformat() + "Z",
-                "createdBy": "brand-extractor",
-                "updatedBy": "brand-extractor",
-                "version": 1,
-            },
-        }
-        
-        try:
-            cursor.execute(
-                """
-                INSERT INTO raw_brand_document (brand_id, document)
-                VALUES (%s, %s::jsonb)
-                ON CONFLICT (brand_id) DO NOTHING
-                """,
-                (brand_id, json.dumps(brand_doc, ensure_ascii=False)),
-            )
-            inserted += 1
-            print(f"  생성: {brand_id} ({brand['krName']})")
-        except Exception as e:
-            print(f"  오류: {brand_id} - {e}")
+    print(f"매핑되지 않은 브랜드 {len(created)}개 발견")
+    for brand_id, brand_name in created:
+        print(f"  생성: {brand_id} ({brand_name})")
     
-    conn.commit()
     cursor.close()
     conn.close()
     
-    print(f"\n완료! {inserted}개 브랜드 생성")
+    print(f"\n완료! {len(created)}개 브랜드 생성")
 
 
 if __name__ == "__main__":
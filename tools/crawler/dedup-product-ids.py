@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+레거시 제품 ID 정리 (1회성 dedup/backfill)
+
+기존 크롤러는
+- 영문/숫자가 없는 이름에 `PRDT_{hash(name) % 100000}` (프로세스마다 값이 바뀜)
+- 50자 초과 코드를 단순 절단
+으로 ID를 만들어 같은 제품이 여러 행으로 쌓이거나 서로 다른 제품이 충돌했다.
+
+후보는 실제 레거시 형식인 행만 고른다.
+- `PRDT_` + 1~5자리 숫자 이고, 저장된 이름에 영문/숫자가 없거나 이름이 기본값("Unknown Product")인 행
+- 영문 대문자/숫자 50자 이고, 저장된 브랜드+이름 코드가 50자를 넘으면서 그 앞 50자와 같은 행
+  (정확히 50자인 정상 ID는 후보가 아니다)
+
+새 ID는 현재 크롤러와 같은 순서로 다시 계산한다.
+1. 제품 URL 코드 (I-/V-): 문서에는 URL이 없으므로 MECCA sitemap의 제품 URL slug(브랜드+제품명)로 매칭
+2. URL 매칭이 없으면 product_ids.name_based_product_code(gdsNm, brand.krName)
+   - 이름이 기본값("Unknown Product"/"Unknown")이면 원래 입력을 알 수 없으므로 건너뛴다 (unresolved)
+
+같은 새 ID로 모이는 행(이미 있는 새 ID 행 포함)은 내용이 가장 많은 문서를 남긴다.
+- 채워진 값(null/빈 값 제외) 수가 많은 문서, 같으면 최근 updated_at
+- 남길 문서의 gdsCd/prdtNo/gtin을 새 ID로 바꿔 새 ID 행에 저장하고 나머지 행은 삭제
+
+사용 예:
+  python3 tools/crawler/dedup-product-ids.py                 # --dry-run (기본: 병합 계획만 출력)
+  python3 tools/crawler/dedup-product-ids.py --max-sitemaps 20
+  python3 tools/crawler/dedup-product-ids.py --apply         # 단일 트랜잭션으로 적용
+"""
+
+import argparse
+import importlib.util
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# rawdata_db 유틸 import
+sys.path.append(str(Path(__file__).resolve().parent))
+from mecca_products import PRODUCT_CODE_IN_URL_PATTERN, URL_PATH_BRAND_PRODUCT_PATTERN, extract_product_code_from_url
+from product_ids import MAX_CODE_LENGTH, name_based_product_code, product_name_key
+from rawdata_db import connect_pg, ensure_raw_tables, init_rawdata_database_and_schema
+
+DEFAULT_PRODUCT_NAME = "Unknown Product"
+DEFAULT_BRAND_NAME = "Unknown"
+
+LEGACY_HASH_ID_PATTERN = re.compile(r"^PRDT_[0-9]{1,5}$")
+
+# 형식만으로 1차 선별 (최종 판정은 저장된 이름과 대조하는 is_legacy_id)
+LEGACY_CANDIDATES_SQL = """
+    SELECT product_id, document, updated_at
+    FROM raw_product_document
+    WHERE product_id ~ '^PRDT_[0-9]{1,5}$'
+       OR product_id ~ '^[A-Z0-9]{%(max_length)s}$'
+"""
+
+EXISTING_SQL = "SELECT product_id, document, updated_at FROM raw_product_document WHERE product_id = ANY(%s)"
+
+_SET_IDS = """
+    jsonb_set(
+        jsonb_set(
+            jsonb_set({source}, '{{masterInfo,gdsCd}}', to_jsonb(%(new_id)s::text)),
+            '{{masterInfo,gtin}}', to_jsonb(%(gtin)s::text)
+        ),
+        '{{onlineInfo,prdtNo}}', to_jsonb(%(new_id)s::text)
+    )
+"""
+
+RENAME_SQL = f"""
+    UPDATE raw_product_document
+    SET product_id = %(new_id)s,
+        document = {_SET_IDS.format(source="document")},
+        updated_at = NOW()
+    WHERE product_id = %(old_id)s
+"""
+
+# 새 ID 행이 이미 있는데 레거시 행 문서가 더 풍부하면 그 문서로 교체
+REPLACE_SQL = f"""
+    UPDATE raw_product_document AS target
+    SET document = {_SET_IDS.format(source="source.document")},
+        updated_at = NOW()
+    FROM raw_product_document AS source
+    WHERE target.product_id = %(new_id)s
+      AND source.product_id = %(old_id)s
+"""
+
+DELETE_SQL = "DELETE FROM raw_product_document WHERE product_id = ANY(%s)"
+
+
+def stored_names(document: Dict) -> tuple:
+    master = document.get("masterInfo") or {}
+    return master.get("gdsNm") or "", (master.get("brand") or {}).get("krName") or ""
+
+
+def has_default_names(product_name: str, brand_name: str) -> bool:
+    return product_name in ("", DEFAULT_PRODUCT_NAME) or brand_name in ("", DEFAULT_BRAND_NAME)
+
+
+def is_legacy_id(product_id: str, product_name: str, brand_name: str) -> bool:
+    """레거시 규칙으로 만들어진 ID인지 (저장된 이름과 대조)"""
+    key = product_name_key(product_name, brand_name)
+    if LEGACY_HASH_ID_PATTERN.match(product_id):
+        return not key or has_default_names(product_name, brand_name)
+    return len(key) > MAX_CODE_LENGTH and key[:MAX_CODE_LENGTH] == product_id
+
+
+def url_name_key(url: str) -> Optional[str]:
+    """제품 URL slug의 브랜드+제품명 코드 (크롤러가 목록 카드 이름으로 만들던 코드와 같은 규칙)"""
+    path = "/" + url.split("://", 1)[-1].split("/", 1)[-1].split("?", 1)[0]
+    match = URL_PATH_BRAND_PRODUCT_PATTERN.match(path)
+    if not match:
+        return None
+    product_slug = PRODUCT_CODE_IN_URL_PATTERN.sub("", match.group(2)).strip("-")
+    return product_name_key(product_slug, match.group(1)) or None
+
+
+def load_url_codes(sitemap_index_url: str, max_sitemaps: int) -> Dict[str, Optional[str]]:
+    """{URL slug 코드: URL 제품 코드} - 같은 slug가 다른 코드로 여러 번 나오면 None (모호)"""
+    # sitemap 파싱은 sitemap 크롤러 구현을 그대로 사용
+    path = Path(__file__).resolve().parent / "crawl-mecca-products-sitemap.py"
+    spec = importlib.util.spec_from_file_location("crawl_mecca_products_sitemap", str(path))
+    sitemap = importlib.util.module_from_spec(spec)
+    assert spec and spec.loader
+    spec.loader.exec_module(sitemap)
+
+    codes: Dict[str, Optional[str]] = {}
+    for sitemap_url in sitemap.iter_candidate_sitemaps(sitemap_index_url)[:max_sitemaps]:
+        try:
+            xml = sitemap.fetch_text(sitemap_url, timeout_seconds=60)
+        except Exception as e:
+            print(f"⚠️  sitemap 조회 실패: {sitemap_url} ({e})", file=sys.stderr)
+            continue
+        for loc in sitemap.iter_urlset_locs(xml):
+            if not sitemap.is_mecca_product_url(loc):
+                continue
+            key = url_name_key(loc)
+            code = extract_product_code_from_url(loc)
+            if key and code:
+                codes[key] = code if codes.get(key, code) == code else None
+    return codes
+
+
+def recompute_product_id(product_name: str, brand_name: str, url_codes: Dict[str, Optional[str]]) -> tuple:
+    """(새 ID | None, 근거) - 크롤러와 같은 순서: URL 코드 → 이름 기반 코드"""
+    key = product_name_key(product_name, brand_name)
+    if key in url_codes:
+        code = url_codes[key]
+        return (code, "url") if code else (None, "ambiguous-url")
+    if has_default_names(product_name, brand_name):
+        return None, "default-names"
+    return name_based_product_code(product_name, brand_name), "name"
+
+
+def document_richness(node: Any) -> int:
+    """채워진 leaf 값 수 (None/빈 문자열/빈 컨테이너 제외)"""
+    if isinstance(node, dict):
+        return sum(document_richness(value) for value in node.values())
+    if isinstance(node, list):
+        return sum(document_richness(value) for value in node)
+    return 0 if node is None or node == "" else 1
+
+
+def plan_merges(cursor, url_codes: Dict[str, Optional[str]]):
+    """
+    ({new_id: {"source", "keep", "replace", "rename", "delete"}}, [(old_id, 사유), ...])
+    - keep: 남길 문서의 현재 product_id
+    - replace: 새 ID 행이 있고 레거시 행 문서가 더 풍부할 때 그 레거시 ID
+    - rename: 새 ID 행이 없을 때 새 ID로 바꿀 레거시 ID
+    """
+    cursor.execute(LEGACY_CANDIDATES_SQL, {"max_length": MAX_CODE_LENGTH})
+
+    groups = defaultdict(list)
+    sources = {}
+    unresolved = []
+    for product_id, document, updated_at in cursor.fetchall():
+        product_name, brand_name = stored_names(document)
+        if not is_legacy_id(product_id, product_name, brand_name):
+            continue
+        new_id, source = recompute_product_id(product_name, brand_name, url_codes)
+        if new_id is None:
+            unresolved.append((product_id, source))
+            continue
+        if new_id != product_id:
+            groups[new_id].append((product_id, document, updated_at))
+            sources[new_id] = source
+
+    if not groups:
+        return {}, unresolved
+
+    cursor.execute(EXISTING_SQL, (list(groups),))
+    existing = {product_id: (product_id, document, updated_at) for product_id, document, updated_at in cursor.fetchall()}
+
+    plan = {}
+    for new_id, rows in groups.items():
+        candidates = rows + ([existing[new_id]] if new_id in existing else [])
+        keep = max(candidates, key=lambda row: (document_richness(row[1]), row[2]))[0]
+        legacy_ids = [product_id for product_id, _, _ in rows]
+        if new_id in existing:
+            replace = keep if keep != new_id else None
+            plan[new_id] = {"source": sources[new_id], "keep": keep, "replace": replace, "rename": None, "delete": legacy_ids}
+        else:
+            plan[new_id] = {
+                "source": sources[new_id],
+                "keep": keep,
+                "replace": None,
+                "rename": keep,
+                "delete": [product_id for product_id in legacy_ids if product_id != keep],
+            }
+    return plan, unresolved
+
+
+def apply_merges(conn, plan) -> None:
+    cursor = conn.cursor()
+    try:
+        # 1) 더 풍부한 레거시 문서를 기존 새 ID 행으로 복사 → 2) 레거시 행 삭제 → 3) 남은 레거시 행 rename
+        for new_id, merge in plan.items():
+            if merge["replace"]:
+                cursor.execute(REPLACE_SQL, {"new_id": new_id, "old_id": merge["replace"], "gtin": f"MECCA{new_id[:10]}"})
+        to_delete = [old_id for merge in plan.values() for old_id in merge["delete"]]
+        if to_delete:
+            cursor.execute(DELETE_SQL, (to_delete,))
+        for new_id, merge in plan.items():
+            if merge["rename"]:
+                cursor.execute(RENAME_SQL, {"new_id": new_id, "old_id": merge["rename"], "gtin": f"MECCA{new_id[:10]}"})
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="레거시 제품 ID 병합 (dedup/backfill)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--dry-run", dest="apply", action="store_false", help="병합 계획만 출력 (기본)")
+    mode.add_argument("--apply", dest="apply", action="store_true", help="병합을 단일 트랜잭션으로 적용")
+    parser.set_defaults(apply=False)
+    parser.add_argument(
+        "--sitemap-index-url",
+        type=str,
+        default="https://www.mecca.com/en-au/sitemap.xml",
+        help="제품 URL 코드 매칭에 쓸 sitemap index",
+    )
+    parser.add_argument("--max-sitemaps", type=int, default=10, help="읽을 catalog sitemap 개수 상한")
+    args = parser.parse_args()
+
+    init_rawdata_database_and_schema()
+    conn = connect_pg()
+    ensure_raw_tables(conn)
+
+    try:
+        url_codes = load_url_codes(args.sitemap_index_url, args.max_sitemaps)
+        print(f"sitemap 제품 URL 코드 {len(url_codes)}개 로드")
+
+        cursor = conn.cursor()
+        plan, unresolved = plan_merges(cursor, url_codes)
+        cursor.close()
+
+        renamed = sum(1 for merge in plan.values() if merge["rename"])
+        replaced = sum(1 for merge in plan.values() if merge["replace"])
+        deleted = sum(len(merge["delete"]) for merge in plan.values())
+        print(f"새 ID {len(plan)}개: rename {renamed}건, 문서 교체 {replaced}건, 중복 삭제 {deleted}건")
+        for new_id, merge in sorted(plan.items()):
+            if merge["rename"]:
+                action = f"{merge['rename']} → {new_id}"
+            elif merge["replace"]:
+                action = f"keep {new_id} (document from {merge['replace']})"
+            else:
+                action = f"keep {new_id}"
+            drops = f", delete {merge['delete']}" if merge["delete"] else ""
+            print(f"  [{merge['source']}] {action}{drops}")
+
+        if unresolved:
+            print(f"\n⚠️  새 ID를 정할 수 없어 건너뛴 레거시 행 {len(unresolved)}건:")
+            for product_id, reason in sorted(unresolved):
+                print(f"  {product_id} ({reason})")
+
+        if not plan:
+            print("병합할 레거시 ID가 없습니다.")
+        elif args.apply:
+            apply_merges(conn, plan)
+            print("\n✅ 적용 완료")
+        else:
+            print("\n(dry-run) 적용하려면 --apply 를 사용하세요.")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+문서 JSON 직렬화 (DB 드라이버 없이 import 가능한 가벼운 모듈)
+
+rawdata_db는 psycopg2를 import하므로, 문서만 만드는 모듈(document_template, mecca_products 등)은
+직렬화 백엔드를 이 모듈에서 가져온다. rawdata_db는 같은 이름으로 다시 export한다.
+
+환경 변수:
+- RAWDATA_JSON_BACKEND: 문서 직렬화 백엔드 auto|orjson|msgspec|json (기본: auto)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional
+    msgspec = None
+
+
+def _stdlib_dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _select_json_backend() -> tuple:
+    """
+    문서 직렬화 백엔드 선택: orjson > msgspec > stdlib json.
+    - 모든 백엔드가 UTF-8 그대로 출력 (한글을 \\uXXXX로 이스케이프하지 않음 → payload 축소)
+    """
+    requested = (os.getenv("RAWDATA_JSON_BACKEND") or "auto").lower()
+    if requested in ("auto", "orjson") and orjson is not None:
+        return "orjson", lambda value: orjson.dumps(value).decode("utf-8")
+    if requested in ("auto", "msgspec") and msgspec is not None:
+        encoder = msgspec.json.Encoder()
+        return "msgspec", lambda value: encoder.encode(value).decode("utf-8")
+    return "json", _stdlib_dumps
+
+
+JSON_BACKEND, _json_dumps = _select_json_backend()
+
+
+def dumps_document(value: Any) -> str:
+    """raw_*_document.document 저장용 JSON 문자열 (모든 writer 공통)"""
+    return _json_dumps(value)
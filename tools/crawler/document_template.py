@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+문서 템플릿 유틸 (정적 섹션 사전 인코딩)
+
+크롤러가 만드는 제품 문서는 ~150개 키 중 제품마다 달라지는 값이 20개 남짓이다.
+스켈레톤 dict에서 제품별 값 자리를 Slot으로 표시해 두면
+- 정적 섹션(flags, shippingInfo, emblemInfo ...)은 템플릿 생성 시 한 번만 JSON으로 인코딩하고
+- render()는 Slot 값만 인코딩해서 미리 인코딩된 조각 사이에 이어 붙인다.
+
+사용 예:
+  TEMPLATE = DocumentTemplate({"id": Slot("id"), "flags": {"a": False, "b": True}})
+  TEMPLATE.render({"id": "P001"})   # '{"id":"P001","flags":{"a":false,"b":true}}'
+  TEMPLATE.build({"id": "P001"})    # 동일 구조의 새 dict (정적 섹션은 매번 새로 생성)
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from operator import itemgetter
+from typing import Any, Callable, Dict, List
+
+from document_json import JSON_BACKEND, dumps_document
+
+
+# 정적 조각과 Slot 값 모두 공통 직렬화 백엔드(document_json)로 인코딩
+_encode = dumps_document
+
+
+class Slot:
+    """스켈레톤에서 제품별 값이 들어갈 자리"""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"Slot({self.name!r})"
+
+
+def _container_builder(base, children) -> Callable[[Dict[str, Any]], Any]:
+    """base(dict/list)의 얕은 복사본에 children [(키/인덱스, 생성 함수)] 결과를 채우는 함수"""
+    copy = base.copy
+
+    def build(values: Dict[str, Any]) -> Any:
+        node = copy()
+        for key, child in children:
+            node[key] = child(values)
+        return node
+
+    return build
+
+
+def _has_slot(node: Any) -> bool:
+    if isinstance(node, Slot):
+        return True
+    if isinstance(node, dict):
+        return any(_has_slot(v) for v in node.values())
+    if isinstance(node, list):
+        return any(_has_slot(v) for v in node)
+    return False
+
+
+class DocumentTemplate:
+    """Slot이 포함된 스켈레톤을 [정적 JSON 조각, Slot, 정적 JSON 조각, ...]으로 컴파일"""
+
+    def __init__(self, skeleton: Dict[str, Any]):
+        self.skeleton = skeleton
+        tokens: List[Any] = []
+        self._compile(skeleton, tokens)
+
+        # 인접한 정적 조각 병합 → fragments는 항상 len(slot_names) + 1개
+        self.fragments: List[str] = []
+        self.slot_names: List[str] = []
+        literal: List[str] = []
+        for token in tokens:
+            if isinstance(token, Slot):
+                self.fragments.append("".join(literal))
+                self.slot_names.append(token.name)
+                literal = []
+            else:
+                literal.append(token)
+        self.fragments.append("".join(literal))
+
+        self._builder = self._compile_builder(skeleton)
+
+    def _compile(self, node: Any, tokens: List[Any]) -> None:
+        if isinstance(node, Slot):
+            tokens.append(node)
+        elif not _has_slot(node):
+            # Slot이 없는 하위 트리는 통째로 한 번만 인코딩
+            tokens.append(_encode(node))
+        elif isinstance(node, dict):
+            tokens.append("{")
+            for idx, (key, value) in enumerate(node.items()):
+                tokens.append(("," if idx else "") + _encode(key) + ":")
+                self._compile(value, tokens)
+            tokens.append("}")
+        else:
+            tokens.append("[")
+            for idx, value in enumerate(node):
+                if idx:
+                    tokens.append(",")
+                self._compile(value, tokens)
+            tokens.append("]")
+
+    def _compile_builder(self, node: Any) -> Callable[[Dict[str, Any]], Any]:
+        """
+        build()용 생성 함수: 스켈레톤 노드마다 클로저를 한 번 만들어 둔다
+        - dict/list는 스칼라 값을 미리 채운 원본을 얕은 복사(C 구현)한 뒤 하위 dict/list/Slot 자리만 채운다
+          (이미 있는 키에 대입하므로 키 순서는 스켈레톤과 같다)
+        - Slot 값은 그대로 들어간다 → 캐시 등으로 공유되는 객체는 호출자가 복사해서 넘긴다
+        """
+        if isinstance(node, Slot):
+            return itemgetter(node.name)
+        if isinstance(node, dict):
+            base = {}
+            children = []
+            for key, value in node.items():
+                if isinstance(value, (dict, list, Slot)):
+                    base[key] = None
+                    children.append((key, self._compile_builder(value)))
+                else:
+                    base[key] = value
+            return _container_builder(base, children)
+        if isinstance(node, list):
+            base = []
+            children = []
+            for idx, value in enumerate(node):
+                if isinstance(value, (dict, list, Slot)):
+                    base.append(None)
+                    children.append((idx, self._compile_builder(value)))
+                else:
+                    base.append(value)
+            return _container_builder(base, children)
+        return lambda values: node
+
+    def render(self, values: Dict[str, Any]) -> str:
+        """JSON 문자열 생성 (Slot 값만 인코딩)"""
+        fragments = self.fragments
+        out = [fragments[0]]
+        for idx, name in enumerate(self.slot_names, 1):
+            out.append(_encode(values[name]))
+            out.append(fragments[idx])
+        return "".join(out)
+
+    def build(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """dict 생성 (정적 섹션은 매번 새 객체, Slot 값은 넘긴 객체 그대로)"""
+        return self._builder(values)
+
+    def assemble(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """스켈레톤에 Slot 값을 직접 채운 dict (템플릿 도입 전 방식, 벤치마크 기준선)"""
+        return self._assemble(self.skeleton, values)
+
+    def _assemble(self, node: Any, values: Dict[str, Any]) -> Any:
+        if isinstance(node, Slot):
+            return values[node.name]
+        if isinstance(node, dict):
+            return {key: self._assemble(value, values) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self._assemble(value, values) for value in node]
+        return node
+
+
+def benchmark_template(
+    template: DocumentTemplate,
+    make_values: Callable[[], Dict[str, Any]],
+    iterations: int,
+) -> Dict[str, float]:
+    """
+    dict 생성 + dumps_document(기존 방식) 대비 템플릿 render 처리량(docs/sec) 비교.
+    두 경로 모두 같은 직렬화 백엔드를 쓰므로 차이는 사전 인코딩 효과만 반영한다.
+    두 방식의 결과가 같은 JSON인지 먼저 확인한다.
+    """
+    values = make_values()
+    if json.loads(template.render(values)) != template.assemble(values):
+        raise AssertionError("template render 결과가 기존 dict 생성 방식과 다릅니다")
+    if template.build(values) != template.assemble(values):
+        raise AssertionError("template build 결과가 기존 dict 생성 방식과 다릅니다")
+
+    results = {}
+    baseline_label = f"assemble+dumps[{JSON_BACKEND}]"
+    render_label = f"template.render[{JSON_BACKEND}]"
+    for label, encode in (
+        (baseline_label, lambda v: dumps_document(template.assemble(v))),
+        (render_label, template.render),
+    ):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            encode(make_values())
+        elapsed = time.perf_counter() - started
+        results[label] = iterations / elapsed if elapsed > 0 else float("inf")
+        print(f"  {label:<30} {results[label]:>10,.0f} docs/sec", file=sys.stderr)
+
+    baseline = results[baseline_label]
+    if baseline:
+        print(f"  speedup: {results[render_label] / baseline:.2f}x", file=sys.stderr)
+    return results
@@ -3,60 +3,100 @@
 크롤링된 제품 데이터에서 카테고리 정보를 추출하여 raw_category_document 테이블에 삽입
 """
 
-import json
 import sys
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
-from collections import defaultdict
+from typing import Dict, List, Tuple
 
 import psycopg2
+from psycopg2.extras import execute_values
 
 # rawdata_db 유틸 import
 sys.path.append(str(Path(__file__).resolve().parent))
-from rawdata_db import connect_pg, ensure_raw_tables, init_rawdata_database_and_schema
+from rawdata_db import (
+    CATEGORY_KEY_SQL,
+    connect_pg,
+    dumps_document,
+    ensure_raw_tables,
+    init_rawdata_database_and_schema,
+    product_key_sql,
+)
 
 
-def extract_categories_from_products(conn) -> List[Dict]:
-    """제품 데이터에서 카테고리 정보 추출"""
-    cursor = conn.cursor()
-    
-    # 크롤링된 제품에서 카테고리 정보 추출 (SYN 제외)
-    cursor.execute("""
-        SELECT document->'masterInfo'->'standardCategory' as category
+# 카테고리별 집계는 서버에서 수행 (제품 수와 무관하게 distinct 카테고리 수만큼만 전송)
+# 카테고리별 대표 제품 1건(product_id 최소)의 standardCategory를 통째로 사용
+# (컬럼별 MIN()은 서로 다른 제품의 이름을 섞어 실제로 없는 경로를 만들 수 있다)
+CATEGORY_AGGREGATE_SQL = f"""
+    SELECT DISTINCT ON (category_id)
+        category_id,
+        category->'large'->>'code'  AS large_code,
+        category->'large'->>'name'  AS large_name,
+        category->'medium'->>'code' AS medium_code,
+        category->'medium'->>'name' AS medium_name,
+        category->'small'->>'code'  AS small_code,
+        category->'small'->>'name'  AS small_name,
+        COUNT(*) OVER (PARTITION BY category_id) AS product_count
+    FROM (
+        SELECT
+            {CATEGORY_KEY_SQL} AS category_id,
+            product_id,
+            document->'masterInfo'->'standardCategory' AS category
         FROM raw_product_document
-        WHERE product_id NOT LIKE '%SYN%'
+        WHERE NOT is_synthetic
           AND document->'masterInfo'->'standardCategory' IS NOT NULL
-    """)
+          AND {CATEGORY_KEY_SQL} <> ''
+    ) AS products
+    ORDER BY category_id, product_id
+"""
+
+# category_key generated column이 있을 때: 개수는 인덱스(index-only scan)로 집계하고,
+# 이름은 카테고리별 대표 제품 1건만 인덱스로 찾아 JSONB를 읽는다
+CATEGORY_AGGREGATE_INDEXED_SQL = """
+    WITH refs AS (
+        SELECT category_key, COUNT(*) AS product_count
+        FROM raw_product_document
+        WHERE NOT is_synthetic
+          AND category_key <> ''
+        GROUP BY 1
+    )
+    SELECT
+        r.category_key AS category_id,
+        s.category->'large'->>'code'  AS large_code,
+        s.category->'large'->>'name'  AS large_name,
+        s.category->'medium'->>'code' AS medium_code,
+        s.category->'medium'->>'name' AS medium_name,
+        s.category->'small'->>'code'  AS small_code,
+        s.category->'small'->>'name'  AS small_name,
+        r.product_count
+    FROM refs r
+    CROSS JOIN LATERAL (
+        SELECT p.document->'masterInfo'->'standardCategory' AS category
+        FROM raw_product_document p
+        WHERE p.category_key = r.category_key
+          AND NOT p.is_synthetic
+        LIMIT 1
+    ) s
+"""
+
+
+def extract_categories_from_products(conn) -> List[Tuple[str, Dict]]:
+    """제품 데이터에서 카테고리 정보 추출 (GROUP BY 집계)"""
+    cursor = conn.cursor()
     
-    categories = defaultdict(lambda: {"count": 0, "data": None})
+    # 크롤링된 제품에서 카테고리 정보 추출 (SYN 제외)
+    indexed = product_key_sql(conn)["category_key"] == "category_key"
+    cursor.execute(CATEGORY_AGGREGATE_INDEXED_SQL if indexed else CATEGORY_AGGREGATE_SQL)
     
-    for row in cursor.fetchall():
-        category = row[0]
-        if not category:
-            continue
-            
-        # 카테고리 키 생성 (large.code + medium.code + small.code)
-        large = category.get("large", {})
-        medium = category.get("medium", {})
-        small = category.get("small", {})
-        
-        large_code = large.get("code", "")
-        medium_code = medium.get("code", "")
-        small_code = small.get("code", "")
-        
-        # 카테고리 ID 생성
-        category_id = f"{large_code}_{medium_code}_{small_code}".strip("_")
-        if not category_id:
-            continue
-            
-        # 카운트 증가 및 데이터 저장
-        categories[category_id]["count"] += 1
-        if categories[category_id]["data"] is None:
-            categories[category_id]["data"] = {
-                "large": large,
-                "medium": medium,
-                "small": small,
-            }
+    categories = {}
+    for (category_id, large_code, large_name, medium_code, medium_name,
+         small_code, small_name, product_count) in cursor.fetchall():
+        categories[category_id] = {
+            "count": product_count,
+            "data": {
+                "large": {"code": large_code, "name": large_name},
+                "medium": {"code": medium_code, "name": medium_name},
+                "small": {"code": small_code, "name": small_name},
+            },
+        }
     
     cursor.close()
     
@@ -122,44 +162,31 @@ def extract_categories_from_products(conn) -> List[Dict]:
 
 
 def insert_categories(conn, category_docs: List[Tuple[str, Dict]]):
-    """카테고리 문서를 DB에 삽입"""
+    """카테고리 문서를 DB에 삽입 (단일 set-based INSERT ... ON CONFLICT)"""
+    if not category_docs:
+        return 0, 0
+    
     cursor = conn.cursor()
-    inserted = 0
-    skipped = 0
+    rows = [(category_id, dumps_document(doc)) for category_id, doc in category_docs]
     
-    for category_id, doc in category_docs:
-        # 중복 확인
-        cursor.execute(
-            "SELECT category_id FROM raw_category_document WHERE category_id = %s",
-            (category_id,),
-        )
-        if cursor.fetchone():
-            skipped += 1
-            continue
-        
-        # 삽입
-        try:
-            cursor.execute(
-                """
-                INSERT INTO raw_category_document (category_id, document)
-                VALUES (%s, %s::jsonb)
-                ON CONFLICT (category_id) DO NOTHING
-                """,
-                (category_id, json.dumps(doc, ensure_ascii=False)),
-            )
-            inserted += 1
-            
-            if inserted % 10 == 0:
-                conn.commit()
-                print(f"  Committed {inserted} categories...", file=sys.stderr)
-                
-        except Exception as e:
-            print(f"  Error inserting category {category_id}: {e}", file=sys.stderr)
-            continue
+    # 이미 존재하는 카테고리는 건너뛰고, 실제로 삽입된 ID만 RETURNING으로 받음
+    inserted_ids = execute_values(
+        cursor,
+        """
+        INSERT INTO raw_category_document (category_id, document)
+        VALUES %s
+        ON CONFLICT (category_id) DO NOTHING
+        RETURNING category_id
+        """,
+        rows,
+        template="(%s, %s::jsonb)",
+        fetch=True,
+    )
     
     conn.commit()
     cursor.close()
-    return inserted, skipped
+    inserted = len(inserted_ids)
+    return inserted, len(category_docs) - inserted
 
 
 def main():
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+크롤 소스 간 중복 제품 탐지 (MinHash + LSH)
+
+같은 MECCA 제품이
+- crawl-mecca-products.py (이름 기반 ID)
+- crawl-mecca-products-playwright.py / sitemap (I-/V- URL 코드)
+로 서로 다른 product_id를 받아 raw_product_document에 중복 저장된다.
+
+제품명/브랜드/이미지 URL을 shingle로 만들고 MinHash 서명을 LSH band로 버킷팅해
+같은 버킷에 들어온 후보 쌍만 비교한다 (전체 쌍 비교 O(n²) 대신 근사 O(n)).
+추정 Jaccard 유사도가 임계값 이상인 쌍을 union-find로 묶어 병합 제안을 출력한다.
+
+증분 모드(--incremental)는 서명/band 키를 raw_product_minhash 테이블에 저장해 두고,
+새로 추가/변경된 제품만 band 키가 겹치는 기존 제품(GIN 인덱스)과 비교한다.
+band 키는 --bands/--rows에 따라 달라지므로 --store 때와 같은 값을 사용해야 한다.
+
+사용 예:
+  python3 tools/crawler/find-duplicate-products.py                      # 전체 비교, 제안 출력
+  python3 tools/crawler/find-duplicate-products.py --output build/dup.json
+  python3 tools/crawler/find-duplicate-products.py --incremental        # 신규/변경 제품만 비교
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+from urllib.parse import urlparse
+
+from psycopg2.extras import execute_values
+
+# rawdata_db 유틸 import
+sys.path.append(str(Path(__file__).resolve().parent))
+from rawdata_db import connect_pg, ensure_raw_tables, init_rawdata_database_and_schema
+
+# MinHash 파라미터: bands × rows = 서명 길이.
+# 후보가 될 확률이 50%가 되는 유사도 ≈ (1/bands)^(1/rows) ≈ 0.42 (32×4)
+DEFAULT_BANDS = 32
+DEFAULT_ROWS = 4
+DEFAULT_THRESHOLD = 0.6
+MERSENNE_PRIME = (1 << 61) - 1
+# 서명 해시 계수는 고정 seed로 생성 → 실행 간 서명 호환 (증분 모드 필수 조건)
+MINHASH_SEED = 20260120
+
+URL_CODE_ID = re.compile(r"^(?:[IV]-\d+|ITEM-\d+)$")
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+PRODUCTS_SQL = """
+    SELECT
+        product_id,
+        COALESCE(document->'masterInfo'->>'gdsNm', '') AS product_name,
+        COALESCE(document->'masterInfo'->'brand'->>'krName', '') AS brand_name,
+        jsonb_path_query_array(document, '$.thumbnailImages[*].fullUrl') AS image_urls,
+        updated_at
+    FROM raw_product_document
+    WHERE NOT is_synthetic
+"""
+
+INCREMENTAL_FILTER_SQL = """
+      AND NOT EXISTS (
+          SELECT 1 FROM raw_product_minhash m
+          WHERE m.product_id = raw_product_document.product_id
+            AND m.source_updated_at >= raw_product_document.updated_at
+      )
+"""
+
+ENSURE_MINHASH_TABLE_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS raw_product_minhash (
+        product_id        TEXT PRIMARY KEY,
+        signature         BIGINT[] NOT NULL,
+        band_keys         BIGINT[] NOT NULL,
+        source_updated_at TIMESTAMPTZ NOT NULL,
+        created_at        TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_raw_product_minhash_band_keys ON raw_product_minhash USING GIN (band_keys)",
+]
+
+CANDIDATES_SQL = """
+    SELECT m.product_id, m.signature,
+           COALESCE(p.document->'masterInfo'->>'gdsNm', ''),
+           COALESCE(p.document->'masterInfo'->'brand'->>'krName', ''),
+           jsonb_path_query_array(p.document, '$.thumbnailImages[*].fullUrl')
+    FROM raw_product_minhash m
+    JOIN raw_product_document p ON p.product_id = m.product_id
+    WHERE m.band_keys && %s
+      AND m.product_id <> %s
+"""
+
+UPSERT_SIGNATURES_SQL = """
+    INSERT INTO raw_product_minhash (product_id, signature, band_keys, source_updated_at)
+    VALUES %s
+    ON CONFLICT (product_id) DO UPDATE
+    SET signature = EXCLUDED.signature,
+        band_keys = EXCLUDED.band_keys,
+        source_updated_at = EXCLUDED.source_updated_at
+"""
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shingles(product_name: str, brand_name: str, image_urls: Iterable[str]) -> Set[str]:
+    """이름 단어/문자 4-gram, 브랜드 단어, 이미지 파일명을 shingle로 사용"""
+    name = " ".join(_WORD.findall(product_name.lower()))
+    result = {f"w:{word}" for word in name.split()}
+    compact = name.replace(" ", "")
+    result.update(f"c:{compact[i:i + 4]}" for i in range(max(len(compact) - 3, 1)))
+    result.update(f"b:{word}" for word in _WORD.findall(brand_name.lower()))
+    for url in image_urls or []:
+        if url:
+            filename = urlparse(url).path.rsplit("/", 1)[-1].lower()
+            if filename:
+                result.add(f"i:{filename}")
+    return result
+
+
+class MinHasher:
+    def __init__(self, bands: int, rows: int):
+        self.bands = bands
+        self.rows = rows
+        rng = random.Random(MINHASH_SEED)
+        size = bands * rows
+        self.coefficients = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(size)
+        ]
+
+    def signature(self, shingle_set: Set[str]) -> List[int]:
+        values = [_hash64(s) % MERSENNE_PRIME for s in shingle_set] or [0]
+        return [min((a * x + b) % MERSENNE_PRIME for x in values) for a, b in self.coefficients]
+
+    def band_keys(self, signature: List[int]) -> List[int]:
+        """band별 (band 번호, row 값들) → signed 64-bit 키 (Postgres BIGINT 범위)"""
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            key = _hash64(f"{band}:{','.join(map(str, chunk))}")
+            keys.append(key - (1 << 64) if key >= (1 << 63) else key)
+        return keys
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """MinHash 서명 일치 비율 = 추정 Jaccard 유사도"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent: Dict[str, str] = {}
+
+    def find(self, item: str) -> str:
+        self.parent.setdefault(item, item)
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: str, b: str) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def _keeper_rank(info: Dict) -> Tuple:
+    # URL 코드(I-/V-/ITEM-) ID 우선 → 이미지 많은 쪽 → ID 사전순
+    return (0 if URL_CODE_ID.match(info["productId"]) else 1, -len(info["imageUrls"]), info["productId"])
+
+
+def _pair_score(pairs: Dict[Tuple[str, str], float], a: str, b: str):
+    if a == b:
+        return 1.0
+    score = pairs.get((a, b) if a < b else (b, a))
+    return round(score, 3) if score is not None else None
+
+
+def build_proposals(pairs: Dict[Tuple[str, str], float], products: Dict[str, Dict]) -> List[Dict]:
+    uf = UnionFind()
+    for a, b in pairs:
+        uf.union(a, b)
+
+    clusters = defaultdict(set)
+    for a, b in pairs:
+        clusters[uf.find(a)].update((a, b))
+
+    proposals = []
+    for members in clusters.values():
+        infos = sorted((products[m] for m in members), key=_keeper_rank)
+        keep = infos[0]["productId"]
+        proposals.append({
+            "keep": keep,
+            "merge": [info["productId"] for info in infos[1:]],
+            "members": [
+                {
+                    "productId": info["productId"],
+                    "name": info["name"],
+                    "brand": info["brand"],
+                    # keeper와 직접 비교되지 않고 다른 멤버를 통해 묶인 경우 None
+                    "similarity": _pair_score(pairs, keep, info["productId"]),
+                }
+                for info in infos
+            ],
+        })
+    proposals.sort(key=lambda p: (-len(p["members"]), p["keep"]))
+    return proposals
+
+
+def _product_info(product_id, product_name, brand_name, image_urls) -> Dict:
+    return {"productId": product_id, "name": product_name, "brand": brand_name, "imageUrls": image_urls or []}
+
+
+def find_duplicates_full(cursor, hasher: MinHasher, threshold: float):
+    """전체 제품을 메모리에서 LSH 버킷팅 → 후보 쌍만 비교"""
+    cursor.execute(PRODUCTS_SQL)
+    products, signatures, rows_to_store = {}, {}, []
+    buckets = defaultdict(list)
+    for product_id, product_name, brand_name, image_urls, updated_at in cursor.fetchall():
+        products[product_id] = _product_info(product_id, product_name, brand_name, image_urls)
+        signature = hasher.signature(shingles(product_name, brand_name, image_urls))
+        keys = hasher.band_keys(signature)
+        signatures[product_id] = signature
+        rows_to_store.append((product_id, signature, keys, updated_at))
+        for key in keys:
+            buckets[key].append(product_id)
+
+    pairs = {}
+    compared = 0
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                pair = (a, b) if a < b else (b, a)
+                if pair in pairs:
+                    continue
+                compared += 1
+                score = similarity(signatures[a], signatures[b])
+                if score >= threshold:
+                    pairs[pair] = score
+
+    print(f"products={len(products)} candidate_comparisons={compared} duplicate_pairs={len(pairs)}", file=sys.stderr)
+    return build_proposals(pairs, products), rows_to_store
+
+
+def find_duplicates_incremental(conn, hasher: MinHasher, threshold: float):
+    """서명이 없거나 문서가 갱신된 제품만 band 키가 겹치는 기존 제품과 비교"""
+    cursor = conn.cursor()
+    cursor.execute(PRODUCTS_SQL + INCREMENTAL_FILTER_SQL)
+    pending = cursor.fetchall()
+
+    products, pairs = {}, {}
+    compared = 0
+    for product_id, product_name, brand_name, image_urls, updated_at in pending:
+        products[product_id] = _product_info(product_id, product_name, brand_name, image_urls)
+        signature = hasher.signature(shingles(product_name, brand_name, image_urls))
+        keys = hasher.band_keys(signature)
+
+        cursor.execute(CANDIDATES_SQL, (keys, product_id))
+        for other_id, other_signature, other_name, other_brand, other_images in cursor.fetchall():
+            compared += 1
+            score = similarity(signature, other_signature)
+            if score >= threshold:
+                products.setdefault(other_id, _product_info(other_id, other_name, other_brand, other_images))
+                pairs[tuple(sorted((product_id, other_id)))] = score
+
+        # 같은 실행에서 뒤에 오는 신규 제품끼리도 비교되도록 즉시 저장
+        execute_values(cursor, UPSERT_SIGNATURES_SQL, [(product_id, signature, keys, updated_at)])
+    conn.commit()
+    cursor.close()
+
+    print(f"new_or_updated={len(pending)} candidate_comparisons={compared} duplicate_pairs={len(pairs)}", file=sys.stderr)
+    return build_proposals(pairs, products)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="MinHash/LSH 기반 중복 제품 탐지 (병합 제안 출력)")
+    parser.add_argument("--bands", type=int, default=DEFAULT_BANDS, help="LSH band 수")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="band당 서명 row 수")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="추정 Jaccard 유사도 임계값")
+    parser.add_argument("--incremental", action="store_true", help="신규/변경 제품만 저장된 서명과 비교")
+    parser.add_argument("--store", action="store_true", help="전체 모드에서 계산한 서명을 저장 (이후 증분 모드 기준)")
+    parser.add_argument("--batch-size", type=int, default=500, help="--store 서명 저장 배치 크기")
+    parser.add_argument("--output", type=str, default=None, help="병합 제안 JSON 경로 (기본: stdout)")
+    args = parser.parse_args()
+
+    hasher = MinHasher(args.bands, args.rows)
+
+    init_rawdata_database_and_schema()
+    conn = connect_pg()
+    ensure_raw_tables(conn)
+    try:
+        if args.incremental or args.store:
+            cursor = conn.cursor()
+            for sql in ENSURE_MINHASH_TABLE_SQL:
+                cursor.execute(sql)
+            conn.commit()
+            cursor.close()
+
+        if args.incremental:
+            proposals = find_duplicates_incremental(conn, hasher, args.threshold)
+        else:
+            cursor = conn.cursor()
+            proposals, rows_to_store = find_duplicates_full(cursor, hasher, args.threshold)
+            if args.store:
+                # 파라미터(bands/rows)가 바뀌면 band 키가 달라지므로 전체 교체
+                cursor.execute("TRUNCATE raw_product_minhash")
+                for i in range(0, len(rows_to_store), args.batch_size):
+                    execute_values(cursor, UPSERT_SIGNATURES_SQL, rows_to_store[i:i + args.batch_size])
+                conn.commit()
+            cursor.close()
+    finally:
+        conn.close()
+
+    text = json.dumps({"proposals": proposals}, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(text, encoding="utf-8")
+        print(f"병합 제안 {len(proposals)}건 → {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+콘텐츠 주소(content-addressed) 이미지 캐시
+
+이미지 바이트의 SHA-256을 키로 `{root}/{digest[:2]}/{digest}.{ext}`에 저장한다.
+- URL이 달라도 바이트가 같으면 한 파일만 저장 (제품 간 공유 이미지, 리사이즈 없는 CDN 별칭 등)
+- 파일은 임시 파일에 쓴 뒤 os.replace → 동시 실행/중단 시에도 깨진 파일이 남지 않는다
+- 크기(width/height)는 헤더만 읽어 계산 (Pillow 의존성 없음: JPEG/PNG/GIF/WebP)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+DEFAULT_IMAGE_CACHE_DIR = "build/image-cache"
+
+# JPEG SOF 마커 (C4=DHT, C8=JPG, CC=DAC 제외)
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def image_format(data: bytes) -> Optional[str]:
+    if data[:3] == b"\xff\xd8\xff":
+        return "jpg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _jpeg_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    idx = 2
+    size = len(data)
+    while idx + 9 < size:
+        if data[idx] != 0xFF:
+            return None
+        marker = data[idx + 1]
+        if marker == 0xFF:  # fill byte
+            idx += 1
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[idx + 5:idx + 9])
+            return width, height
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:  # 길이 없는 마커
+            idx += 2
+            continue
+        (length,) = struct.unpack(">H", data[idx + 2:idx + 4])
+        idx += 2 + length
+    return None
+
+
+def _webp_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30:
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(data) >= 25:
+        (bits,) = struct.unpack("<I", data[21:25])
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(data) >= 30:
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def image_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) - 지원하지 않는 포맷/잘린 헤더면 None"""
+    fmt = image_format(data)
+    try:
+        if fmt == "jpg":
+            return _jpeg_dimensions(data)
+        if fmt == "png" and len(data) >= 24:
+            return struct.unpack(">II", data[16:24])
+        if fmt == "gif" and len(data) >= 10:
+            return struct.unpack("<HH", data[6:10])
+        if fmt == "webp":
+            return _webp_dimensions(data)
+    except struct.error:
+        return None
+    return None
+
+
+@dataclass
+class CachedImage:
+    sha256: str
+    path: Path
+    size: int
+    width: Optional[int]
+    height: Optional[int]
+    stored: bool  # 이번 호출에서 새로 저장했는지 (False면 같은 바이트가 이미 캐시에 있음)
+
+
+class ImageCache:
+    """SHA-256 키 이미지 저장소 (스레드 안전, 저장/중복 통계 누적)"""
+
+    def __init__(self, root: str = DEFAULT_IMAGE_CACHE_DIR):
+        self.root = Path(root)
+        self.lock = threading.Lock()
+        self.stored_files = 0
+        self.stored_bytes = 0
+        self.duplicate_files = 0
+        self.duplicate_bytes = 0
+        self._claimed: set = set()
+
+    def path_for(self, digest: str, ext: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.{ext}"
+
+    def put(self, data: bytes) -> CachedImage:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, image_format(data) or "bin")
+        dimensions = image_dimensions(data) or (None, None)
+
+        # 같은 바이트를 여러 스레드가 동시에 받아도 한 번만 저장/집계되도록 digest를 먼저 선점
+        with self.lock:
+            stored = digest not in self._claimed and not path.exists()
+            self._claimed.add(digest)
+            if stored:
+                self.stored_files += 1
+                self.stored_bytes += len(data)
+            else:
+                self.duplicate_files += 1
+                self.duplicate_bytes += len(data)
+
+        if stored:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+
+        return CachedImage(digest, path, len(data), dimensions[0], dimensions[1], stored)
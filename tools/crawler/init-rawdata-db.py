@@ -4,11 +4,14 @@ rawdata DB + 스키마(테이블) 초기화 스크립트
 
 사용 예:
   python3 tools/crawler/init-rawdata-db.py
+  python3 tools/crawler/init-rawdata-db.py --generated-columns   # brand_code/category_key/source/gds_cd 컬럼 + 인덱스
 
 환경 변수:
   RAWDATA_PGHOST / RAWDATA_PGPORT / RAWDATA_PGUSER / RAWDATA_PGPASSWORD / RAWDATA_PGDATABASE
+  RAWDATA_GENERATED_COLUMNS=1 : --generated-columns와 동일
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -19,7 +22,15 @@ from rawdata_db import init_rawdata_database_and_schema  # noqa: E402
 
 
 def main() -> int:
-    init_rawdata_database_and_schema()
+    parser = argparse.ArgumentParser(description="rawdata DB + 스키마 초기화")
+    parser.add_argument(
+        "--generated-columns",
+        action="store_true",
+        help="raw_product_document에 JSONB 경로 generated column + 인덱스 추가 (최초 1회 테이블 재작성)",
+    )
+    args = parser.parse_args()
+
+    init_rawdata_database_and_schema(generated_columns=True if args.generated_columns else None)
     return 0
 
 
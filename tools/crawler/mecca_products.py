@@ -0,0 +1,632 @@
+#!/usr/bin/env python3
+"""
+MECCA 제품 크롤러 공통 헬퍼 (가벼운 import 전용 모듈)
+
+sitemap/Playwright 크롤러가 함께 쓰는 순수 함수만 모아 둔다.
+- URL → 제품 코드 추출, 브랜드/카테고리/제품 문서 생성
+- JSON-LD 상세 파싱 (requests/bs4는 첫 호출 시에만 import)
+
+Playwright는 이 모듈에서 import하지 않는다 → sitemap 크롤러처럼 짧은 샤드 실행의 시작 비용을 줄인다.
+"""
+
+import json
+import re
+import sys
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Dict, Iterable, List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from document_template import DocumentTemplate, Slot, benchmark_template
+from product_ids import name_based_product_code
+
+BASE_URL = "https://www.mecca.com/en-au"
+BASE_SITE_URL = "https://www.mecca.com"
+
+DEFAULT_MAX_IMAGES_PER_PRODUCT = 20
+
+MECCA_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+# /en-au/{brand}/{product-slug}-{I|V}-{digits}/
+PRODUCT_CODE_IN_URL_PATTERN = re.compile(r"-([IViv]-\d+)(?:/|\\?|$)")
+PRODUCT_NUMERIC_ID_IN_URL_PATTERN = re.compile(r"-(\d+)(?:/|\\?|$)")
+# HTML 보조 이미지 수집: MECCA/contenthub 호스트만 정규식 안에서 바로 거른다
+# (기존 패턴은 raw 문자열 안의 `\\s`가 '\\'와 's'로 해석되어 's'가 들어간 URL을 놓쳤다)
+IMAGE_URL_PATTERN = re.compile(
+    r"https://(?:[a-z0-9-]+\.)*(?:mecca|contenthub)[a-z0-9.-]*"
+    r"/[^\"'\s<>?]*\.(?:jpg|jpeg|png|webp)(?:\?[^\"'\s<>]*)?",
+    re.IGNORECASE,
+)
+
+# CDN 리사이즈/포맷 파라미터 (SFCC dw/image: sw/sh/sm/sfrm, contenthub/imgix 계열: w/h/q/fm ...)
+# 이 파라미터만 다른 URL은 같은 원본 이미지로 본다.
+CDN_RESIZE_QUERY_PARAMS = frozenset({
+    "sw", "sh", "sm", "sfrm", "bgcolor", "strip",
+    "w", "h", "width", "height", "q", "quality", "fit", "fm", "format", "auto", "dpr", "crop",
+})
+
+URL_PATH_BRAND_PRODUCT_PATTERN = re.compile(r"^/en-au/([^/]+)/([^/]+)/?$")
+
+
+def create_brand_document(brand_name: str) -> Dict:
+    """브랜드 문서 생성 (스키마 준수)"""
+    now = datetime.utcnow().isoformat() + "Z"
+    brand_code = re.sub(r"[^A-Z0-9]", "", brand_name.upper())[:20]
+    brand_id = f"MECCA-{brand_code}"
+    
+    return {
+        "brandId": brand_id,
+        "brandCode": brand_code,
+        "brandName": brand_name,
+        "brandNameEn": brand_name,
+        "logoUrl": None,
+        "bannerUrl": None,
+        "description": None,
+        "slogan": None,
+        "story": None,
+        "websiteUrl": None,
+        "countryCode": "AU",
+        "foundedYear": None,
+        "tier": "STANDARD",
+        "displayYn": True,
+        "searchKeywords": [brand_name.lower()],
+        "mainCategoryIds": [],
+        "socialLinks": {
+            "instagram": None,
+            "facebook": None,
+            "youtube": None,
+            "tiktok": None,
+            "twitter": None,
+        },
+        "tags": ["mecca"],
+        "meta": {
+            "createdAt": now,
+            "updatedAt": now,
+            "createdBy": "crawler",
+            "updatedBy": "crawler",
+            "version": 1,
+        },
+    }
+
+
+def create_category_document(category: str, depth: int, parent_id: Optional[str] = None) -> Dict:
+    """카테고리 문서 생성 (스키마 준수)"""
+    now = datetime.utcnow().isoformat() + "Z"
+    
+    # MECCA 카테고리 매핑
+    category_names = {
+        "makeup": {"kr": "메이크업", "en": "Makeup"},
+        "skincare": {"kr": "스킨케어", "en": "Skincare"},
+        "fragrance": {"kr": "향수", "en": "Fragrance"},
+        "haircare": {"kr": "헤어케어", "en": "Haircare"},
+        "body": {"kr": "바디케어", "en": "Body"},
+        "wellness": {"kr": "웰니스", "en": "Wellness"},
+    }
+    
+    cat_info = category_names.get(category, {"kr": category, "en": category})
+    category_code = category.upper()
+    category_id = f"MECCA-{category_code}"
+    
+    # path 구성
+    if parent_id:
+        path_ids = [parent_id, category_id]
+        path_names = ["MECCA", cat_info["kr"]]
+        full_path = f"MECCA > {cat_info['kr']}"
+    else:
+        path_ids = [category_id]
+        path_names = [cat_info["kr"]]
+        full_path = cat_info["kr"]
+    
+    return {
+        "categoryId": category_id,
+        "categoryCode": category_code,
+        "categoryName": cat_info["kr"],
+        "categoryNameEn": cat_info["en"],
+        "parentId": parent_id,
+        "depth": depth,
+        "sortOrder": 0,
+        "path": {
+            "ids": path_ids,
+            "names": path_names,
+            "fullPath": full_path,
+        },
+        "iconUrl": None,
+        "bannerUrl": None,
+        "description": f"MECCA {cat_info['en']} products",
+        "categoryType": "DISPLAY",
+        "displayYn": True,
+        "showInNav": True,
+        "showInFilter": True,
+        "searchKeywords": [category, cat_info["kr"], cat_info["en"].lower()],
+        "attributes": [],
+        "seo": {
+            "title": f"{cat_info['en']} - MECCA",
+            "description": f"Shop {cat_info['en']} products from MECCA",
+            "keywords": [category, "mecca", cat_info["en"].lower()],
+            "canonicalUrl": f"https://www.mecca.com/en-au/{category}/",
+        },
+        "meta": {
+            "createdAt": now,
+            "updatedAt": now,
+            "createdBy": "crawler",
+            "updatedBy": "crawler",
+            "version": 1,
+        },
+    }
+
+
+def normalize_product_code(product_name: str, brand_name: str, url: str = "") -> str:
+    """제품 URL에서 코드를 추출하거나 이름 기반으로 생성"""
+    # URL에서 코드 추출 시도 (예: -V-038949, -I-038949)
+    product_code = extract_product_code_from_url(url) if url else None
+    if product_code:
+        return product_code
+
+    # 코드가 없으면 이름 기반 생성 (fallback은 keyed digest → 실행/샤드와 무관하게 동일)
+    return name_based_product_code(product_name, brand_name)
+
+
+def extract_product_code_from_url(url: str) -> Optional[str]:
+    """MECCA 제품 상세 URL에서 제품 코드를 추출한다."""
+    if not url:
+        return None
+
+    match = PRODUCT_CODE_IN_URL_PATTERN.search(url)
+    if match:
+        return match.group(1).upper()
+
+    match = PRODUCT_NUMERIC_ID_IN_URL_PATTERN.search(url)
+    if match:
+        return f"ITEM-{match.group(1)}"
+
+    return None
+
+
+def _title_from_slug(slug: str) -> str:
+    parts = [p for p in slug.replace("_", "-").split("-") if p]
+    return " ".join(p.capitalize() for p in parts)
+
+
+def _infer_brand_and_name_from_url(product_url: str) -> Dict:
+    parsed = urlparse(product_url)
+    match = URL_PATH_BRAND_PRODUCT_PATTERN.match(parsed.path)
+    if not match:
+        return {"brand": "Unknown", "name": "Unknown Product"}
+
+    brand_slug = match.group(1)
+    product_slug = match.group(2)
+
+    # product slug에서 -V-12345 / -I-12345 제거
+    product_slug_wo_code = PRODUCT_CODE_IN_URL_PATTERN.sub("", product_slug).strip("-")
+
+    return {
+        "brand": _title_from_slug(brand_slug),
+        "name": _title_from_slug(product_slug_wo_code),
+    }
+
+
+def normalize_image_url(url: str) -> str:
+    """CDN 리사이즈 쿼리를 제거한 이미지 URL (나머지 쿼리는 순서 유지)"""
+    if "?" not in url:
+        return url
+    parsed = urlparse(url.replace("&amp;", "&"))
+    kept = [
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in CDN_RESIZE_QUERY_PARAMS
+    ]
+    return urlunparse(parsed._replace(query=urlencode(kept)))
+
+
+def extract_image_urls(
+    html: str,
+    seed_urls: Iterable[str] = (),
+    limit: int = DEFAULT_MAX_IMAGES_PER_PRODUCT,
+) -> List[str]:
+    """
+    이미지 URL 수집 (순서 유지 dedup + 상한)
+    - seed_urls(JSON-LD image)를 먼저, HTML 본문은 상한에 닿을 때까지 한 번만 스캔
+    - 리사이즈 쿼리만 다른 변형은 normalize_image_url 기준으로 하나로 합친다
+    """
+    urls: List[str] = []
+    seen: set = set()
+
+    def _add(raw: str) -> bool:
+        url = normalize_image_url(raw)
+        if url not in seen:
+            seen.add(url)
+            urls.append(url)
+        return len(urls) >= limit
+
+    for raw in seed_urls:
+        if raw and _add(raw):
+            return urls
+    if html:
+        for match in IMAGE_URL_PATTERN.finditer(html):
+            if _add(match.group(0)):
+                break
+    return urls
+
+
+def _jsonld_products(soup) -> Iterable[Dict]:
+    for script in soup.find_all("script", {"type": "application/ld+json"}):
+        raw = script.get_text(strip=True)
+        if not raw:
+            continue
+        try:
+            data = json.loads(raw)
+        except Exception:
+            continue
+        candidates = [data] if isinstance(data, dict) else data if isinstance(data, list) else []
+        for candidate in candidates:
+            if isinstance(candidate, dict) and candidate.get("@type") == "Product":
+                yield candidate
+
+
+def fetch_product_details_from_jsonld(product_url: str) -> Optional[Dict]:
+    """
+    제품 상세 페이지 HTML에서 JSON-LD(Product)를 파싱하여 최소 필드를 추출한다.
+    - name
+    - brand
+    - imageUrls
+    - description
+    - productCode (sku/mpn)
+    """
+    # requests/bs4는 실제 상세 페이지를 가져올 때만 필요 → 모듈 import 시점에는 로드하지 않는다
+    import requests
+    from bs4 import BeautifulSoup
+
+    try:
+        response = requests.get(
+            product_url,
+            timeout=30,
+            headers={"User-Agent": MECCA_USER_AGENT},
+        )
+        response.raise_for_status()
+
+        html = response.text
+        soup = BeautifulSoup(html, "html.parser")
+
+        # JSON-LD(Product)의 image 배열 우선
+        jsonld_image_urls: List[str] = []
+        for candidate in _jsonld_products(soup):
+            image = candidate.get("image")
+            if isinstance(image, str):
+                jsonld_image_urls.append(image)
+            elif isinstance(image, list):
+                jsonld_image_urls.extend(item for item in image if isinstance(item, str))
+
+            name = candidate.get("name")
+            if not name:
+                continue
+
+            brand = candidate.get("brand")
+            brand_name: Optional[str] = None
+            if isinstance(brand, dict):
+                brand_name = brand.get("name")
+            elif isinstance(brand, str):
+                brand_name = brand
+
+            # HTML 전체에서 이미지 URL도 보조로 수집 (JSON-LD에 갤러리가 부족한 경우 보완)
+            image_urls = extract_image_urls(html, jsonld_image_urls)
+            return {
+                "name": name,
+                "brand": brand_name or "Unknown",
+                "url": product_url,
+                "imageUrls": image_urls,
+                "imageUrl": image_urls[0] if image_urls else None,  # 호환용(첫 장)
+                "description": candidate.get("description"),
+                "productCode": candidate.get("sku") or candidate.get("mpn") or extract_product_code_from_url(product_url),
+            }
+
+        # JSON-LD(Product)가 없더라도, URL 코드가 있는 경우에 한해 최소 정보로 백업한다.
+        # (페이지 구조 변경/부분 로드/블록 등으로 JSON-LD가 비어도 이미지/코드만이라도 확보)
+        product_code = extract_product_code_from_url(product_url)
+        if product_code is None:
+            return None
+
+        image_urls = extract_image_urls(html, jsonld_image_urls)
+        inferred = _infer_brand_and_name_from_url(product_url)
+        return {
+            "name": inferred["name"],
+            "brand": inferred["brand"],
+            "url": product_url,
+            "imageUrls": image_urls,
+            "imageUrl": image_urls[0] if image_urls else None,
+            "description": None,
+            "productCode": product_code,
+        }
+
+    except Exception as e:
+        print(f"  Error fetching JSON-LD: {e}", file=sys.stderr)
+        return None
+
+
+# 카테고리 매핑
+CATEGORY_MAP = {
+    "makeup": {"large": "화장품", "medium": "메이크업", "small": "기타"},
+    "skincare": {"large": "화장품", "medium": "스킨케어", "small": "기타"},
+    "fragrance": {"large": "향수", "medium": "향수", "small": "기타"},
+    "haircare": {"large": "헤어케어", "medium": "헤어케어", "small": "기타"},
+    "body": {"large": "바디케어", "medium": "바디케어", "small": "기타"},
+}
+DEFAULT_CATEGORY_INFO = {"large": "기타", "medium": "기타", "small": "기타"}
+
+# 제품 문서 스켈레톤 (스키마 준수) - 제품별 값은 Slot, 나머지는 템플릿 생성 시 1회 인코딩
+PRODUCT_DOCUMENT_TEMPLATE = DocumentTemplate({
+    "_meta": {
+        "schemaVersion": 1,
+        "savedAt": Slot("now"),
+        "clientInfo": {
+            "userAgent": "Playwright Crawler",
+            "appVersion": "1.0.0",
+        },
+    },
+    "_audit": {
+        "createdBy": "crawler",
+        "createdAt": Slot("now"),
+        "updatedBy": "crawler",
+        "updatedAt": Slot("now"),
+    },
+    "masterInfo": {
+        "gtin": Slot("gtin"),
+        "manufacturerGtin": None,
+        "gdsCd": Slot("product_code"),
+        "gaCode": None,
+        "gdsNm": Slot("product_name"),
+        "gdsEngNm": Slot("product_name"),
+        "standardCategory": Slot("standard_category"),
+        "packaging": None,
+        "productDimensions": None,
+        "caseDimensions": None,
+        "boxDimensions": None,
+        "manufacturingCountry": {"code": "AU", "name": "호주"},
+        "manufacturer": Slot("brand_name"),
+        "supplier": {"code": "MECCA", "name": "MECCA"},
+        "supplierType": "RETAILER",
+        "supplierIsImporter": True,
+        "md": {"empNo": "MECCA001", "name": "MECCA MD"},
+        "scm": {"empNo": "MECCA002", "name": "MECCA SCM"},
+        "brand": {
+            "code": Slot("brand_code"),
+            "krName": Slot("brand_name"),
+            "enName": Slot("brand_name"),
+        },
+        "flags": {
+            "dermoYn": False,
+            "premBrndYn": False,
+            "ebGdsYn": True,
+            "onlineExclGdsYn": False,
+            "harmgdsYn": False,
+            "selBanYn": False,
+            "medapYn": False,
+            "infnSelImpsYn": False,
+            "poutTlmtDdNumYn": False,
+            "medicalDeviceYn": False,
+        },
+        "onyoneSpNm": None,
+        "buyTypNm": "일반구매",
+        "gdsStatNm": "정상",
+        "manBabySpNm": None,
+        "gdsRegYmd": Slot("reg_ymd"),
+        "validPrdDdNum": None,
+        "poutTlmtDdNum": None,
+        "infnSelImpsYnValue": None,
+        "salesEndPlannedDate": None,
+        "salesEndDate": None,
+        "salesEndReason": None,
+        "foodStorageMethod": None,
+        "healthSupplementAvailableDays": None,
+        "derivingProductYn": False,
+        "derivingProduct": None,
+        "clearanceYn": False,
+        "clearanceBaseDays": None,
+        "clearanceDisposalType": None,
+        "disposalAllowed": True,
+        "returnAllowed": True,
+        "shelfLifeManageYn": False,
+        "shelfLifeAvailableDays": None,
+        "shelfLifeInboundAvailableDays": None,
+        "shelfLifeOutboundAvailableDays": None,
+    },
+    "onlineInfo": {
+        "prdtNo": Slot("product_code"),
+        "agoodsNo": None,
+        "aGoodsNm": None,
+        "prdtName": Slot("product_name"),
+        "onlinePrdtName": Slot("product_name"),
+        "prdtSbttlName": None,
+        "prdtStatCode": "01",
+        "prdtStatCodeName": "판매중",
+        "sellStatCode": "01",
+        "sellStatCodeName": "판매중",
+        "displayYn": "Y",
+        "saleEndText": None,
+        "prdtGbnCode": "01",
+        "prdtGbnCodeName": "일반상품",
+        "onlineMd": {"empNo": "MECCA003", "name": "MECCA Online MD"},
+        "onlineBrand": {
+            "code": Slot("brand_code"),
+            "name": Slot("brand_name"),
+            "useYn": True,
+        },
+        "orderQuantity": {
+            "min": 1,
+            "max": 10,
+            "increaseUnit": 1,
+        },
+        "orderLimits": {
+            "brandMin": None,
+            "brandMax": None,
+            "classMin": None,
+            "classMax": None,
+        },
+        "appExcluPrdtYn": False,
+    },
+    "languageDisplayList": [],
+    "shippingInfo": {
+        "hsCode": {"code": "3304", "name": "화장품"},
+        "exportCategory": {"code": "EXP001", "name": "일반"},
+        "posterYn": False,
+        "taxCode": None,
+        "restrictedCountries": None,
+    },
+    "reservationSale": {
+        "rsvCheckYn": False,
+        "restrictionPeriod": None,
+        "restrictShipmentYn": False,
+        "expectedInbound": None,
+    },
+    "options": [],
+    "displayCategories": [],
+    "thumbnailImages": Slot("thumbnail_images"),
+    "additionalInfo": {
+        "srchKeyWordText": Slot("search_keywords"),
+    },
+    "emblemInfo": {
+        "cleanBeautyYn": False,
+        "crueltyFreeYn": False,
+        "dermaTestedYn": False,
+        "glutenFreeYn": False,
+        "parabenFreeYn": False,
+        "veganYn": False,
+    },
+    "descriptionInfo": {
+        "sellingPoint": Slot("description"),
+        "whyWeLoveIt": None,
+        "featuredIngredients": None,
+        "howToUse": None,
+    },
+    "techSpecInfo": Slot("tech_spec_info"),
+    "noticeInfo": {
+        "noticeItemCode": "NOTICE001",
+        "ingredients": None,
+    },
+    "globalInfo": {
+        "prop65": None,
+        "prop65Message": None,
+    },
+    "videoInfo": {
+        "exposureType": "MAIN",
+        "entries": [],
+    },
+    "misc": {
+        "colorChipUseYn": None,
+    },
+})
+
+
+@lru_cache(maxsize=None)
+def _standard_category(category: str) -> Dict:
+    cat_info = CATEGORY_MAP.get(category, DEFAULT_CATEGORY_INFO)
+    return {
+        "large": {"code": cat_info["large"][:2].upper(), "name": cat_info["large"]},
+        "medium": {"code": cat_info["medium"][:2].upper(), "name": cat_info["medium"]},
+        "small": {"code": cat_info["small"][:2].upper(), "name": cat_info["small"]},
+    }
+
+
+def document_timestamps() -> Dict[str, str]:
+    """문서 시각 필드 (배치/실행마다 한 번 계산해 product_document_values에 넘긴다)"""
+    return {
+        "now": datetime.utcnow().isoformat() + "Z",
+        "reg_ymd": datetime.now().strftime("%Y-%m-%d"),
+    }
+
+
+def product_document_values(product: Dict, category: str, timestamps: Optional[Dict[str, str]] = None) -> Dict:
+    """제품별로 달라지는 필드만 계산 (timestamps가 없으면 지금 시각)"""
+    brand_name = product.get("brand", "Unknown")
+    product_name = product.get("name", "Unknown Product")
+    product_url = product.get("url", "")
+    
+    # URL에서 ID 추출하여 코드 생성
+    product_code = normalize_product_code(product_name, brand_name, product_url)
+    
+    image_urls: List[str] = product.get("imageUrls") or []
+    if not image_urls and product.get("imageUrl"):
+        image_urls = [product.get("imageUrl")]
+
+    thumbnail_images: List[Dict] = []
+    for idx, img_url in enumerate(image_urls):
+        if not img_url:
+            continue
+        path = urlparse(img_url).path or img_url.split("?")[0]
+        thumbnail_images.append(
+            {
+                "index": idx,
+                "path": path,
+                "fullUrl": img_url,
+                "originalName": None,
+                "typeCode": "MAIN" if idx == 0 else "SUB",
+                "seq": idx,
+            }
+        )
+
+    # 상세 이미지(스펙 이미지)로도 동일한 이미지 리스트를 사용한다.
+    # - 스키마: type=IMAGE/MIXED에서 images[].seq, images[].url 필요
+    tech_spec_images = [{"seq": idx, "url": u} for idx, u in enumerate(image_urls) if u]
+    tech_spec_info = (
+        {"type": "IMAGE", "images": tech_spec_images}
+        if tech_spec_images
+        else {"type": "HTML", "htmlContent": "<div></div>", "images": []}
+    )
+
+    return {
+        **(timestamps or document_timestamps()),
+        "product_code": product_code,
+        "gtin": f"MECCA{product_code[:10]}",
+        "product_name": product_name,
+        # 캐시된 dict를 문서가 공유하지 않도록 단계별 복사 (build 결과를 호출자가 수정해도 캐시 유지)
+        "standard_category": {level: dict(info) for level, info in _standard_category(category).items()},
+        "brand_name": brand_name,
+        "brand_code": normalize_product_code(brand_name, ""),
+        "thumbnail_images": thumbnail_images,
+        "search_keywords": f"{brand_name},{product_name}",
+        "description": product.get("description"),
+        "tech_spec_info": tech_spec_info,
+    }
+
+
+def create_product_document(
+    product: Dict,
+    category: str,
+    timestamps: Optional[Dict[str, str]] = None,
+) -> Dict:
+    """제품 문서 생성 (스키마 준수)"""
+    return PRODUCT_DOCUMENT_TEMPLATE.build(product_document_values(product, category, timestamps))
+
+
+def encode_product_document(
+    product: Dict, category: str, timestamps: Optional[Dict[str, str]] = None
+) -> Tuple[str, str]:
+    """(product_id, 제품 문서 JSON) - 정적 섹션은 사전 인코딩된 조각 재사용"""
+    values = product_document_values(product, category, timestamps)
+    return values["product_code"], PRODUCT_DOCUMENT_TEMPLATE.render(values)
+
+
+def benchmark_document_builder(iterations: int) -> None:
+    product_url = f"{BASE_URL}/mecca-max/off-duty-blush-stick/I-038949.html"
+    product = {
+        "name": "Off Duty Blush Stick",
+        "brand": "MECCA MAX",
+        "url": product_url,
+        "imageUrls": [
+            f"https://www.mecca.com/dw/image/v2/off-duty-blush-stick-{idx}.jpg"
+            for idx in range(DEFAULT_MAX_IMAGES_PER_PRODUCT)
+        ],
+        "description": None,
+    }
+    timestamps = document_timestamps()
+    print(f"Document builder benchmark ({iterations} docs)", file=sys.stderr)
+    benchmark_template(
+        PRODUCT_DOCUMENT_TEMPLATE,
+        lambda: product_document_values(product, "makeup", timestamps),
+        iterations,
+    )
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+제품 이미지 prefetch (content-addressed 로컬 캐시)
+
+크롤러는 이미지 URL(imageUrls → thumbnailImages[].fullUrl, techSpecInfo.images[].url)만 저장한다.
+이 단계는 크롤링과 분리된 선택(opt-in) 단계로,
+- 아직 캐시되지 않은 제품 이미지를 제한된 동시성으로 내려받아 image_cache.ImageCache에 저장하고
+- 이미지 항목에 sha256/width/height를 기록한 뒤 문서를 갱신한다.
+- 한 실행 안에서 같은 URL은 한 번만 받고, 같은 바이트는 한 파일만 저장한다.
+- 깨진 링크(HTTP 오류/이미지가 아닌 응답)는 이미지 항목에 fetchError/checkedAt을 기록하고 목록으로 보고한다.
+
+sha256이 없는 이미지가 남은 제품만 대상으로 하므로 반복 실행하면 이어서 진행된다.
+실패를 기록한 이미지는 --retry-failed-after-hours가 지나기 전까지 다시 받지 않는다.
+
+사용 예:
+  python3 tools/crawler/prefetch-product-images.py --limit 200
+  python3 tools/crawler/prefetch-product-images.py --cache-dir /data/image-cache --concurrency 16
+  python3 tools/crawler/prefetch-product-images.py --report build/image-prefetch.json
+  python3 tools/crawler/prefetch-product-images.py --retry-failed-after-hours 0   # 실패 이미지도 바로 재시도
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import requests
+from psycopg2.extras import execute_values
+
+# rawdata_db 유틸 import
+sys.path.append(str(Path(__file__).resolve().parent))
+from image_cache import DEFAULT_IMAGE_CACHE_DIR, CachedImage, ImageCache, image_format
+from mecca_products import MECCA_USER_AGENT
+from rawdata_db import (
+    connect_pg,
+    dumps_document,
+    ensure_raw_tables,
+    init_rawdata_database_and_schema,
+)
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT_SECONDS = 30
+DEFAULT_BATCH_SIZE = 50
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+DEFAULT_RETRY_FAILED_HOURS = 24
+
+# sha256이 없고, 실패 기록(checkedAt)이 없거나 재시도 시점(cutoff)이 지난 이미지
+# (checkedAt은 UTC ISO 문자열이라 문자열 비교가 시각 비교와 같다)
+_PENDING_IMAGE_FILTER = "? (!exists(@.sha256) && (!exists(@.checkedAt) || @.checkedAt < $cutoff))"
+
+# 받을 썸네일/상세 이미지가 하나라도 있는 제품
+PENDING_PRODUCTS_SQL = f"""
+    SELECT product_id, document
+    FROM raw_product_document
+    WHERE NOT is_synthetic
+      AND product_id > %(after)s
+      AND (
+        jsonb_path_exists(document, '$.thumbnailImages[*] {_PENDING_IMAGE_FILTER}', %(vars)s::jsonb)
+        OR jsonb_path_exists(document, '$.techSpecInfo.images[*] {_PENDING_IMAGE_FILTER}', %(vars)s::jsonb)
+      )
+    ORDER BY product_id
+    LIMIT %(limit)s
+"""
+
+UPDATE_DOCUMENTS_SQL = """
+    UPDATE raw_product_document AS p
+    SET document = v.document::jsonb, updated_at = NOW()
+    FROM (VALUES %s) AS v(product_id, document)
+    WHERE p.product_id = v.product_id
+"""
+
+
+def _image_entries(document: Dict) -> Iterable[Tuple[Dict, str]]:
+    """(이미지 항목 dict, URL 키) - 항목을 제자리에서 수정할 수 있도록 dict 그대로 반환"""
+    for entry in document.get("thumbnailImages") or []:
+        if isinstance(entry, dict) and entry.get("fullUrl"):
+            yield entry, "fullUrl"
+    for entry in (document.get("techSpecInfo") or {}).get("images") or []:
+        if isinstance(entry, dict) and entry.get("url"):
+            yield entry, "url"
+
+
+def utc_timestamp(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def is_pending(entry: Dict, cutoff: str) -> bool:
+    """아직 받아야 하는 이미지 항목 (PENDING_PRODUCTS_SQL 필터와 같은 조건)"""
+    return "sha256" not in entry and entry.get("checkedAt", "") < cutoff
+
+
+def fetch_image(session: requests.Session, url: str, cache: ImageCache, timeout: int):
+    """CachedImage 또는 오류 문자열"""
+    try:
+        with session.get(url, timeout=timeout, stream=True) as response:
+            if response.status_code != 200:
+                return f"HTTP {response.status_code}"
+            data = response.raw.read(MAX_IMAGE_BYTES + 1, decode_content=True)
+            content_type = response.headers.get("Content-Type", "unknown")
+    except requests.RequestException as e:
+        return f"{type(e).__name__}: {e}"
+
+    if len(data) > MAX_IMAGE_BYTES:
+        return f"too large (> {MAX_IMAGE_BYTES} bytes)"
+    if image_format(data) is None:
+        return f"not an image ({content_type})"
+    return cache.put(data)
+
+
+def prefetch_batch(rows, cache: ImageCache, fetched: Dict[str, object], args, stats: Dict) -> List:
+    """배치 안의 미캐시 URL을 병렬로 받아 문서에 반영 → 갱신할 (product_id, document JSON) 목록"""
+    pending_urls = []
+    for _, document in rows:
+        for entry, key in _image_entries(document):
+            if not is_pending(entry, args.retry_cutoff):
+                continue
+            stats["references"] += 1
+            url = entry[key]
+            if url not in fetched and url not in pending_urls:
+                pending_urls.append(url)
+
+    if pending_urls:
+        session = requests.Session()
+        session.headers["User-Agent"] = MECCA_USER_AGENT
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = {
+                executor.submit(fetch_image, session, url, cache, args.timeout): url
+                for url in pending_urls
+            }
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                fetched[futures[future]] = result
+                if isinstance(result, CachedImage):
+                    stats["downloaded_files"] += 1
+                    stats["downloaded_bytes"] += result.size
+        session.close()
+
+    checked_at = utc_timestamp(datetime.now(timezone.utc))
+    updates = []
+    for product_id, document in rows:
+        changed = False
+        for entry, key in _image_entries(document):
+            if not is_pending(entry, args.retry_cutoff):
+                continue
+            result = fetched.get(entry[key])
+            if isinstance(result, CachedImage):
+                entry["sha256"] = result.sha256
+                entry["width"] = result.width
+                entry["height"] = result.height
+                entry.pop("fetchError", None)
+                entry.pop("checkedAt", None)
+                stats["referenced_bytes"] += result.size
+                changed = True
+            elif result is not None:
+                # 실패를 기록해 재시도 간격이 지나기 전까지는 다시 받지 않는다
+                entry["fetchError"] = result
+                entry["checkedAt"] = checked_at
+                stats["broken"].append({"productId": product_id, "url": entry[key], "error": result})
+                changed = True
+        if changed:
+            updates.append((product_id, dumps_document(document)))
+    return updates
+
+
+def build_report(cache: ImageCache, stats: Dict, elapsed: float) -> Dict:
+    referenced = stats["referenced_bytes"]
+    downloaded = stats["downloaded_bytes"]
+    return {
+        "cacheDir": str(cache.root),
+        "products": stats["products"],
+        "productsUpdated": stats["products_updated"],
+        "imageReferences": stats["references"],
+        "downloadedFiles": stats["downloaded_files"],
+        "downloadedBytes": downloaded,
+        "storedFiles": cache.stored_files,
+        "storedBytes": cache.stored_bytes,
+        "duplicateFiles": cache.duplicate_files,
+        # 대역폭 절감: 같은 URL을 참조마다 받았을 때 대비 (URL 단위 dedup)
+        "bandwidthSavedBytes": referenced - downloaded,
+        # 저장 절감: 받은 바이트 중 이미 캐시에 있던(같은 digest) 바이트 (콘텐츠 단위 dedup)
+        "storageSavedBytes": cache.duplicate_bytes,
+        "storageSavedRate": round(cache.duplicate_bytes / downloaded, 4) if downloaded else 0.0,
+        "brokenLinks": stats["broken"],
+        "elapsedSeconds": round(elapsed, 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="제품 이미지 prefetch (SHA-256 content-addressed 캐시)")
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=os.getenv("RAWDATA_IMAGE_CACHE_DIR", DEFAULT_IMAGE_CACHE_DIR),
+        help="이미지 캐시 디렉터리 (기본: RAWDATA_IMAGE_CACHE_DIR 또는 build/image-cache)",
+    )
+    parser.add_argument("--limit", type=int, default=None, help="처리할 제품 수 상한 (기본: 전체)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="동시 다운로드 수")
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT_SECONDS, help="이미지 요청 타임아웃(초)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="제품 조회/갱신 배치 크기")
+    parser.add_argument("--report", type=str, default=None, help="결과 JSON 경로 (기본: stdout)")
+    parser.add_argument(
+        "--retry-failed-after-hours",
+        type=float,
+        default=DEFAULT_RETRY_FAILED_HOURS,
+        help="실패(fetchError)를 기록한 이미지를 다시 받기까지의 시간 (0이면 매번 재시도)",
+    )
+    args = parser.parse_args()
+    args.retry_cutoff = utc_timestamp(datetime.now(timezone.utc) - timedelta(hours=args.retry_failed_after_hours))
+
+    init_rawdata_database_and_schema()
+    conn = connect_pg()
+    ensure_raw_tables(conn)
+    cursor = conn.cursor()
+
+    cache = ImageCache(args.cache_dir)
+    fetched: Dict[str, object] = {}
+    stats = {
+        "products": 0,
+        "products_updated": 0,
+        "references": 0,
+        "referenced_bytes": 0,
+        "downloaded_files": 0,
+        "downloaded_bytes": 0,
+        "broken": [],
+    }
+    started = time.perf_counter()
+    after = ""
+
+    try:
+        while args.limit is None or stats["products"] < args.limit:
+            batch_size = args.batch_size
+            if args.limit is not None:
+                batch_size = min(batch_size, args.limit - stats["products"])
+            cursor.execute(
+                PENDING_PRODUCTS_SQL,
+                {"after": after, "limit": batch_size, "vars": json.dumps({"cutoff": args.retry_cutoff})},
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            after = rows[-1][0]
+            stats["products"] += len(rows)
+
+            updates = prefetch_batch(rows, cache, fetched, args, stats)
+            if updates:
+                execute_values(cursor, UPDATE_DOCUMENTS_SQL, updates)
+                conn.commit()
+                stats["products_updated"] += len(updates)
+            print(
+                f"  {stats['products']} products, {stats['downloaded_files']} images downloaded, "
+                f"{len(stats['broken'])} broken",
+                file=sys.stderr,
+            )
+    finally:
+        cursor.close()
+        conn.close()
+
+    report = build_report(cache, stats, time.perf_counter() - started)
+    print(
+        f"✅ stored {report['storedFiles']} files ({report['storedBytes']:,} bytes), "
+        f"storage saved {report['storageSavedBytes']:,} bytes, "
+        f"bandwidth saved {report['bandwidthSavedBytes']:,} bytes",
+        file=sys.stderr,
+    )
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.report:
+        Path(args.report).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.report).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
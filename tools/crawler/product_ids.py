@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+안정적인(deterministic) 제품/브랜드 ID 생성 + 실행 중 충돌 감지
+
+배경:
+- 기존 fallback `hash(product_name)`은 프로세스마다 seed가 달라(PYTHONHASHSEED)
+  같은 제품이 실행/샤드마다 다른 ID를 받아 ON CONFLICT 중복 제거가 무력화된다.
+- 대문자/숫자만 남긴 코드를 50자로 자르면 앞부분이 같은 긴 이름끼리 충돌한다.
+
+규칙:
+- 영문/숫자 코드가 50자 이하이면 그대로 사용 (기존 ID와 호환)
+- 50자를 넘으면 앞부분 + '_' + keyed digest(전체 코드)로 50자 안에 맞춘다
+- 영문/숫자가 하나도 없으면 "브랜드|이름"의 keyed digest 사용
+
+digest 키는 ID 네임스페이스 역할이므로 바꾸면 모든 fallback ID가 바뀐다.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import sys
+from typing import Dict
+from urllib.parse import urlparse, urlunparse
+
+ID_DIGEST_KEY = b"rawdata-product-id-v1"
+ID_DIGEST_HEX_CHARS = 16
+MAX_CODE_LENGTH = 50
+
+_NON_CODE_CHARS = re.compile(r"[^A-Z0-9]")
+
+
+def keyed_digest(text: str, length: int = ID_DIGEST_HEX_CHARS) -> str:
+    """프로세스/머신과 무관하게 동일한 keyed BLAKE2b digest (대문자 hex)"""
+    digest = hashlib.blake2b(text.encode("utf-8"), key=ID_DIGEST_KEY, digest_size=16)
+    return digest.hexdigest()[:length].upper()
+
+
+def canonical_url(url: str) -> str:
+    """scheme/host 소문자, query/fragment/끝 '/' 제거"""
+    parsed = urlparse(url.strip())
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse(((parsed.scheme or "https").lower(), parsed.netloc.lower(), path, "", "", ""))
+
+
+def _fit_code(code: str) -> str:
+    if len(code) <= MAX_CODE_LENGTH:
+        return code
+    return f"{code[:MAX_CODE_LENGTH - ID_DIGEST_HEX_CHARS - 1]}_{keyed_digest(code)}"
+
+
+def product_name_key(product_name: str, brand_name: str) -> str:
+    """브랜드+제품명에서 영문 대문자/숫자만 남긴 코드 (길이 맞추기 전)"""
+    return _NON_CODE_CHARS.sub("", (brand_name + product_name).upper())
+
+
+def name_based_product_code(product_name: str, brand_name: str) -> str:
+    """
+    브랜드+제품명 기반 코드 (URL 코드가 없을 때 사용)
+    - 저장된 문서(gdsNm, brand.krName)만으로 재계산할 수 있어야 하므로 URL은 쓰지 않는다
+    """
+    code = product_name_key(product_name, brand_name)
+    if code:
+        return _fit_code(code)
+    return f"PRDT_{keyed_digest(f'{brand_name}|{product_name}')}"
+
+
+def name_based_brand_code(brand_name: str) -> str:
+    """브랜드 이름 기반 코드 (숫자로 시작하면 BRAND_ 접두)"""
+    code = _NON_CODE_CHARS.sub("", brand_name.upper())
+    if code and code[0].isdigit():
+        code = f"BRAND_{code}"
+    return _fit_code(code) if code else f"BRAND_{keyed_digest(brand_name)}"
+
+
+class IdCollisionDetector:
+    """
+    한 번의 실행 안에서 서로 다른 제품이 같은 ID를 받는지 감지한다.
+    - fingerprint: 제품을 구분하는 원본 값 (canonical URL, 없으면 브랜드|이름)
+    - 충돌한 제품은 기존 제품을 덮어쓰지 않도록 호출 측에서 건너뛴다.
+    """
+
+    def __init__(self):
+        self.seen: Dict[str, str] = {}
+        self.collisions = 0
+
+    @staticmethod
+    def fingerprint(product_name: str, brand_name: str, url: str = "") -> str:
+        return canonical_url(url) if url else f"{brand_name}|{product_name}"
+
+    def check(self, product_id: str, fingerprint: str) -> bool:
+        """처음 보거나 같은 제품이면 True, 다른 제품과 ID가 겹치면 False"""
+        existing = self.seen.setdefault(product_id, fingerprint)
+        if existing == fingerprint:
+            return True
+        self.collisions += 1
+        print(
+            f"  ⚠️  ID collision: {product_id} ({existing} vs {fingerprint}) - skipped",
+            file=sys.stderr,
+        )
+        return False
@@ -14,6 +14,7 @@ PostgreSQL rawdata DB 유틸
 - RAWDATA_PGPASSWORD 또는 PGPASSWORD: 비밀번호
 - RAWDATA_PGDATABASE 또는 PGDATABASE: 데이터베이스명 (기본: rawdata)
 - RAWDATA_ADMIN_DB: DB 생성용 admin 연결 DB (기본: postgres)
+- RAWDATA_JSON_BACKEND: 문서 직렬화 백엔드 auto|orjson|msgspec|json (기본: auto)
 
 사용 예:
   export RAWDATA_PGHOST=your-db.xxxxx.ap-northeast-2.rds.amazonaws.com
@@ -32,6 +33,35 @@ from typing import Any, Dict, Optional
 
 import psycopg2
 
+# 문서 직렬화는 psycopg2 없이도 쓸 수 있도록 document_json에 두고 여기서 다시 export
+from document_json import JSON_BACKEND, dumps_document  # noqa: F401
+
+
+# raw_product_document JSONB 경로 표현식 (도구 간 공통: 브랜드/카테고리 매핑 키)
+# - generated column 정의에도 그대로 쓰이므로 IMMUTABLE 연산만 사용 (concat_ws는 STABLE이라 불가)
+BRAND_CODE_SQL = "(document->'masterInfo'->'brand'->>'code')"
+
+# 카테고리 ID = large.code + medium.code + small.code 를 '_'로 연결 후 앞뒤 '_' 제거
+CATEGORY_KEY_SQL = """btrim(
+        COALESCE(document->'masterInfo'->'standardCategory'->'large'->>'code', '') || '_' ||
+        COALESCE(document->'masterInfo'->'standardCategory'->'medium'->>'code', '') || '_' ||
+        COALESCE(document->'masterInfo'->'standardCategory'->'small'->>'code', ''),
+    '_')"""
+
+GDS_CD_SQL = "(document->'masterInfo'->>'gdsCd')"
+SOURCE_SQL = "(document->'masterInfo'->'supplier'->>'code')"
+
+# 합성(synthetic) 데이터 식별: product_id에 이 마커가 포함되면 합성 제품
+SYNTHETIC_ID_MARKER = "SYN"
+
+# raw_product_document의 선택적 STORED generated column (컬럼명 → 표현식)
+PRODUCT_GENERATED_COLUMNS = {
+    "brand_code": BRAND_CODE_SQL,
+    "category_key": CATEGORY_KEY_SQL,
+    "source": SOURCE_SQL,
+    "gds_cd": GDS_CD_SQL,
+}
+
 
 @dataclass(frozen=True)
 class PgConfig:
@@ -149,10 +179,39 @@ def ensure_database_exists(db_name: Optional[str] = None) -> str:
         return target_db
 
 
-def ensure_raw_tables(conn) -> None:
+# generated column 인덱스의 partial 조건 (pg_get_expr 정규화 형태)
+GENERATED_COLUMN_INDEX_PREDICATE = "(NOT is_synthetic)"
+
+# 인덱스가 기대 정의(INCLUDE 없음 + 실제 제품 partial 조건)와 다른지 - 예전 INCLUDE(product_id) 정의 감지용
+OUTDATED_INDEX_SQL = """
+    SELECT i.indnatts <> i.indnkeyatts
+        OR pg_get_expr(i.indpred, i.indrelid) IS DISTINCT FROM %(predicate)s
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = %(name)s
+      AND c.relnamespace = current_schema()::regnamespace
+"""
+
+
+def _ensure_partial_index(cursor, name: str, create_sql: str, predicate: str) -> None:
+    """
+    CREATE INDEX IF NOT EXISTS는 이름만 보고 건너뛰므로, 같은 이름의 인덱스가
+    다른 정의(INCLUDE 컬럼/다른 partial 조건)로 남아 있으면 DROP 후 다시 만든다.
+    """
+    cursor.execute(OUTDATED_INDEX_SQL, {"name": name, "predicate": predicate})
+    row = cursor.fetchone()
+    if row is not None and row[0]:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    cursor.execute(create_sql)
+
+
+def ensure_raw_tables(conn, generated_columns: Optional[bool] = None) -> None:
     """
     raw_*_document 테이블(상품/브랜드/카테고리)을 생성한다.
     - 크롤러가 JSON 원문을 그대로 저장하는 raw 영역 목적
+    - generated_columns=True (또는 RAWDATA_GENERATED_COLUMNS=1)이면 raw_product_document에
+      자주 조회하는 JSONB 경로를 STORED generated column + B-tree 인덱스로 추가한다.
+      최초 추가 시 테이블 재작성(ACCESS EXCLUSIVE 락)이 일어나므로 기본은 비활성.
     """
     cursor = conn.cursor()
 
@@ -198,11 +257,81 @@ def ensure_raw_tables(conn) -> None:
         "CREATE INDEX IF NOT EXISTS idx_raw_category_document_created_at ON raw_category_document(created_at)"
     )
 
+    # 출처 구분 컬럼: 삽입 시점에 채우고, 실제(비합성) 제품만 partial index로 관리
+    cursor.execute(
+        """
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = 'raw_product_document'
+          AND column_name = 'is_synthetic'
+        """
+    )
+    if cursor.fetchone() is None:
+        # DEFAULT 상수 컬럼 추가는 테이블 재작성 없음 (PG11+), 기존 행은 1회만 백필
+        cursor.execute(
+            "ALTER TABLE raw_product_document ADD COLUMN is_synthetic BOOLEAN NOT NULL DEFAULT FALSE"
+        )
+        cursor.execute(
+            "UPDATE raw_product_document SET is_synthetic = TRUE WHERE product_id LIKE %s",
+            (f"%{SYNTHETIC_ID_MARKER}%",),
+        )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_raw_product_document_real "
+        "ON raw_product_document(product_id) WHERE NOT is_synthetic"
+    )
+
+    if generated_columns is None:
+        generated_columns = (_env("RAWDATA_GENERATED_COLUMNS") or "").lower() in ("1", "true", "yes")
+    if generated_columns:
+        for column, expression in PRODUCT_GENERATED_COLUMNS.items():
+            cursor.execute(
+                f"ALTER TABLE raw_product_document ADD COLUMN IF NOT EXISTS {column} TEXT "
+                f"GENERATED ALWAYS AS ({expression}) STORED"
+            )
+            # 도구들은 실제 제품만 조회하므로 partial index (합성 행 제외 → index-only scan)
+            index_name = f"idx_raw_product_document_{column}"
+            _ensure_partial_index(
+                cursor,
+                index_name,
+                f"CREATE INDEX IF NOT EXISTS {index_name} "
+                f"ON raw_product_document({column}) WHERE NOT is_synthetic",
+                GENERATED_COLUMN_INDEX_PREDICATE,
+            )
+
     conn.commit()
     cursor.close()
 
 
-def init_rawdata_database_and_schema() -> None:
+def is_synthetic_product_id(product_id: str) -> bool:
+    """삽입 시 is_synthetic 컬럼 값 (크롤러/합성 데이터 생성기 공통)"""
+    return SYNTHETIC_ID_MARKER in product_id
+
+
+def product_key_sql(conn) -> Dict[str, str]:
+    """
+    PRODUCT_GENERATED_COLUMNS 각 키에 대해 쿼리에 쓸 SQL 조각을 돌려준다.
+    - generated column이 있으면 컬럼명, 없으면 동일한 JSONB 표현식
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = 'raw_product_document'
+          AND column_name = ANY(%s)
+        """,
+        (list(PRODUCT_GENERATED_COLUMNS),),
+    )
+    existing = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return {
+        column: column if column in existing else expression
+        for column, expression in PRODUCT_GENERATED_COLUMNS.items()
+    }
+
+
+def init_rawdata_database_and_schema(generated_columns: Optional[bool] = None) -> None:
     """
     rawdata DB 생성 + 테이블 생성까지 한 번에 수행.
     크롤러 실행 전에 호출하면 안전하다.
@@ -210,7 +339,7 @@ def init_rawdata_database_and_schema() -> None:
     db_name = ensure_database_exists()
     conn = connect_pg(target_db=db_name)
     try:
-        ensure_raw_tables(conn)
+        ensure_raw_tables(conn, generated_columns=generated_columns)
     finally:
         conn.close()
 
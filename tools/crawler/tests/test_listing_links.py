@@ -0,0 +1,196 @@
+"""
+리스팅 링크 추출 회귀 테스트
+
+crawl-mecca-products.py의 classify_product_url / card_name_and_brand / extract_links_from_soup가
+기존(앵커마다 규칙을 다시 만들고 카드마다 find를 반복하던) 구현과 같은 결과를 내는지
+저장해 둔 리스팅 HTML(fixtures/mecca-listing.html)로 확인한다.
+"""
+
+import importlib.util
+import re
+import sys
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+import pytest
+
+pytest.importorskip("bs4")
+# crawl-mecca-products.py가 모듈 최상단에서 import
+pytest.importorskip("requests")
+pytest.importorskip("psycopg2")
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+CRAWLER_DIR = Path(__file__).resolve().parents[1]
+FIXTURE_PATH = Path(__file__).resolve().parent / "fixtures" / "mecca-listing.html"
+
+
+def _load_crawler():
+    sys.path.insert(0, str(CRAWLER_DIR))
+    spec = importlib.util.spec_from_file_location("crawl_mecca_products", str(CRAWLER_DIR / "crawl-mecca-products.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+crawler = _load_crawler()
+
+
+# ---- 기존 구현 (비교 기준) ----
+
+_LEGACY_EXCLUDE_SEGMENTS = [
+    "new", "brands", "categories", "makeup", "skincare",
+    "fragrance", "haircare", "body", "wellness", "men",
+    "gifts", "shop", "view", "learn", "find", "book",
+    "stores", "services", "help", "account", "wishlist",
+    "services-events", "mecca-memo", "bag", "filter",
+    "sort", "page", "search", "travel-sized", "mini",
+]
+_LEGACY_CATEGORY_WORDS = [
+    "travel", "mini", "concern", "type", "ingredient",
+    "wash", "washes", "soap", "sanitizer", "scrubs",
+    "exfoliators", "perfumes", "cologne", "extrait",
+]
+
+
+def legacy_classify(full_url):
+    if "mecca.com" not in full_url:
+        return None
+    path_parts = [p for p in urlparse(full_url).path.strip("/").split("/") if p]
+    if len(path_parts) < 3:
+        return None
+    if path_parts and path_parts[0] == "en-au":
+        path_parts = path_parts[1:]
+    if len(path_parts) < 2:
+        return None
+    if any(seg in path_parts[:2] for seg in _LEGACY_EXCLUDE_SEGMENTS):
+        return None
+    brand_part = path_parts[0]
+    product_part = path_parts[1] if len(path_parts) > 1 else ""
+    if len(brand_part) < 3 or len(product_part) < 5:
+        return None
+    if len(product_part.split("-")) == 1 and len(product_part) < 10:
+        if len(product_part) < 12:
+            return None
+    if any(word in product_part.lower() for word in _LEGACY_CATEGORY_WORDS):
+        return None
+    if len(path_parts) > 2 and path_parts[2] in _LEGACY_CATEGORY_WORDS:
+        return None
+    return brand_part, product_part
+
+
+def legacy_card_name_and_brand(parent):
+    product_name = None
+    brand_name = None
+    name_selectors = [
+        ("h2", re.compile(r"product.*name|product.*title", re.I)),
+        ("h3", re.compile(r"product.*name|product.*title", re.I)),
+        ("span", re.compile(r"product.*name|title", re.I)),
+        ("div", re.compile(r"product.*name|title", re.I)),
+    ]
+    for tag, pattern in name_selectors:
+        name_elem = parent.find(tag, class_=pattern)
+        if name_elem:
+            product_name = name_elem.get_text(strip=True)
+            break
+    brand_elem = parent.find(["span", "div", "a"], class_=re.compile(r"brand", re.I))
+    if brand_elem:
+        brand_name = brand_elem.get_text(strip=True)
+    return product_name, brand_name
+
+
+def legacy_extract_links(soup):
+    products = []
+    seen_urls = set()
+    for link in soup.find_all("a", href=True):
+        href = link.get("href", "")
+        if not href or href.startswith("#") or href.startswith("javascript:"):
+            continue
+        full_url = urljoin(crawler.BASE_URL, href)
+        if full_url in seen_urls:
+            continue
+        classified = legacy_classify(full_url)
+        if classified is None:
+            continue
+        _, product_part = classified
+
+        parent = link.find_parent(["article", "div", "li", "section"])
+        if not parent:
+            parent = link
+        product_name, brand_name = legacy_card_name_and_brand(parent)
+
+        if not product_name:
+            link_text = link.get_text(strip=True)
+            if link_text and len(link_text) > 5 and len(link_text) < 100:
+                lines = [l.strip() for l in link_text.split("\n") if l.strip()]
+                if len(lines) >= 2:
+                    brand_name = lines[0]
+                    product_name = lines[1]
+                else:
+                    product_name = link_text
+        if not product_name:
+            product_name = product_part.replace("-", " ").title()
+        if not product_name or len(product_name) < 5:
+            continue
+        if product_name.lower() in ["new", "view all", "shop now", "learn more", "view products", "add to"]:
+            continue
+
+        seen_urls.add(full_url)
+        products.append({"name": product_name, "brand": brand_name or "", "url": full_url})
+    return products
+
+
+# ---- 테스트 ----
+
+@pytest.fixture(scope="module")
+def soup():
+    return BeautifulSoup(FIXTURE_PATH.read_text(encoding="utf-8"), "html.parser")
+
+
+def test_classify_matches_legacy_for_fixture_links(soup):
+    urls = [urljoin(crawler.BASE_URL, a["href"]) for a in soup.find_all("a", href=True)]
+    assert urls
+    for url in urls:
+        assert crawler.classify_product_url(url) == legacy_classify(url), url
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.mecca.com/en-au/mecca-max/off-duty-blush-stick/",
+    "https://www.mecca.com/mecca-max/off-duty-blush-stick/extra/",
+    "https://www.mecca.com/en-au/ouai/detangler/",
+    "https://www.mecca.com/en-au/ouai/detanglers/",
+    "https://www.mecca.com/en-au/ouai/detanglerss/",
+    "https://www.mecca.com/en-au/ouai/lip-oil/ingredient/",
+    "https://www.mecca.com/en-au/ouai/cleansing-extrait-oil/",
+    "https://www.mecca.com/en-au/gifts/lip-oil-set/",
+    "https://www.mecca.com/en-au/",
+    "https://www.mecca.com.evil.example/en-au/ouai/lip-glowy-balm/",
+])
+def test_classify_matches_legacy_edge_cases(url):
+    assert crawler.classify_product_url(url) == legacy_classify(url)
+
+
+def test_card_name_and_brand_matches_legacy(soup):
+    cards = soup.find_all(crawler.CARD_TAGS)
+    assert cards
+    for card in cards:
+        assert crawler.card_name_and_brand(card) == legacy_card_name_and_brand(card), str(card)[:120]
+
+
+def test_card_name_priority(soup):
+    names = {product["url"]: (product["name"], product["brand"]) for product in crawler.extract_links_from_soup(soup)}
+    assert names["https://www.mecca.com/en-au/laneige/lip-glowy-balm-V-041233/"] == ("Lip Glowy Balm", "Laneige")
+    assert names["https://www.mecca.com/en-au/dermalogica/daily-microfoliant-I-010201/?cgid=skincare"] == (
+        "Daily Microfoliant",
+        "Dermalogica",
+    )
+    assert names["https://www.mecca.com/en-au/nars/light-reflecting-foundation-I-062201/"] == (
+        "Light Reflecting Foundation",
+        "NARS",
+    )
+
+
+def test_extract_links_matches_legacy(soup):
+    products = crawler.extract_links_from_soup(soup)
+    assert products == legacy_extract_links(soup)
+    assert len(products) >= 8